@@ -0,0 +1,104 @@
+"""Repeat ``copy_rates_range`` requests with and without the on-disk bar store.
+
+Every symbol/timeframe range is requested ``--repeat`` times: from the terminal, then through a fresh
+``barstore.BarStore`` (the first request fills it, the others are served from disk plus a one-bar tail request).
+The simulator spends ``--call-latency`` seconds in every API call to stand in for the terminal's IPC round trip,
+and its clock advances ``--advance`` seconds between the requests so the forming bar keeps changing.
+
+Usage:
+    python benchmarks/bench_barstore.py
+    python benchmarks/bench_barstore.py --days 30 --call-latency 0.005 --json bench_barstore.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+os.environ.setdefault('PYMT5ADAPTER_BACKEND', 'simulator')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy  # noqa: E402
+
+import pymt5adapter as mta  # noqa: E402
+from pymt5adapter import backend  # noqa: E402
+from pymt5adapter.barstore import BarStore  # noqa: E402
+
+SYMBOLS = ('EURUSD', 'GBPUSD', 'USDJPY')
+TIMEFRAMES = ('M1', 'M5', 'H1')
+NOW = datetime(2020, 6, 3, 12, 0, tzinfo=timezone.utc)
+
+
+def request_all(days: int, repeat: int, advance: float) -> tuple:
+    """Request every range ``repeat`` times. Returns (seconds per pass, results of the last pass)."""
+    elapsed = []
+    results = {}
+    for _ in range(repeat):
+        if backend.is_simulated:
+            backend.mt5.advance(advance)
+            now = datetime.fromtimestamp(backend.mt5.now(), tz=timezone.utc)
+        else:
+            now = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        for symbol in SYMBOLS:
+            for tf_name in TIMEFRAMES:
+                tf = mta.TIMEFRAME[tf_name]
+                results[symbol, tf_name] = mta.copy_rates_range(symbol, tf, now - timedelta(days=days), now,
+                                                                paginate=True)
+        elapsed.append(time.perf_counter() - start)
+    return elapsed, results
+
+
+def run(days: int, repeat: int, call_latency: float, advance: float) -> dict:
+    if backend.is_simulated:
+        backend.mt5.reset()
+        backend.mt5.configure(call_latency=call_latency)
+        backend.mt5.set_time(NOW)
+    with mta.connected():
+        terminal, expected = request_all(days, repeat, advance)
+    if backend.is_simulated:
+        backend.mt5.set_time(NOW)
+    with tempfile.TemporaryDirectory() as directory, mta.connected(bar_store=BarStore(directory)):
+        stored, cached = request_all(days, repeat, advance)
+    if backend.is_simulated:
+        backend.mt5.reset()
+        mismatched = [key for key in expected if not numpy.array_equal(expected[key], cached[key])]
+        if mismatched:
+            raise AssertionError(f'bar store results differ for {mismatched}')
+    bars = sum(len(r) for r in expected.values())
+    return {
+        'backend'        : backend.name,
+        'ranges'         : len(expected),
+        'bars_per_pass'  : bars,
+        'terminal_ms'    : round(min(terminal) * 1000, 3),
+        'store_first_ms' : round(stored[0] * 1000, 3),
+        'store_repeat_ms': round(min(stored[1:]) * 1000, 3) if len(stored) > 1 else None,
+        'speedup'        : round(min(terminal) / min(stored[1:]), 1) if len(stored) > 1 else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=10, help='length of each requested range')
+    parser.add_argument('--repeat', type=int, default=5, help='requests per range')
+    parser.add_argument('--call-latency', type=float, default=0.001,
+                        help='simulated seconds per API call (simulator only)')
+    parser.add_argument('--advance', type=float, default=20.0,
+                        help='simulated seconds between the requests (simulator only)')
+    parser.add_argument('--json', help='write the result to this file as JSON')
+    args = parser.parse_args(argv)
+    result = run(args.days, args.repeat, args.call_latency, args.advance)
+    for key, value in result.items():
+        print(f'{key:<16}{value}')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
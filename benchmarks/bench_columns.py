@@ -0,0 +1,95 @@
+"""Cost of the native Python object return modes for a large rates result.
+
+A rates array of ``--bars`` bars is converted with ``helpers.make_native`` (the ``tolist`` path of
+``return_as_native_python_objects=True``) and with ``helpers.make_columnar`` (``return_as_native_python_objects=
+'columns'``). For each, the conversion time, the memory it allocates, and the time and size of a pickle round trip
+and a JSON dump are measured.
+
+Usage:
+    python benchmarks/bench_columns.py
+    python benchmarks/bench_columns.py --bars 1000000 --json bench_columns.json
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('PYMT5ADAPTER_BACKEND', 'simulator')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy  # noqa: E402
+
+from pymt5adapter.helpers import json_default  # noqa: E402
+from pymt5adapter.helpers import make_columnar  # noqa: E402
+from pymt5adapter.helpers import make_native  # noqa: E402
+from pymt5adapter.resample import RATES_DTYPE  # noqa: E402
+
+
+def rates(bars: int) -> numpy.ndarray:
+    rng = numpy.random.default_rng(0)
+    out = numpy.empty(bars, dtype=RATES_DTYPE)
+    out['time'] = 1577836800 + numpy.arange(bars, dtype=numpy.int64) * 60
+    out['close'] = 1.1 + numpy.cumsum(rng.normal(0, 0.0002, bars))
+    out['open'] = numpy.r_[out['close'][0], out['close'][:-1]]
+    out['high'] = numpy.maximum(out['open'], out['close']) + 0.0001
+    out['low'] = numpy.minimum(out['open'], out['close']) - 0.0001
+    out['tick_volume'] = rng.integers(1, 100, bars)
+    out['spread'] = rng.integers(5, 20, bars)
+    out['real_volume'] = 0
+    return out
+
+
+def measure(convert, data) -> dict:
+    start = time.perf_counter()
+    result = convert(data)
+    convert_s = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = convert(data)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    pickled = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    pickle.loads(pickled)
+    pickle_s = time.perf_counter() - start
+    start = time.perf_counter()
+    json.dumps(result, default=json_default)
+    json_s = time.perf_counter() - start
+    return {
+        'convert_s': round(convert_s, 4),
+        'memory_mb': round(memory / 2 ** 20, 1),
+        'pickle_s' : round(pickle_s, 4),
+        'pickle_mb': round(len(pickled) / 2 ** 20, 1),
+        'json_s'   : round(json_s, 4),
+    }
+
+
+def run(bars: int) -> dict:
+    data = rates(bars)
+    return {
+        'bars'    : bars,
+        'array_mb': round(data.nbytes / 2 ** 20, 1),
+        'tolist'  : measure(make_native, data),
+        'columns' : measure(make_columnar, data),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=100_000)
+    parser.add_argument('--json', help='write the result to this file as JSON')
+    args = parser.parse_args(argv)
+    result = run(args.bars)
+    for key, value in result.items():
+        print(f'{key:<10}{value}')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
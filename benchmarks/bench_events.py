@@ -0,0 +1,184 @@
+"""CPU cost of EventEngine polling with a fixed 1 ms pause and with adaptive polling.
+
+The simulator runs on a live clock starting a few seconds before a new M1 bar. Each scenario is run for
+``--seconds`` wall seconds, once sleeping a fixed 1 ms between polls (the old ``iter_event`` behaviour) and once
+with the adaptive pauses of ``EventEngine.next_sleep``. It reports the CPU time used per wall second and per event:
+
+- ``new_bar``: NEW_BAR on M1 for ``--symbols`` symbols (sleeps until the bar opens);
+- ``ticks``: TICK_LAST_CHANGE for ``--symbols`` symbols (backs off between the simulated ticks).
+
+``spike`` times the selection of the new ticks from one polled batch of ``--spike`` ticks: the former per-row
+``CopyTick`` loop, ``event.new_ticks`` with a CopyTick per new tick, and ``new_ticks`` alone (``batch_ticks=True``).
+
+``trades`` times one poll cycle over ``--positions`` open positions and as many pending orders while nothing changes:
+requesting and diffing positions_get and orders_get every cycle, and the count gated snapshots of EventEngine.
+
+Usage:
+    python benchmarks/bench_events.py
+    python benchmarks/bench_events.py --seconds 10 --json bench_events.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from datetime import timezone
+
+os.environ.setdefault('PYMT5ADAPTER_BACKEND', 'simulator')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy  # noqa: E402
+
+import pymt5adapter as mta  # noqa: E402
+from pymt5adapter import backend  # noqa: E402
+from pymt5adapter.event import EVENT  # noqa: E402
+from pymt5adapter.event import EventEngine  # noqa: E402
+from pymt5adapter.event import _ORDER_STATE  # noqa: E402
+from pymt5adapter.event import _POSITION_STATE  # noqa: E402
+from pymt5adapter.event import _TRADE_EVENTS  # noqa: E402
+from pymt5adapter.event import diff_snapshot  # noqa: E402
+from pymt5adapter.event import new_ticks  # noqa: E402
+from pymt5adapter.tickarchive import TICKS_DTYPE  # noqa: E402
+from pymt5adapter.types import CopyTick  # noqa: E402
+
+SYMBOLS = ('EURUSD', 'GBPUSD', 'USDJPY', 'USDCHF', 'AUDUSD')
+START = datetime(2020, 6, 3, 11, 59, 57, tzinfo=timezone.utc)
+
+
+def measure(subscriptions, seconds, fixed_sleep=None) -> dict:
+    sim = backend.mt5
+    sim.reset()
+    sim.set_time(None)
+    sim.advance(START.timestamp() - sim.now())
+    engine = EventEngine(subscriptions)
+    events = polls = 0
+    with mta.connected(collect_metrics=False):
+        engine.poll()
+        cpu, end = time.process_time(), time.monotonic() + seconds
+        while True:
+            new = engine.poll()
+            polls += 1
+            events += len(new)
+            pause = engine.next_sleep(new) if fixed_sleep is None else fixed_sleep
+            if time.monotonic() + pause > end:
+                break
+            time.sleep(pause)
+        cpu = time.process_time() - cpu
+    sim.reset()
+    return {
+        'events'          : events,
+        'polls'           : polls,
+        'cpu_s'           : round(cpu, 3),
+        'cpu_per_wall_s'  : round(cpu / seconds, 4),
+        'cpu_ms_per_event': round(cpu / events * 1000, 3) if events else None,
+    }
+
+
+def spike(size: int) -> dict:
+    ticks = numpy.zeros(size, dtype=TICKS_DTYPE)
+    ticks['time_msc'] = 1591185600000 + numpy.arange(size) // 3  # a few ticks per millisecond
+    ticks['time'] = ticks['time_msc'] // 1000
+    ticks['bid'] = 1.1
+    last_msc = int(ticks['time_msc'][size // 10])
+
+    start = time.perf_counter()
+    rows = []
+    for row in ticks:
+        tick = CopyTick(*row)
+        if tick.time_msc > last_msc:
+            rows.append(tick)
+    loop = time.perf_counter() - start
+    start = time.perf_counter()
+    objects = list(map(CopyTick._make, new_ticks(ticks, last_msc, None)[0].tolist()))
+    vectorized = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = new_ticks(ticks, last_msc, None)[0]
+    batched = time.perf_counter() - start
+    assert len(rows) == len(objects) == len(batch)
+    return {
+        'ticks'        : size,
+        'new'          : len(batch),
+        'row_loop_ms'  : round(loop * 1000, 2),
+        'vectorized_ms': round(vectorized * 1000, 2),
+        'batch_ms'     : round(batched * 1000, 3),
+    }
+
+
+def trades(positions: int, polls: int) -> dict:
+    sim = backend.mt5
+    sim.reset()
+    sim.set_time(START)
+    with mta.connected(collect_metrics=False):
+        for i in range(positions):
+            symbol = SYMBOLS[i % len(SYMBOLS)]
+            sim.Buy(symbol, 0.1)
+            price = mta.symbol_info_tick(symbol).ask * 0.99
+            sim.order_send(dict(action=mta.TRADE_ACTION.PENDING, symbol=symbol, volume=0.1, price=price,
+                                type=mta.ORDER_TYPE.BUY_LIMIT))
+        old_positions = {p.ticket: p for p in mta.positions_get()}
+        old_orders = {o.ticket: o for o in mta.orders_get()}
+        start = time.perf_counter()
+        for _ in range(polls):
+            new_positions = {p.ticket: p for p in mta.positions_get()}
+            new_orders = {o.ticket: o for o in mta.orders_get()}
+            assert diff_snapshot(old_positions, new_positions, _POSITION_STATE) == ([], [], [])
+            assert diff_snapshot(old_orders, new_orders, _ORDER_STATE) == ([], [], [])
+            old_positions, old_orders = new_positions, new_orders
+        full = time.perf_counter() - start
+        engine = EventEngine([(None, None, _TRADE_EVENTS)])
+        engine.poll()
+        start = time.perf_counter()
+        for _ in range(polls):
+            assert engine.poll() == []
+        gated = time.perf_counter() - start
+    sim.reset()
+    return {
+        'positions'   : positions,
+        'orders'      : positions,
+        'full_diff_us': round(full / polls * 1e6, 1),
+        'gated_us'    : round(gated / polls * 1e6, 1),
+    }
+
+
+def run(seconds: float, symbols: int, spike_size: int, positions: int = 100, polls: int = 1000) -> dict:
+    names = SYMBOLS[:symbols]
+    scenarios = {
+        'new_bar': [(s, mta.TIMEFRAME.M1, EVENT.NEW_BAR) for s in names],
+        'ticks'  : [(s, None, EVENT.TICK_LAST_CHANGE) for s in names],
+    }
+    result = {'seconds': seconds, 'symbols': len(names)}
+    for name, subscriptions in scenarios.items():
+        result[name] = {
+            'fixed_1ms': measure(subscriptions, seconds, fixed_sleep=0.001),
+            'adaptive' : measure(subscriptions, seconds),
+        }
+    result['spike'] = spike(spike_size)
+    result['trades'] = trades(positions, polls)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--symbols', type=int, default=len(SYMBOLS))
+    parser.add_argument('--spike', type=int, default=100_000, help='ticks in the spike batch')
+    parser.add_argument('--positions', type=int, default=100, help='open positions and pending orders')
+    parser.add_argument('--polls', type=int, default=1000, help='poll cycles timed in the trades scenario')
+    parser.add_argument('--json', help='write the result to this file as JSON')
+    args = parser.parse_args(argv)
+    result = run(args.seconds, args.symbols, args.spike, args.positions, args.polls)
+    for key, value in result.items():
+        if key not in ('spike', 'trades') and isinstance(value, dict):
+            for mode, stats in value.items():
+                print(f'{key + " " + mode:<20}{stats}')
+        else:
+            print(f'{key:<20}{value}')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
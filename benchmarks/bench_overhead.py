@@ -0,0 +1,206 @@
+"""Per-call overhead of the pymt5adapter wrappers.
+
+Every function from ``core.get_function_dispatch()`` is timed raw (the ``core.mt5_*`` alias, i.e. a direct
+backend call) and wrapped (the public adapter function) under each combination of API state:
+logger (none, INFO, DEBUG) x raise_on_errors x return type (native, dict, python objects). The reported
+overhead is ``min(wrapped) - min(raw)`` in nanoseconds per call. The latency histograms are only recorded
+when ``--metrics`` is passed.
+
+The simulator backend is used unless PYMT5ADAPTER_BACKEND is already set, so the benchmark runs anywhere.
+
+Usage:
+    python benchmarks/bench_overhead.py
+    python benchmarks/bench_overhead.py --states bare --max-overhead-ns 2000   # release gate
+    python benchmarks/bench_overhead.py --json bench_output.json --only symbol_info_tick copy_rates_from_pos
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from datetime import timezone
+
+os.environ.setdefault('PYMT5ADAPTER_BACKEND', 'simulator')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pymt5adapter as mta  # noqa: E402
+from pymt5adapter import backend  # noqa: E402
+from pymt5adapter import core  # noqa: E402
+
+SYMBOL = 'EURUSD'
+BATCH = ('EURUSD', 'GBPUSD', 'USDJPY')
+SKIPPED = {'initialize', 'login', 'shutdown'}  # they change the connection itself
+LOGGER_LEVELS = {'none': None, 'info': logging.INFO, 'debug': logging.DEBUG}
+RETURN_MODES = ('native', 'dict', 'python')
+
+
+def raw_batch(raw):
+    """The loop over BATCH that a batch function replaces."""
+
+    def loop(*args):
+        return {symbol: raw(symbol, *args) for symbol in BATCH}
+
+    return loop
+
+
+def build_cases(position_ticket: int) -> dict:
+    """name -> (wrapped args, wrapped kwargs, raw function, raw args)"""
+    tf = mta.TIMEFRAME.M1
+    t_to = datetime.fromtimestamp(int(time.time()), tz=timezone.utc) if not backend.is_simulated else \
+        datetime.fromtimestamp(backend.mt5.now(), tz=timezone.utc)
+    t_from = datetime.fromtimestamp(t_to.timestamp() - 600, tz=timezone.utc)
+    history_from = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    request = dict(action=mta.TRADE_ACTION_SLTP, symbol=SYMBOL, position=position_ticket, sl=0.0, tp=0.0)
+    check = dict(action=mta.TRADE_ACTION_DEAL, symbol=SYMBOL, type=mta.ORDER_TYPE_BUY, volume=0.01)
+    return {
+        'account_info'              : ((), {}, core.mt5_account_info, ()),
+        'copy_rates'                : ((SYMBOL, tf), {'count': 100}, core.mt5_copy_rates_from_pos, (SYMBOL, tf, 0, 100)),
+        'copy_rates_batch'          : ((BATCH, tf), {'count': 100}, raw_batch(core.mt5_copy_rates_from_pos),
+                                       (tf, 0, 100)),
+        'copy_rates_from'           : ((SYMBOL, tf, t_to, 100), {}, core.mt5_copy_rates_from, (SYMBOL, tf, t_to, 100)),
+        'copy_rates_from_pos'       : ((SYMBOL, tf, 0, 100), {}, core.mt5_copy_rates_from_pos, (SYMBOL, tf, 0, 100)),
+        'copy_rates_range'          : ((SYMBOL, tf, t_from, t_to), {}, core.mt5_copy_rates_range,
+                                       (SYMBOL, tf, t_from, t_to)),
+        'copy_ticks_batch'          : ((BATCH, t_from, 100, mta.COPY_TICKS_ALL), {},
+                                       raw_batch(core.mt5_copy_ticks_from), (t_from, 100, mta.COPY_TICKS_ALL)),
+        'copy_ticks_from'           : ((SYMBOL, t_from, 100, mta.COPY_TICKS_ALL), {}, core.mt5_copy_ticks_from,
+                                       (SYMBOL, t_from, 100, mta.COPY_TICKS_ALL)),
+        'copy_ticks_range'          : ((SYMBOL, t_from, t_to, mta.COPY_TICKS_ALL), {}, core.mt5_copy_ticks_range,
+                                       (SYMBOL, t_from, t_to, mta.COPY_TICKS_ALL)),
+        'history_deals_get'         : ((history_from, t_to), {}, core.mt5_history_deals_get, (history_from, t_to)),
+        'history_deals_total'       : ((history_from, t_to), {}, core.mt5_history_deals_total, (history_from, t_to)),
+        'history_orders_get'        : ((history_from, t_to), {}, core.mt5_history_orders_get, (history_from, t_to)),
+        'history_orders_total'      : ((history_from, t_to), {}, core.mt5_history_orders_total, (history_from, t_to)),
+        'last_error'                : ((), {}, core.mt5_last_error, ()),
+        'order_calc_margin'         : ((mta.ORDER_TYPE_BUY, SYMBOL, 1.0, 1.1), {}, core.mt5_order_calc_margin,
+                                       (mta.ORDER_TYPE_BUY, SYMBOL, 1.0, 1.1)),
+        'order_calc_profit'         : ((mta.ORDER_TYPE_BUY, SYMBOL, 1.0, 1.1, 1.2), {}, core.mt5_order_calc_profit,
+                                       (mta.ORDER_TYPE_BUY, SYMBOL, 1.0, 1.1, 1.2)),
+        'order_check'               : ((check,), {}, core.mt5_order_check, (check,)),
+        'order_send'                : ((request,), {}, core.mt5_order_send, (request,)),
+        'orders_get'                : ((), {}, core.mt5_orders_get, ()),
+        'orders_total'              : ((), {}, core.mt5_orders_total, ()),
+        'period_seconds'            : ((tf,), {}, mta.PERIOD_SECONDS.get, (tf,)),
+        'positions_get'             : ((), {}, core.mt5_positions_get, ()),
+        'positions_total'           : ((), {}, core.mt5_positions_total, ()),
+        'symbol_info'               : ((SYMBOL,), {}, core.mt5_symbol_info, (SYMBOL,)),
+        'symbol_info_tick'          : ((SYMBOL,), {}, core.mt5_symbol_info_tick, (SYMBOL,)),
+        'symbol_select'             : ((SYMBOL,), {}, core.mt5_symbol_select, (SYMBOL, True)),
+        'symbols_get'               : ((), {}, core.mt5_symbols_get, ()),
+        'symbols_total'             : ((), {}, core.mt5_symbols_total, ()),
+        'terminal_info'             : ((), {}, core.mt5_terminal_info, ()),
+        'trade_retcode_description' : ((mta.TRADE_RETCODE_DONE,), {}, lambda r: mta.TRADE_RETCODE(r).name,
+                                       (mta.TRADE_RETCODE_DONE,)),
+        'version'                   : ((), {}, core.mt5_version, ()),
+    }
+
+
+def time_per_call(func, args, kwargs, repeat: int, min_time: float) -> float:
+    """Best-of-``repeat`` time per call in ns, with the loop count calibrated to run for ``min_time`` seconds."""
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func(*args, **kwargs)
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time * 1e9 or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time * 1e8 else 2
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func(*args, **kwargs)
+        best = min(best, (time.perf_counter_ns() - start) / number)
+    return best
+
+
+def iter_states(which: str):
+    if which == 'bare':
+        yield 'none', False, 'native'
+        return
+    yield from itertools.product(LOGGER_LEVELS, (False, True), RETURN_MODES)
+
+
+def run(which='all', only=None, repeat=5, min_time=0.05, collect_metrics=False):
+    results = []
+    if backend.is_simulated:
+        backend.mt5.reset()
+        backend.mt5.set_time(datetime(2020, 6, 3, 12, 0, tzinfo=timezone.utc))
+    for logger_name, raise_on_errors, return_mode in iter_states(which):
+        level = LOGGER_LEVELS[logger_name]
+        logger = mta.get_logger(path_to_logfile=os.devnull, loglevel=level) if level else None
+        with mta.connected(logger=logger,
+                           raise_on_errors=raise_on_errors,
+                           return_as_dict=return_mode == 'dict',
+                           return_as_native_python_objects=return_mode == 'python',
+                           collect_metrics=collect_metrics):
+            position = core.mt5_order_send(dict(action=mta.TRADE_ACTION_DEAL, symbol=SYMBOL,
+                                                type=mta.ORDER_TYPE_BUY, volume=0.01))
+            cases = build_cases(position.order if position else 0)
+            for name, wrapped in core.get_function_dispatch().items():
+                if name in SKIPPED or (only and name not in only):
+                    continue
+                if name not in cases:
+                    print(f'no benchmark case for {name}', file=sys.stderr)
+                    continue
+                args, kwargs, raw, raw_args = cases[name]
+                try:
+                    wrapped_ns = time_per_call(wrapped, args, kwargs, repeat, min_time)
+                except mta.MT5Error as e:
+                    print(f'{name} raised {e!r} in state {logger_name}/{raise_on_errors}/{return_mode}',
+                          file=sys.stderr)
+                    continue
+                raw_ns = time_per_call(raw, raw_args, {}, repeat, min_time)
+                results.append(dict(
+                    function=name, logger=logger_name, raise_on_errors=raise_on_errors, returns=return_mode,
+                    raw_ns=round(raw_ns), wrapped_ns=round(wrapped_ns), overhead_ns=round(wrapped_ns - raw_ns),
+                ))
+            core.mt5_order_send(dict(action=mta.TRADE_ACTION_DEAL, symbol=SYMBOL, type=mta.ORDER_TYPE_SELL,
+                                     volume=0.01, position=position.order))
+    return results
+
+
+def print_table(results):
+    header = f"{'function':<28}{'logger':<8}{'raise':<7}{'returns':<9}{'raw ns':>12}{'wrapped ns':>12}" \
+             f"{'overhead ns':>13}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['function']:<28}{r['logger']:<8}{str(r['raise_on_errors']):<7}{r['returns']:<9}"
+              f"{r['raw_ns']:>12}{r['wrapped_ns']:>12}{r['overhead_ns']:>13}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--states', choices=('all', 'bare'), default='all',
+                        help="'bare' only times the state without logger and post-processing")
+    parser.add_argument('--only', nargs='*', help='restrict to these function names')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.05, help='seconds per timing loop')
+    parser.add_argument('--metrics', action='store_true', help='enable the latency histograms')
+    parser.add_argument('--json', help='write the results to this file as JSON')
+    parser.add_argument('--max-overhead-ns', type=float,
+                        help='exit with status 1 when a bare-state overhead exceeds this value')
+    args = parser.parse_args(argv)
+    results = run(args.states, args.only, args.repeat, args.min_time, args.metrics)
+    print(f'backend: {backend.name}')
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.max_overhead_ns is not None:
+        failures = [r for r in results if r['logger'] == 'none' and not r['raise_on_errors']
+                    and r['returns'] == 'native' and r['overhead_ns'] > args.max_overhead_ns]
+        for r in failures:
+            print(f"OVERHEAD GATE: {r['function']} {r['overhead_ns']} ns > {args.max_overhead_ns} ns",
+                  file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
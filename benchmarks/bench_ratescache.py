@@ -0,0 +1,85 @@
+"""Cost of repeated ``copy_rates_from_pos`` calls with and without a ``RatesCache``.
+
+``--components`` strategy components each request the last ``--bars`` bars of every timeframe in ``--timeframes``
+on each of ``--ticks`` simulated ticks, which are ``--step`` seconds apart. The calls are timed without a cache and
+with ``connected(rates_cache=True)``, and the cached results are checked against the uncached ones.
+
+Usage:
+    python benchmarks/bench_ratescache.py
+    python benchmarks/bench_ratescache.py --components 8 --bars 5000 --json bench_ratescache.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from datetime import timezone
+
+os.environ.setdefault('PYMT5ADAPTER_BACKEND', 'simulator')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy  # noqa: E402
+
+import pymt5adapter as mta  # noqa: E402
+from pymt5adapter import backend  # noqa: E402
+
+TIMEFRAMES = ('M1', 'M5', 'H1')
+
+
+def replay(ticks, step, components, timeframes, bars, rates_cache):
+    sim = backend.mt5
+    sim.reset()
+    sim.set_time(datetime(2020, 6, 3, 12, tzinfo=timezone.utc))
+    results = []
+    with mta.connected(rates_cache=rates_cache) as conn:
+        start = time.perf_counter()
+        for _ in range(ticks):
+            for _ in range(components):
+                for timeframe in timeframes:
+                    results.append(mta.copy_rates_from_pos('EURUSD', timeframe, 0, bars))
+            sim.advance(step)
+        elapsed = time.perf_counter() - start
+        info = conn.rates_cache and conn.rates_cache.info()
+    sim.reset()
+    return elapsed, results, info
+
+
+def run(ticks: int, step: float, components: int, timeframes, bars: int) -> dict:
+    timeframes = [mta.TIMEFRAME[name] for name in timeframes]
+    plain, expected, _ = replay(ticks, step, components, timeframes, bars, None)
+    cached, results, info = replay(ticks, step, components, timeframes, bars, True)
+    assert all(numpy.array_equal(a, b) for a, b in zip(results, expected))
+    calls = len(results)
+    return {
+        'calls'        : calls,
+        'bars'         : bars,
+        'plain_us'     : round(plain / calls * 1e6, 1),
+        'cached_us'    : round(cached / calls * 1e6, 1),
+        'speedup'      : round(plain / cached, 1),
+        'cache_hits'   : info.hits,
+        'cache_misses' : info.misses,
+        'cache_updates': info.updates,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type=int, default=600)
+    parser.add_argument('--step', type=float, default=1.0, help='seconds between ticks')
+    parser.add_argument('--components', type=int, default=4)
+    parser.add_argument('--timeframes', nargs='*', default=TIMEFRAMES, choices=TIMEFRAMES)
+    parser.add_argument('--bars', type=int, default=1000)
+    parser.add_argument('--json', help='write the result to this file as JSON')
+    args = parser.parse_args(argv)
+    result = run(args.ticks, args.step, args.components, args.timeframes, args.bars)
+    for key, value in result.items():
+        print(f'{key:<16}{value}')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Resampling throughput of ``resample.resample_rates`` and ``resample.resample_rates_many``.
+
+A year of M1 bars is generated for ``--symbols`` symbols (synthetic random walks with weekend gaps, so the terminal
+is not involved). Each symbol is resampled to every timeframe from M5 to MN1, once with a resample_rates call per
+timeframe and once with a single resample_rates_many call.
+
+Usage:
+    python benchmarks/bench_resample.py
+    python benchmarks/bench_resample.py --symbols 100 --timeframes H1 H4 D1 --json bench_resample.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault('PYMT5ADAPTER_BACKEND', 'simulator')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy  # noqa: E402
+
+import pymt5adapter as mta  # noqa: E402
+from pymt5adapter.resample import RATES_DTYPE  # noqa: E402
+from pymt5adapter.resample import resample_rates  # noqa: E402
+from pymt5adapter.resample import resample_rates_many  # noqa: E402
+
+YEAR_START = 1577836800  # 2020.01.01
+TIMEFRAMES = ('M5', 'M15', 'M30', 'H1', 'H4', 'D1', 'W1', 'MN1')
+
+
+def year_of_m1(seed: int) -> numpy.ndarray:
+    rng = numpy.random.default_rng(seed)
+    t = YEAR_START + numpy.arange(366 * 1440, dtype=numpy.int64) * 60
+    weekday = (t // 86400 + 4) % 7  # 0 is Sunday
+    t = t[(weekday != 0) & (weekday != 6)]
+    close = 1.1 + numpy.cumsum(rng.normal(0, 0.0002, len(t)))
+    rates = numpy.empty(len(t), dtype=RATES_DTYPE)
+    rates['time'] = t
+    rates['open'] = numpy.r_[close[0], close[:-1]]
+    rates['close'] = close
+    rates['high'] = numpy.maximum(rates['open'], close) + 0.0001
+    rates['low'] = numpy.minimum(rates['open'], close) - 0.0001
+    rates['tick_volume'] = rng.integers(1, 100, len(t))
+    rates['spread'] = rng.integers(5, 20, len(t))
+    rates['real_volume'] = 0
+    return rates
+
+
+def run(symbols: int, timeframes) -> dict:
+    data = [year_of_m1(seed) for seed in range(symbols)]
+    timeframes = [mta.TIMEFRAME[name] for name in timeframes]
+    start = time.perf_counter()
+    bars = 0
+    for rates in data:
+        for timeframe in timeframes:
+            bars += len(resample_rates(rates, timeframe))
+    each = time.perf_counter() - start
+    start = time.perf_counter()
+    for rates in data:
+        resample_rates_many(rates, timeframes)
+    many = time.perf_counter() - start
+    return {
+        'symbols'      : symbols,
+        'm1_per_symbol': len(data[0]),
+        'timeframes'   : [mta.TIMEFRAME(tf).name for tf in timeframes],
+        'bars_out'     : bars,
+        'each_s'       : round(each, 3),
+        'many_s'       : round(many, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--timeframes', nargs='*', default=TIMEFRAMES, choices=TIMEFRAMES)
+    parser.add_argument('--json', help='write the result to this file as JSON')
+    args = parser.parse_args(argv)
+    result = run(args.symbols, args.timeframes)
+    for key, value in result.items():
+        print(f'{key:<16}{value}')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,16 @@
-import MetaTrader5 as _mt5
+from .backend import mt5 as _mt5
 
 from . import types
 from .const import *
 from .context import connected
 from .context import handle_exit
 from .core import *
+from .frame import RatesFrame
+from .frame import TicksFrame
 from .helpers import dictify
+from .helpers import json_default
 from .helpers import LogJson
+from .helpers import make_columnar
 from .helpers import make_native
 from .log import get_logger
 from .oem import *
@@ -0,0 +1,163 @@
+"""asyncio interface of the API.
+
+The MetaTrader5 package blocks and must be called serially, so every call is run on one dedicated executor thread
+and awaited. Calls run in a copy of the calling task's context, so the settings of an ``async with connected(...)``
+block (raise_on_errors, logger, return types, ...) apply to them like they do in synchronous code.
+
+Every function of the API dispatch table (see core.get_function_dispatch) has an awaitable counterpart here with the
+same name and signature, and iter_rates and iter_ticks have async generator counterparts.
+
+Example:
+    >>> async def main():
+    >>>     async with aio.connected(raise_on_errors=True):
+    >>>         rates = await aio.copy_rates_from_pos('EURUSD', TIMEFRAME.M1, 0, 1000)
+    >>>         async for event in aio.iter_events(EventEngine([('EURUSD', TIMEFRAME.M1, EVENT.NEW_BAR)])):
+    >>>             await aio.order_send(...)
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import context as _context
+from . import core as _core
+from .event import EventEngine
+from .event import EVENT
+from .state import global_state as _state
+from .types import *
+
+_executor = None
+_executor_lock = threading.Lock()
+_DONE = object()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the single thread executor all API calls are run on."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pymt5adapter')
+    return _executor
+
+
+async def run(func: Callable, *args, **kwargs):
+    """Run a blocking function on the API thread in a copy of the current context and await its result.
+
+    :param func: Any function calling the API.
+    :return: The function's result.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(), call)
+
+
+def _awaitable(f):
+    @functools.wraps(f)
+    async def wrapper(*args, **kwargs):
+        return await run(f, *args, **kwargs)
+
+    return wrapper
+
+
+async def _iterate(generator):
+    while True:
+        item = await run(next, generator, _DONE)
+        if item is _DONE:
+            return
+        yield item
+
+
+for _name, _f in _core.get_function_dispatch().items():
+    if not inspect.isgeneratorfunction(inspect.unwrap(_f)):
+        globals()[_name] = _awaitable(_f)
+
+
+async def iter_rates(*args, **kwargs) -> AsyncIterator:
+    """Async counterpart of core.iter_rates, with the same arguments. Each chunk is fetched on the API thread."""
+    async for chunk in _iterate(_core.iter_rates(*args, **kwargs)):
+        yield chunk
+
+
+async def iter_ticks(*args, **kwargs) -> AsyncIterator:
+    """Async counterpart of core.iter_ticks, with the same arguments. Each chunk is fetched on the API thread."""
+    async for chunk in _iterate(_core.iter_ticks(*args, **kwargs)):
+        yield chunk
+
+
+async def iter_events(engine: EventEngine, *, maxsize: int = 1000) -> AsyncIterator[Event]:
+    """Yield the events of an EventEngine. A producer task polls the engine on the API thread into a bounded queue,
+    so polling continues while the consumer works, and pauses while the queue is full. The engine keeps track of the
+    last tick and bar, so no events are lost while it is paused.
+
+    :param engine: EventEngine with the subscriptions. The pauses of its adaptive polling (see
+    EventEngine.next_sleep) are awaited between polls.
+    :param maxsize: Most events buffered ahead of the consumer.
+    """
+    queue = asyncio.Queue(maxsize)
+
+    async def produce():
+        try:
+            while True:
+                events = await run(engine.poll)
+                for event in events:
+                    await queue.put(event)
+                await asyncio.sleep(engine.next_sleep(events))
+        except Exception as e:
+            await queue.put(e)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+
+
+async def iter_event(symbol: Union[str, SymbolInfo],
+                     timeframe: int,
+                     event_flags: Union[EVENT, int],
+                     sleep: float = 0.001,
+                     max_sleep: float = 0.5,
+                     batch_ticks: bool = False,
+                     *,
+                     maxsize: int = 1000) -> AsyncIterator[tuple]:
+    """Async counterpart of event.iter_event: yields (EVENT, CopyTick or CopyRate) for the events of one symbol.
+
+    :param maxsize: Most events buffered ahead of the consumer, see iter_events.
+    """
+    if event_flags == 0:
+        return
+    engine = EventEngine([(symbol, timeframe, event_flags)], min_sleep=sleep, max_sleep=max_sleep,
+                         batch_ticks=batch_ticks)
+    async for event in iter_events(engine, maxsize=maxsize):
+        yield event.type, event.data
+
+
+class connected:
+    """``async with`` form of context.connected, taking the same arguments. The terminal is initialized and shut
+    down on the API thread, and the settings apply to the task that entered the block (and the tasks it creates).
+    """
+
+    def __init__(self, **kwargs):
+        self._connected = _context.connected(**kwargs)
+        self._state_token = None
+
+    async def __aenter__(self) -> _context.connected:
+        ctx = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        conn = await loop.run_in_executor(get_executor(), ctx.run, self._connected.__enter__)
+        # adopt the settings the connection entered in ctx for this task
+        self._state_token = _state.push(**ctx.run(_state.current).as_dict())
+        return conn
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            await run(self._connected.__exit__, exc_type, exc_val, exc_tb)
+        finally:
+            _state.restore(self._state_token)
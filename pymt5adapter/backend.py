@@ -0,0 +1,36 @@
+"""Selects the module that implements the raw ``MetaTrader5`` API surface for the rest of the package.
+
+The backend is resolved once, at import time, from the ``PYMT5ADAPTER_BACKEND`` environment variable. When the
+variable is not set the official ``MetaTrader5`` package is used. The value ``simulator`` selects the deterministic
+in-process stand-in (:mod:`pymt5adapter.simulator`) and any other value is imported as a dotted module path, which
+allows plugging in a custom implementation of the same surface.
+
+Example (shell):
+    >>> PYMT5ADAPTER_BACKEND=simulator python -m pytest
+"""
+import importlib
+import os
+
+BACKEND_ENV_VAR = 'PYMT5ADAPTER_BACKEND'
+
+_BACKEND_ALIASES = {
+    'metatrader5': 'MetaTrader5',
+    'mt5'        : 'MetaTrader5',
+    'simulator'  : 'pymt5adapter.simulator',
+}
+
+
+def load_backend(name: str = None):
+    """Import the backend module by alias or dotted module path.
+
+    :param name: Backend alias or module path. Defaults to the PYMT5ADAPTER_BACKEND env var or 'MetaTrader5'.
+    :return: The imported module.
+    """
+    name = name or os.environ.get(BACKEND_ENV_VAR) or 'MetaTrader5'
+    module_name = _BACKEND_ALIASES.get(name.lower(), name)
+    return importlib.import_module(module_name)
+
+
+mt5 = load_backend()
+name = mt5.__name__
+is_simulated = getattr(mt5, 'IS_SIMULATOR', False)
@@ -0,0 +1,166 @@
+"""Persistent on-disk cache of bars behind ``copy_rates_range``.
+
+Each symbol and timeframe is stored in its own append-only file (``<directory>/<symbol>/<timeframe>.bars``) holding
+a short header and fixed-width records in the ``RATES_DTYPE`` layout, sorted by open time. The file is memory-mapped
+and the time column is the index: a request is answered by a binary search on it.
+
+A file covers a contiguous span of history: every bar from the header's ``covered_from`` time up to its last record.
+Repeat requests within the span are served from disk. Only the missing tail is requested from the terminal, starting
+at the open time of the last stored bar. That bar may still have been forming when it was stored, so it is always
+requested again and its record is rewritten. Requests reaching back before the span fetch the missing head and
+rewrite the file.
+
+Example:
+    >>> with connected(bar_store='bars'):
+    >>>     rates = copy_rates_range('EURUSD', TIMEFRAME.M1, datetime(2020, 1, 1), datetime.now(timezone.utc))
+"""
+import os
+import struct
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import numpy
+
+from . import const as _const
+from . import helpers as _h
+from .types import *
+
+BAR_STORE_MAGIC = b'PMT5BARS'
+BAR_STORE_VERSION = 1
+
+RATES_DTYPE = numpy.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+
+# magic, version, record size, covered_from
+_HEADER = struct.Struct('<8sIIq')
+HEADER_SIZE = _HEADER.size
+
+# fetch(symbol, timeframe, from_seconds, to_seconds) -> bars with an open time in [from, to], or None on error
+Fetch = Callable[[str, int, int, int], Optional[numpy.ndarray]]
+
+
+class BarStore:
+    """Cache of bars in append-only files under one directory. Thread safe within a process."""
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+
+        :param directory: Root directory of the store. It is created when missing.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def path(self, symbol: str, timeframe: int) -> Path:
+        """Path of the file storing the bars of the symbol and timeframe."""
+        try:
+            tf_name = _const.TIMEFRAME(timeframe).name
+        except ValueError:
+            tf_name = str(timeframe)
+        return self.directory / str(symbol) / f'{tf_name}.bars'
+
+    def copy_rates_range(self, symbol: str, timeframe: int,
+                         datetime_from: Union[datetime, int], datetime_to: Union[datetime, int],
+                         fetch: Fetch) -> Optional[numpy.ndarray]:
+        """Get the bars with an open time within [datetime_from, datetime_to], requesting the ones missing on disk.
+
+        :param symbol: Financial instrument name.
+        :param timeframe: TIMEFRAME value.
+        :param datetime_from: Date of opening of the first bar. datetime or seconds since 1970.01.01.
+        :param datetime_to: Date, up to which the bars are requested. datetime or seconds since 1970.01.01.
+        :param fetch: Function requesting the bars from the terminal.
+        :return: Bars in the RATES_DTYPE layout (a copy), or None if a fetch failed.
+        """
+        from_seconds = _h.to_seconds(datetime_from)
+        to_seconds = _h.to_seconds(datetime_to)
+        path = self.path(symbol, timeframe)
+        with self._lock:
+            covered_from, bars = _read(path)
+            if not len(bars):
+                fetched = fetch(symbol, timeframe, from_seconds, to_seconds)
+                if fetched is None:
+                    return None
+                _write(path, from_seconds, _as_rates(fetched))
+                covered_from, bars = _read(path)
+            else:
+                if from_seconds < covered_from:
+                    head = fetch(symbol, timeframe, from_seconds, int(bars['time'][0]) - 1)
+                    if head is None:
+                        return None
+                    merged = numpy.concatenate([_as_rates(head), bars])
+                    bars = None  # release the memory map before the file is replaced
+                    _write(path, from_seconds, merged)
+                    covered_from, bars = _read(path)
+                last_time = int(bars['time'][-1])
+                if to_seconds >= last_time:
+                    tail = fetch(symbol, timeframe, last_time, to_seconds)
+                    if tail is None:
+                        return None
+                    if len(tail):
+                        index = int(numpy.searchsorted(bars['time'], tail['time'][0]))
+                        bars = None
+                        _append(path, index, _as_rates(tail))
+                        covered_from, bars = _read(path)
+            times = bars['time']
+            lo = numpy.searchsorted(times, from_seconds, side='left')
+            hi = numpy.searchsorted(times, to_seconds, side='right')
+            return numpy.array(bars[lo:hi])
+
+    def clear(self, symbol: str = None, timeframe: int = None) -> None:
+        """Delete stored bars.
+
+        :param symbol: Only delete the bars of this symbol.
+        :param timeframe: Only delete the bars of this timeframe.
+        """
+        with self._lock:
+            if symbol is not None and timeframe is not None:
+                paths = [self.path(symbol, timeframe)]
+            else:
+                pattern = '*.bars' if timeframe is None else self.path('', timeframe).name
+                paths = (self.directory / symbol if symbol is not None else self.directory).glob(f'**/{pattern}')
+            for p in paths:
+                if p.exists():
+                    p.unlink()
+
+    def __repr__(self):
+        return f'{type(self).__name__}({str(self.directory)!r})'
+
+
+def _as_rates(bars: numpy.ndarray) -> numpy.ndarray:
+    return bars if bars.dtype == RATES_DTYPE else bars.astype(RATES_DTYPE)
+
+
+def _read(path: Path) -> Tuple[int, numpy.ndarray]:
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return 0, numpy.empty(0, dtype=RATES_DTYPE)
+    with open(path, 'rb') as f:
+        magic, version, record_size, covered_from = _HEADER.unpack(f.read(HEADER_SIZE))
+    if magic != BAR_STORE_MAGIC or version != BAR_STORE_VERSION or record_size != RATES_DTYPE.itemsize:
+        raise ValueError(f'{path} is not a version {BAR_STORE_VERSION} bar store file')
+    # a torn trailing record left by a crash is ignored and overwritten by the next append
+    count = (size - HEADER_SIZE) // RATES_DTYPE.itemsize
+    if not count:
+        return covered_from, numpy.empty(0, dtype=RATES_DTYPE)
+    return covered_from, numpy.memmap(path, dtype=RATES_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+def _write(path: Path, covered_from: int, bars: numpy.ndarray) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(BAR_STORE_MAGIC, BAR_STORE_VERSION, RATES_DTYPE.itemsize, covered_from))
+        f.write(bars.tobytes())
+    os.replace(tmp, path)
+
+
+def _append(path: Path, index: int, bars: numpy.ndarray) -> None:
+    # overwrite from the record at index on: the stored bars it replaces may have been forming
+    with open(path, 'r+b') as f:
+        f.seek(HEADER_SIZE + index * RATES_DTYPE.itemsize)
+        f.truncate()
+        f.write(bars.tobytes())
@@ -6,15 +6,23 @@ import time
 from pathlib import Path
 
 from . import const
+from .barstore import BarStore
+from .core import get_latency_histograms
 from .core import mt5_account_info
 from .core import mt5_initialize
 from .core import mt5_last_error
 from .core import mt5_shutdown
 from .core import mt5_terminal_info
 from .core import MT5Error
+from .core import reset_latency_histograms
 from .helpers import LogJson
 from .helpers import reduce_args
+from .journal import OrderJournal
 from .log import get_logger
+from .log import stop_queued_logging
+from .ratelimit import log_suppressed
+from .ratelimit import LogRateLimiter
+from .ratescache import RatesCache
 from .state import global_state as _state
 from .types import *
 
@@ -45,7 +53,13 @@ class connected:
                  enable_real_trading: bool = None,
                  raise_on_errors: bool = None,
                  return_as_dict: bool = False,
-                 return_as_native_python_objects: bool = False,
+                 return_as_native_python_objects: Union[bool, str] = False,
+                 collect_metrics: bool = False,
+                 journal: Union[OrderJournal, str, Path] = None,
+                 log_rate_limiter: LogRateLimiter = None,
+                 bar_store: Union[BarStore, str, Path] = None,
+                 rates_cache: Union[RatesCache, bool] = None,
+                 manage_connection: bool = True,
                  **kwargs
                  ):
         """Context manager for managing the connection with a MT5 terminal using the python ``with`` statement.
@@ -63,6 +77,22 @@ class connected:
         :param logger: logging.Logger instance. Setting logger.debugLevel to DEBUG will profile and log function calls
         :param return_as_dict: Converts all namedtuple to dictionaries.
         :param return_as_native_python_objects: Converts all returns to JSON. Namedtuples become JSON objects and numpy arrays become JSON arrays.
+        Set to 'columns' to convert structured arrays (rates and ticks) to a dict of array.array columns instead of
+        lists of tuples (see helpers.make_columnar and helpers.json_default).
+        :param collect_metrics: Record a latency histogram for each API function. See ``latency_stats``. Off by
+        default, unlike the originally planned always-on metrics: timing every call roughly doubles the overhead of
+        the wrapper, which the overhead benchmark gate does not allow for the default state.
+        :param journal: journal.OrderJournal or a path to a journal file which records every order_send and
+        order_check call in a binary journal (see journal.read_journal). A journal opened from a path is closed on exit.
+        :param log_rate_limiter: Limits the function_debugging warnings logged for failed calls per function and
+        error code. Defaults to LogRateLimiter(); use LogRateLimiter(burst=None) to log every failure.
+        :param bar_store: barstore.BarStore or a path to its directory. copy_rates_range (and copy_rates with a date
+        range) then serve the bars from disk and only request the missing ones from the terminal.
+        :param rates_cache: ratescache.RatesCache, or True for a new RatesCache(). copy_rates_from_pos then serves
+        repeated requests from memory while bar 0 shows no new bar, refreshing only the forming bar.
+        :param manage_connection: Initialize the terminal connection on enter and shut it down on exit. Set to False
+        to only apply the settings to the current thread or task while another ``connected`` context owns the
+        connection; the terminal checks (``ensure_trade_enabled``, ``enable_real_trading``) are then skipped.
 
         :param kwargs:
         :return: None
@@ -99,6 +129,7 @@ class connected:
         ))
         self._ensure_trade_enabled = ensure_trade_enabled
         self._enable_real_trading = enable_real_trading
+        self._manage_connection = manage_connection
         # managing global state
         if isinstance(logger, (str, Path)):
             self._logger = get_logger(path_to_logfile=logger, loglevel=logging.INFO, time_utc=True)
@@ -109,14 +140,34 @@ class connected:
         self._terminal_info = None
         self._return_as_dict = return_as_dict
         self._native_python_objects = return_as_native_python_objects
+        self._collect_metrics = collect_metrics
+        self._journal_arg = journal
+        self._journal = None
+        self._log_rate_limiter = log_rate_limiter or LogRateLimiter()
+        self._bar_store = BarStore(bar_store) if isinstance(bar_store, (str, Path)) else bar_store
+        self._rates_cache = RatesCache() if rates_cache is True else rates_cache or None
 
     def __enter__(self):
-        self._state_on_enter = _state.get_state()
-        _state.raise_on_errors = self.raise_on_errors
-        # _state.debug_logging = self.debug_logging
-        _state.logger = logger = self._logger
-        _state.return_as_dict = self.return_as_dict
-        _state.return_as_native_python_objects = self.native_python_objects
+        logger = self._logger
+        if isinstance(self._journal_arg, (str, Path)):
+            self._journal = OrderJournal(self._journal_arg)
+        else:
+            self._journal = self._journal_arg
+        # the state is context-local: this only affects the current thread/task (and the threads that use the
+        # main thread's state when entered from the main thread)
+        self._state_token = _state.push(
+            raise_on_errors=self.raise_on_errors,
+            logger=logger,
+            return_as_dict=self.return_as_dict,
+            return_as_native_python_objects=self.native_python_objects,
+            collect_metrics=self.collect_metrics,
+            journal=self._journal,
+            log_rate_limiter=self._log_rate_limiter,
+            bar_store=self._bar_store,
+            rates_cache=self._rates_cache,
+        )
+        if not self._manage_connection:
+            return self
         try:
             if not mt5_initialize(**self._init_kwargs):
                 # TODO is this logging in correctly?
@@ -137,6 +188,9 @@ class connected:
                 raise MT5Error(err_code, err_description)
             self._account_info = mt5_account_info()
             self._terminal_info = mt5_terminal_info()
+            if self._terminal_info:
+                # the terminal's "Max bars in chart" setting bounds every copy_rates_* call
+                _state.max_bars = self._terminal_info.maxbars
             if logger:
                 logger.info(LogJson('Terminal Initialize Success', {
                     'type' : 'terminal_connection_state',
@@ -165,7 +219,6 @@ class connected:
                     raise MT5Error(const.ERROR_CODE.REAL_ACCOUNT_DISABLED, msg)
             if self._ensure_trade_enabled:
                 term_info = self.terminal_info
-                _state.max_bars = term_info.maxbars
                 if not term_info.trade_allowed:
                     if logger:
                         logger.critical(LogJson('Initialization Error', {
@@ -195,10 +248,17 @@ class connected:
                     'message': str(exc_val),
                 }
             }))
-        mt5_shutdown()
-        _state.set_defaults(**self._state_on_enter)
         if self.logger:
+            for summary in self._log_rate_limiter.flush():
+                log_suppressed(self.logger, summary)
+        if self._manage_connection:
+            mt5_shutdown()
+        _state.restore(self._state_token)
+        if self._journal is not None and self._journal is not self._journal_arg:
+            self._journal.close()
+        if self.logger and self._manage_connection:
             self.logger.info(LogJson('Terminal Shutdown', {'type': 'terminal_connection_state', 'state': False}))
+            stop_queued_logging(self.logger)
 
     @property
     def logger(self) -> logging.Logger:
@@ -238,10 +298,46 @@ class connected:
         return self._native_python_objects
 
     @native_python_objects.setter
-    def native_python_objects(self, flag: bool):
+    def native_python_objects(self, flag: Union[bool, str]):
         _state.return_as_native_python_objects = flag
         self._native_python_objects = flag
 
+    @property
+    def journal(self) -> Optional[OrderJournal]:
+        return self._journal
+
+    @property
+    def bar_store(self) -> Optional[BarStore]:
+        return self._bar_store
+
+    @property
+    def rates_cache(self) -> Optional[RatesCache]:
+        return self._rates_cache
+
+    @property
+    def collect_metrics(self):
+        return self._collect_metrics
+
+    @collect_metrics.setter
+    def collect_metrics(self, flag: bool):
+        _state.collect_metrics = flag
+        self._collect_metrics = flag
+
+    @staticmethod
+    def latency_stats(include_unused: bool = False) -> dict:
+        """Latency statistics of the API functions called since import or the last ``reset_latency_stats``.
+
+        :param include_unused: Include functions that have not been called.
+        :return: dict of function name -> dict(calls, none_calls, p50_ms, p99_ms, max_ms)
+        """
+        return {name: histogram.stats() for name, histogram in get_latency_histograms().items()
+                if include_unused or histogram.calls}
+
+    @staticmethod
+    def reset_latency_stats() -> None:
+        """Zero the latency histograms of all API functions."""
+        reset_latency_histograms()
+
     def ping(self) -> Ping:
         """Get ping in microseconds for the terminal and trade_server.
         Ping attrs = Ping.terminal and Ping.trade_server
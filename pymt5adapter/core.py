@@ -3,13 +3,20 @@ import logging
 import re
 import time
 from datetime import datetime
+from datetime import timedelta
 
-import MetaTrader5 as _mt5
 import numpy
 
 from . import const as _const
 from . import helpers as _h
+from . import journal as _journal
+from . import metrics as _metrics
+from .backend import mt5 as _mt5
+from .ratelimit import log_suppressed as _log_suppressed
+from .state import _context_state
+from .state import _root_state
 from .state import global_state as _state
+from .state import mode_key as _state_mode_key
 from .types import *
 
 
@@ -36,98 +43,235 @@ class MT5Error(Exception):
         self.strerror = self.description = description
 
 
-def _timed_func(f):
-    @functools.wraps(f)
-    def wrapper(*args, **kwargs):
-        timer = time.perf_counter_ns()
-        result = f(*args, **kwargs)
-        timer = time.perf_counter_ns() - timer
-        wrapper._perf_timer = round(timer / 1e6, 3)
-        return result
+def _is_empty_result(result):
+    if isinstance(result, numpy.ndarray):
+        return len(result) == 0
+    return not result
 
-    return wrapper
+
+def _raise_on_last_error(last_err, args, kwargs):
+    error_code, description = last_err
+    if error_code != _const.ERROR_CODE.OK:
+        if error_code == _const.ERROR_CODE.INVALID_PARAMS:
+            description += str(args) + str(kwargs)
+        raise MT5Error(_const.ERROR_CODE(error_code), description)
+
+
+def _raise_on_empty_result(result, args, kwargs):
+    if _is_empty_result(result):
+        _raise_on_last_error(mt5_last_error(), args, kwargs)
+
+
+def _build_call_path(f, advanced_features, histogram, collect_metrics, use_logger, raise_on_errors, convert):
+    """Build the call path of a wrapped function for one API state. Only the work that the state requires is
+    compiled into the returned function so that the per-call cost stays close to calling ``f`` directly.
+
+    :param f: The undecorated function.
+    :param advanced_features: Whether the function participates in debug/order logging and raise_on_errors.
+    :param histogram: The metrics.LatencyHistogram of the function.
+    :param collect_metrics: Record the latency of each call into ``histogram``.
+    :param use_logger: A logger is set in the API state.
+    :param raise_on_errors: Raise MT5Error for empty results.
+    :param convert: Post-processing function for the result (make_native, make_columnar or dictify) or None.
+    :return: (call_path, takes_state). call_path has the signature of ``f``, unless takes_state is True: paths that
+    read more of the API state than its mode are called as ``call_path(state, args, kwargs)`` with the _ApiState
+    snapshot the wrapper already fetched.
+    """
+    name = f.__name__
+    raise_on_errors = raise_on_errors and advanced_features
+    counts, none_counts = histogram.counts, histogram.none_counts
+    # order calls look up the journal of the API state; their results are logged with their latency at INFO,
+    # other calls only at DEBUG
+    journaled = name in _journal.JOURNALED_FUNCTIONS
+    always_timed = collect_metrics or journaled
+    debug_level = logging.DEBUG
+    if not use_logger and journaled:
+        clock = time.perf_counter_ns
+
+        def call_path(state, args, kwargs):
+            journal = state.journal
+            start_ns = clock()
+            result = f(*args, **kwargs)
+            latency_ns = clock() - start_ns
+            if collect_metrics:
+                (none_counts if result is None else counts)[latency_ns.bit_length()] += 1
+                if latency_ns > histogram.max_ns:
+                    histogram.max_ns = latency_ns
+            last_err = mt5_last_error() if result is None and (journal is not None or raise_on_errors) else None
+            if journal is not None:
+                try:
+                    journal.record(name, args, kwargs, result, latency_ns, 0 if last_err is None else last_err[0])
+                except Exception:
+                    # the order has reached the terminal: its result is returned whatever the journal does
+                    journal.handle_error(name)
+            if raise_on_errors and result is None:
+                _raise_on_last_error(last_err, args, kwargs)
+            return result if convert is None else convert(result)
+
+        return call_path, True
+    if not use_logger and collect_metrics:
+        clock = time.perf_counter_ns
+
+        def call_path(*args, **kwargs):
+            start_ns = clock()
+            result = f(*args, **kwargs)
+            elapsed_ns = clock() - start_ns
+            (none_counts if result is None else counts)[elapsed_ns.bit_length()] += 1
+            if elapsed_ns > histogram.max_ns:
+                histogram.max_ns = elapsed_ns
+            if raise_on_errors:
+                _raise_on_empty_result(result, args, kwargs)
+            return result if convert is None else convert(result)
+
+        return call_path, False
+    if not use_logger:
+        if raise_on_errors:
+            def call_path(*args, **kwargs):
+                result = f(*args, **kwargs)
+                _raise_on_empty_result(result, args, kwargs)
+                return result if convert is None else convert(result)
+        elif convert is not None:
+            def call_path(*args, **kwargs):
+                return convert(f(*args, **kwargs))
+        else:
+            call_path = f
+        return call_path, False
+
+    def call_path(state, args, kwargs):
+        logger = state.logger
+        # last_error is an IPC round trip, so it is fetched at most once per call and shared by the exception
+        # log, the debug/warning log and the raise_on_errors check.
+        last_err = None
+        # the latency is kept in locals so that concurrent calls from other threads cannot overwrite it.
+        # A logger with a level above DEBUG cannot log at DEBUG, which is cheaper to check than will_log.
+        debug = logger.level <= debug_level and _h.will_log(logger, debug_level)
+        timed = always_timed or debug
+        start_ns = time.perf_counter_ns() if timed else 0
+        try:
+            result = f(*args, **kwargs)
+        except Exception as e:
+            if _h.will_log(logger, logging.ERROR):
+                last_err = mt5_last_error()
+                logger.error(_h.LogJson('EXCEPTION', {
+                    'type'          : 'exception',
+                    'last_error'    : last_err,
+                    'exception'     : {
+                        'type'   : type(e).__name__,
+                        'message': str(e),
+                    },
+                    'call_signature': dict(function=f.__name__, args=args, kwargs=kwargs)
+                }))
+            raise
+        latency_ns = time.perf_counter_ns() - start_ns if timed else None
+        if collect_metrics:
+            (none_counts if result is None else counts)[latency_ns.bit_length()] += 1
+            if latency_ns > histogram.max_ns:
+                histogram.max_ns = latency_ns
+        # make sure we logger before we raise
+        if advanced_features:
+            # records are only built when a handler will emit them
+            if debug if result is not None else _h.will_log(logger, logging.WARNING):
+                log = logger.debug if result is not None else logger.warning
+                last_err = mt5_last_error()
+                emit = True
+                if result is None:
+                    # failures of polled functions repeat on every call while a symbol or the connection is down
+                    emit, summaries = state.log_rate_limiter.check((name, last_err[0]))
+                    for summary in summaries:
+                        _log_suppressed(logger, summary)
+                if emit:
+                    log_dict = _h.LogJson(short_message_=f'Function Debugging: {f.__name__}',
+                                          type='function_debugging')
+                    if timed:
+                        log_dict['latency_ms'] = round(latency_ns / 1e6, 3)
+                    log_dict['last_error'] = last_err
+                    log_dict['call_signature'] = dict(function=f.__name__, args=args, kwargs=kwargs)
+                    # call_sig = f"{f.__name__}({_h.args_to_str(args, kwargs)})"
+                    log(log_dict)
+            if journaled and isinstance(result, OrderSendResult):
+                if _h.will_log(logger, logging.INFO):
+                    response = result._asdict()
+                    request = response.pop('request')._asdict()
+                    request_name = _const.ORDER_TYPE(request['type']).name
+                    response_name = trade_retcode_description(response['retcode'])
+                    request_dict = _h.LogJson(short_message_=f'Order Request: {request_name}',
+                                              type='order_request')
+                    request_dict['request'] = request
+                    logger.info(request_dict)
+                    response_dict = _h.LogJson(short_message_=f'Order Response: {response_name}',
+                                               type='order_response')
+                    response_dict['latency_ms'] = round(latency_ns / 1e6, 3)
+                    response_dict['response'] = response
+                    logger.info(response_dict)
+                if result.retcode != _const.TRADE_RETCODE.DONE and _h.will_log(logger, logging.WARNING):
+                    response_name = trade_retcode_description(result.retcode)
+                    logger.warning(_h.LogJson(f'Order Fail: {response_name}', {
+                        'type'       : 'order_fail',
+                        'retcode'    : result.retcode,
+                        'description': response_name,
+                    }))
+        if journaled and state.journal is not None:
+            if result is None and last_err is None:
+                last_err = mt5_last_error()
+            try:
+                state.journal.record(name, args, kwargs, result, latency_ns, last_err[0] if result is None else 0)
+            except Exception:
+                state.journal.handle_error(name, logger)
+        if raise_on_errors and _is_empty_result(result):  # no need to check last error if we got a result
+            if last_err is None:
+                last_err = mt5_last_error()
+            _raise_on_last_error(last_err, args, kwargs)
+        return result if convert is None else convert(result)
+
+    return call_path, True
+
+
+_CONVERTERS = {
+    None    : None,
+    'dict'  : _h.dictify,
+    'native': _h.make_native,
+    'columns': _h.make_columnar,
+}
 
 
 def _context_manager_modified(participation, advanced_features=True):
     def decorator(f):
-        # f.__dispatch = True
+        if not participation:
+            return f
+        call_paths = {}
+        # paths called with the state snapshot, see _build_call_path
+        state_call_paths = {}
+        histogram = _metrics.LatencyHistogram(f.__name__)
+
         @functools.wraps(f)
         def pymt5adapter_wrapped_function(*args, **kwargs):
-            if not participation:
-                return f(*args, **kwargs)
-            logger = _state.logger
-            timed_func = None
-            if logger and logger.level == logging.DEBUG and f is not order_send:
-                timed_func = _timed_func(f)
-            use_func = timed_func or f
-            try:
-                result = use_func(*args, **kwargs)
-            except Exception as e:
-                if logger:
-                    logger.error(_h.LogJson('EXCEPTION', {
-                        'type'          : 'exception',
-                        'last_error'    : mt5_last_error(),
-                        'exception'     : {
-                            'type'   : type(e).__name__,
-                            'message': str(e),
-                        },
-                        'call_signature': dict(function=use_func.__name__, args=args, kwargs=kwargs)
-                    }))
-                raise
-            # make sure we logger before we raise
-            if advanced_features:
-                last_err = None
-                if logger:
-                    if result is None or logger.level == logging.DEBUG:
-                        log = logger.warning if result is None else logger.debug
-                        log_dict = _h.LogJson(short_message_=f'Function Debugging: {use_func.__name__}',
-                                              type='function_debugging')
-                        if hasattr(use_func, '_perf_timer'):
-                            log_dict['latency_ms'] = use_func._perf_timer
-                        last_err = mt5_last_error()
-                        log_dict['last_error'] = mt5_last_error()
-                        log_dict['call_signature'] = dict(function=use_func.__name__, args=args, kwargs=kwargs)
-                        # call_sig = f"{f.__name__}({_h.args_to_str(args, kwargs)})"
-                        log(log_dict)
-                    if isinstance(result, OrderSendResult):
-                        response = result._asdict()
-                        request = response.pop('request')._asdict()
-                        request_name = _const.ORDER_TYPE(request['type']).name
-                        response_name = trade_retcode_description(response['retcode'])
-                        request_dict = _h.LogJson(short_message_=f'Order Request: {request_name}', type='order_request')
-                        request_dict['request'] = request
-                        logger.info(request_dict)
-                        response_dict = _h.LogJson(short_message_=f'Order Response: {response_name}',
-                                                   type='order_response')
-                        if hasattr(use_func, '_perf_timer'):
-                            response_dict['latency_ms'] = use_func._perf_timer
-                        response_dict['response'] = response
-                        logger.info(response_dict)
-                        if result.retcode != _const.TRADE_RETCODE.DONE:
-                            logger.warning(_h.LogJson(f'Order Fail: {response_name}', {
-                                'type'       : 'order_fail',
-                                'retcode'    : result.retcode,
-                                'description': response_name,
-                            }))
-                if _state.raise_on_errors:  # no need to check last error if we got a result
-                    if isinstance(result, numpy.ndarray):
-                        is_result = True if len(result) > 0 else False
-                    else:
-                        is_result = bool(result)
-                    if not is_result:
-                        error_code, description = last_err or mt5_last_error()
-                        if error_code != _const.ERROR_CODE.OK:
-                            if error_code == _const.ERROR_CODE.INVALID_PARAMS:
-                                description += str(args) + str(kwargs)
-                            raise MT5Error(_const.ERROR_CODE(error_code), description)
-            if _state.return_as_native_python_objects:
-                result = _h.make_native(result)
-            elif _state.return_as_dict:
-                result = _h.dictify(result)
-            return result
-
-        if participation:
-            pymt5adapter_wrapped_function.__dispatch = True
+            # the call path compiled for the API state of the calling thread/task
+            state = _context_state.get() or _root_state[0]
+            mode = state.mode
+            call_path = call_paths.get(mode)
+            if call_path is not None:
+                return call_path(*args, **kwargs)
+            call_path = state_call_paths.get(mode)
+            if call_path is None:
+                compile_call_path(mode)
+                return pymt5adapter_wrapped_function(*args, **kwargs)
+            return call_path(state, args, kwargs)
+
+        def compile_call_path(mode):
+            metrics, use_logger, raise_on_errors, convert = _state_mode_key(mode)
+            call_path, takes_state = _build_call_path(
+                f, advanced_features, histogram, metrics, use_logger, raise_on_errors, _CONVERTERS[convert])
+            (state_call_paths if takes_state else call_paths)[mode] = call_path
+
+        def active_call_path():
+            mode = _state.current().mode
+            if mode not in call_paths and mode not in state_call_paths:
+                compile_call_path(mode)
+            return call_paths.get(mode) or state_call_paths[mode]
+
+        pymt5adapter_wrapped_function.active_call_path = active_call_path
+        pymt5adapter_wrapped_function.latency_histogram = histogram
+        pymt5adapter_wrapped_function.__dispatch = True
         return pymt5adapter_wrapped_function
 
     return decorator
@@ -176,6 +320,7 @@ def copy_rates(symbol,
                datetime_to: Union[datetime, int] = None,
                start_pos: int = None,
                count: int = None,
+               paginate: bool = False,
                ) -> Union[numpy.ndarray, None]:
     """Generic function to use keywords to automatically call the correct copy rates function depending on the
     keyword args passed in.
@@ -189,6 +334,8 @@ def copy_rates(symbol,
     :param start_pos: Initial index of the bar the data are requested from. The numbering of bars goes from
     present to past. Thus, the zero bar means the current one.
     :param count: Number of bars to receive.
+    :param paginate: Lift the terminal's "Max bars in chart" limit by fetching the bars in terminal sized windows
+    (see copy_rates_range). Without it ``count`` is clamped to ``max_bars - 1``.
     :return: Returns bars as the numpy array with the named time, open, high, low, close, tick_volume,
     spread and real_volume columns. Return None in case of an error. The info on the error can be obtained
     using last_error().
@@ -198,17 +345,74 @@ def copy_rates(symbol,
     try:
         if datetime_from is not None:
             if count is not None:
+                if paginate:
+                    return _copy_rates_paginated(symbol, timeframe, count=count, datetime_to=datetime_from)
                 return mt5_copy_rates_from(symbol, timeframe, datetime_from, count)
             if datetime_to is not None:
-                return mt5_copy_rates_range(symbol, timeframe, datetime_from, datetime_to)
+                return _copy_rates_range(symbol, timeframe, datetime_from, datetime_to, paginate)
         if all(x is None for x in [datetime_from, datetime_to, start_pos]):
             start_pos = 0
-        count = min((count or _state.max_bars), _state.max_bars - 1)
-        return mt5_copy_rates_from_pos(symbol, timeframe, start_pos, count)
+        max_bars = (_context_state.get() or _root_state[0]).max_bars
+        if paginate:
+            return _copy_rates_paginated(symbol, timeframe, count=count or max_bars, start_pos=start_pos)
+        return _copy_rates_from_pos(symbol, timeframe, start_pos, min(count or max_bars, max_bars - 1))
     except SystemError:
         return None
 
 
+def _max_bars_in_range(timeframe, from_seconds, to_seconds):
+    # months are at least 28 days, every other timeframe has a fixed length
+    min_period = 28 * 86400 if timeframe == _const.TIMEFRAME.MN1 else _const.PERIOD_SECONDS[timeframe]
+    return max(0, (to_seconds - from_seconds) // min_period + 1)
+
+
+def _copy_rates_paginated(symbol, timeframe, *, count=None, start_pos=None, datetime_from=None, datetime_to=None):
+    """Fetch bars back in time in windows of ``max_bars - 1`` (the most the terminal returns per call) and stitch
+    them into one preallocated array, which is filled from the end.
+
+    The first window is anchored at start_pos or datetime_to, every following one at the open time of the oldest
+    bar received so far, so bars forming during the fetch cannot shift the windows. Fetching stops after ``count``
+    bars, at datetime_from, or at the start of the history.
+
+    :return: The preallocated array, or a copy of its filled tail when fewer bars were received than allocated (the
+    allocation is an upper bound for date ranges) so that the unused head is not kept alive. None if a window
+    failed.
+    """
+    window = (_context_state.get() or _root_state[0]).max_bars - 1
+    from_seconds = None
+    if datetime_from is not None:
+        from_seconds = _h.to_seconds(datetime_from)
+        count = _max_bars_in_range(timeframe, from_seconds, _h.to_seconds(datetime_to))
+    out = None
+    end = count
+    oldest = None
+    while end > 0:
+        n = min(window, end)
+        if oldest is not None:
+            bars = mt5_copy_rates_from(symbol, timeframe, oldest - 1, n)
+        elif start_pos is not None:
+            bars = mt5_copy_rates_from_pos(symbol, timeframe, start_pos, n)
+        else:
+            bars = mt5_copy_rates_from(symbol, timeframe, datetime_to, n)
+        if bars is None:
+            return None
+        if out is None:
+            out = numpy.empty(count, dtype=bars.dtype)
+        received = len(bars)
+        if received:
+            oldest = int(bars[0]['time'])
+        if from_seconds is not None and received and oldest < from_seconds:
+            bars = bars[bars['time'] >= from_seconds]
+        out[end - len(bars):end] = bars
+        end -= len(bars)
+        if len(bars) < n:
+            break
+    if out is None:  # nothing was requested
+        bars = mt5_copy_rates_from_pos(symbol, timeframe, 0, 1)
+        return None if bars is None else bars[:0]
+    return out[end:].copy() if end else out
+
+
 mt5_copy_rates_from = _mt5.copy_rates_from
 
 
@@ -254,15 +458,23 @@ def copy_rates_from_pos(symbol,
     :param count: Number of bars to receive.
     :return: Returns bars as the numpy array with the named time, open, high, low, close, tick_volume,
     spread and real_volume columns. Return None in case of an error. The info on the error can be obtained
-    using last_error().
+    using last_error(). When a rates cache is set (see ``connected(rates_cache=...)``) the array is read-only and
+    shared with the other callers requesting the same bars.
     """
     symbol = _h.any_symbol(symbol)
     try:
-        return mt5_copy_rates_from_pos(symbol, timeframe, start_pos, count)
+        return _copy_rates_from_pos(symbol, timeframe, start_pos, count)
     except SystemError:
         return None
 
 
+def _copy_rates_from_pos(symbol, timeframe, start_pos, count):
+    cache = (_context_state.get() or _root_state[0]).rates_cache
+    if cache is not None:
+        return cache.copy_rates_from_pos(symbol, timeframe, start_pos, count, fetch=mt5_copy_rates_from_pos)
+    return mt5_copy_rates_from_pos(symbol, timeframe, start_pos, count)
+
+
 mt5_copy_rates_range = _mt5.copy_rates_range
 
 
@@ -270,7 +482,9 @@ mt5_copy_rates_range = _mt5.copy_rates_range
 def copy_rates_range(symbol,
                      timeframe: int,
                      datetime_from: Union[datetime, int],
-                     datetime_to: Union[datetime, int]
+                     datetime_to: Union[datetime, int],
+                     *,
+                     paginate: bool = False,
                      ) -> Union[numpy.ndarray, None]:
     """Get bars from the MetaTrader 5 terminal starting from the specified index.
 
@@ -280,17 +494,131 @@ def copy_rates_range(symbol,
         object or as a number of seconds elapsed since 1970.01.01.
         :param datetime_to: Date, up to which the bars are requested. Set by the 'datetime' object or as a number
         of seconds elapsed since 1970.01.01. Bars with the open time <= date_to are returned.
+        :param paginate: Fetch the range in windows of at most ``max_bars - 1`` bars and stitch them into one
+        array, so that ranges longer than the terminal's "Max bars in chart" can be requested in one call.
+        When a bar store is set (see ``connected(bar_store=...)``) the bars are served from it and only the
+        missing ones are requested, paginated when needed.
         :return: Returns bars as the numpy array with the named time, open, high, low, close, tick_volume,
         spread and real_volume columns. Return None in case of an error. The info on the error can be obtained
         using last_error().
         """
     symbol = _h.any_symbol(symbol)
     try:
-        return mt5_copy_rates_range(symbol, timeframe, datetime_from, datetime_to)
+        return _copy_rates_range(symbol, timeframe, datetime_from, datetime_to, paginate)
     except SystemError:
         return None
 
 
+def _copy_rates_range(symbol, timeframe, datetime_from, datetime_to, paginate):
+    store = (_context_state.get() or _root_state[0]).bar_store
+    if store is not None:
+        return store.copy_rates_range(symbol, timeframe, datetime_from, datetime_to, fetch=_fetch_rates_range)
+    if paginate:
+        return _copy_rates_paginated(symbol, timeframe, datetime_from=datetime_from, datetime_to=datetime_to)
+    return mt5_copy_rates_range(symbol, timeframe, datetime_from, datetime_to)
+
+
+def _fetch_rates_range(symbol, timeframe, from_seconds, to_seconds):
+    # the missing part of a range is usually a short tail, which takes a single call
+    try:
+        if _max_bars_in_range(timeframe, from_seconds, to_seconds) < (_context_state.get() or _root_state[0]).max_bars:
+            return mt5_copy_rates_range(symbol, timeframe, from_seconds, to_seconds)
+        return _copy_rates_paginated(symbol, timeframe, datetime_from=from_seconds, datetime_to=to_seconds)
+    except SystemError:
+        return None
+
+
+@_context_manager_modified(participation=True)
+def copy_rates_batch(symbols: Iterable,
+                     timeframe: int,
+                     start_pos: int = 0,
+                     count: int = None,
+                     *,
+                     stack: bool = False,
+                     out: numpy.ndarray = None,
+                     ) -> Batch:
+    """Get the bars of many symbols in one call, like copy_rates_from_pos for each of them. The call is logged,
+    timed and post-processed once for the whole batch.
+
+    :param symbols: Financial instrument names or objects with a name, for example SymbolInfo.
+    :param timeframe: Timeframe the bars are requested for. Set by a value from the TIMEFRAME enumeration.
+    :param start_pos: Initial index of the bar the data are requested from. The numbering of bars goes from
+    present to past. Thus, the zero bar means the current one.
+    :param count: Number of bars to receive per symbol. Defaults to and is clamped to ``max_bars - 1``.
+    :param stack: Return the bars as one 2-D structured array of shape (symbols, count) instead of a dict. Symbols
+    with fewer bars are padded at the start with zeroed rows (time == 0); failed symbols are all zeros.
+    :param out: 2-D structured array with the rates dtype to fill instead of allocating one. Implies stack.
+    :return: Batch(data, errors) where data is a dict of symbol name -> bars (or the stacked array) and errors is
+    a dict of symbol name -> last_error() for every symbol that failed.
+    """
+    max_bars = (_context_state.get() or _root_state[0]).max_bars
+    count = min(count or max_bars, max_bars - 1)
+    return _fetch_batch(symbols, lambda symbol: mt5_copy_rates_from_pos(symbol, timeframe, start_pos, count),
+                        count, stack, out, align_right=True)
+
+
+@_context_manager_modified(participation=True)
+def copy_ticks_batch(symbols: Iterable,
+                     datetime_from: Union[datetime, int],
+                     count: int,
+                     flags: int,
+                     *,
+                     stack: bool = False,
+                     out: numpy.ndarray = None,
+                     ) -> Batch:
+    """Get the ticks of many symbols in one call, like copy_ticks_from for each of them. The call is logged,
+    timed and post-processed once for the whole batch.
+
+    :param symbols: Financial instrument names or objects with a name, for example SymbolInfo.
+    :param datetime_from: Date the ticks are requested from. Set by the 'datetime' object or as a number of
+    seconds elapsed since 1970.01.01.
+    :param count: Number of ticks to receive per symbol.
+    :param flags: A flag to define the type of the requested ticks. See copy_ticks_from.
+    :param stack: Return the ticks as one 2-D structured array of shape (symbols, count) instead of a dict.
+    Symbols with fewer ticks are padded at the end with zeroed rows (time_msc == 0); failed symbols are all zeros.
+    :param out: 2-D structured array with the ticks dtype to fill instead of allocating one. Implies stack.
+    :return: Batch(data, errors) where data is a dict of symbol name -> ticks (or the stacked array) and errors is
+    a dict of symbol name -> last_error() for every symbol that failed.
+    """
+    return _fetch_batch(symbols, lambda symbol: mt5_copy_ticks_from(symbol, datetime_from, count, flags),
+                        count, stack, out, align_right=False)
+
+
+def _fetch_batch(symbols, fetch, count, stack, out, align_right):
+    names = [_h.any_symbol(s) for s in symbols]
+    if out is not None:
+        if out.ndim != 2 or out.shape[0] < len(names) or out.shape[1] != count:
+            raise ValueError(f'out must have the shape ({len(names)}, {count}), got {out.shape}')
+        stack = True
+    data = {}
+    errors = {}
+    for i, name in enumerate(names):
+        try:
+            result = fetch(name)
+        except SystemError:
+            result = None
+        if result is None:
+            errors[name] = mt5_last_error()
+            if out is not None:
+                out[i] = 0
+            continue
+        if not stack:
+            data[name] = result
+            continue
+        if out is None:
+            out = numpy.zeros((len(names), count), dtype=result.dtype)
+        n = len(result)
+        if align_right:
+            out[i, :count - n] = 0
+            out[i, count - n:] = result
+        else:
+            out[i, :n] = result
+            out[i, n:] = 0
+    if stack:
+        data = out[:len(names)] if out is not None else None
+    return Batch(data, errors)
+
+
 mt5_copy_ticks_from = _mt5.copy_ticks_from
 
 
@@ -364,6 +692,145 @@ def copy_ticks_range(symbol,
         return None
 
 
+def _chunk_failed(args):
+    """Raise MT5Error with the last error for a failed chunk request when raise_on_errors is set."""
+    if _state.raise_on_errors:
+        _raise_on_last_error(mt5_last_error(), args, {})
+
+
+def iter_rates(symbol,
+               timeframe: int,
+               datetime_from: Union[datetime, int],
+               datetime_to: Union[datetime, int],
+               *,
+               chunk: Union[timedelta, int] = 10_000,
+               ) -> Iterator[numpy.ndarray]:
+    """Iterate over the bars of a range in chunks, so that only one chunk is held in memory at a time.
+
+    The chunks are requested with the raw copy_rates_range, so they bypass the logger, the log rate limiter, the
+    metrics, the bar store and the rates cache of the API state. Only raise_on_errors applies.
+
+    :param symbol: Financial instrument name, for example, "EURUSD".
+    :param timeframe: Timeframe the bars are requested for. Set by a value from the TIMEFRAME enumeration.
+    :param datetime_from: Date of opening of the first bar. Set by the 'datetime' object or as a number of seconds
+    elapsed since 1970.01.01.
+    :param datetime_to: Date, up to which the bars are requested. Bars with the open time <= date_to are returned.
+    :param chunk: A timedelta to request the range in windows of that length, or a number of bars per chunk (at
+    most). Must not exceed the terminal's "Max bars in chart".
+    :return: Generator of non-empty numpy arrays of bars in time order. Each bar is yielded exactly once. A failed
+    request raises MT5Error when raise_on_errors is set and ends the iteration otherwise (see last_error()).
+    """
+    symbol = _h.any_symbol(symbol)
+    start = _h.to_seconds(datetime_from)
+    end = _h.to_seconds(datetime_to)
+    if isinstance(chunk, timedelta):
+        window = max(1, int(chunk.total_seconds()))
+    else:
+        # months are at least 28 days, every other timeframe has a fixed length
+        window = chunk * (28 * 86400 if timeframe == _const.TIMEFRAME.MN1 else _const.PERIOD_SECONDS[timeframe])
+    while start <= end:
+        # bar open times are whole seconds, so [start, stop] windows never overlap
+        stop = min(start + window - 1, end)
+        try:
+            bars = mt5_copy_rates_range(symbol, timeframe, start, stop)
+        except SystemError:
+            bars = None
+        if bars is None:
+            _chunk_failed((symbol, timeframe, start, stop))
+            return
+        if len(bars):
+            yield bars
+        start = stop + 1
+
+
+_ONE_MSC = timedelta(milliseconds=1)
+
+
+def iter_ticks(symbol,
+               datetime_from: Union[datetime, int],
+               datetime_to: Union[datetime, int],
+               flags: int,
+               *,
+               chunk: Union[timedelta, int] = timedelta(hours=1),
+               ) -> Iterator[numpy.ndarray]:
+    """Iterate over the ticks of a range in chunks, so that only one chunk is held in memory at a time.
+
+    Chunks split the range at time_msc values: every tick with a time_msc within [datetime_from, datetime_to] is
+    yielded exactly once, and ticks sharing a time_msc are never split across chunks. Like iter_rates, the chunks
+    are requested with the raw functions and bypass the logger, log rate limiter and metrics of the API state.
+
+    :param symbol: Financial instrument name, for example, "EURUSD".
+    :param datetime_from: Date the ticks are requested from. Set by the 'datetime' object or as a number of
+    seconds elapsed since 1970.01.01.
+    :param datetime_to: Date, up to which the ticks are requested.
+    :param flags: A flag to define the type of the requested ticks. See copy_ticks_range.
+    :param chunk: A timedelta to request the range in windows of that length (with copy_ticks_range), or a number
+    of ticks per chunk (with copy_ticks_from). Chunks of a number of ticks hold at most that many ticks, unless
+    more ticks than that share one time_msc.
+    :return: Generator of non-empty numpy arrays of ticks in time order. A failed request raises MT5Error when
+    raise_on_errors is set and ends the iteration otherwise (see last_error()).
+    """
+    symbol = _h.any_symbol(symbol)
+    start_msc = _h.to_milliseconds(datetime_from)
+    end_msc = _h.to_milliseconds(datetime_to)
+    if isinstance(chunk, timedelta):
+        yield from _iter_ticks_by_time(symbol, start_msc, end_msc, flags, max(1, int(chunk / _ONE_MSC)))
+    else:
+        yield from _iter_ticks_by_count(symbol, start_msc, end_msc, flags, chunk)
+
+
+def _iter_ticks_by_time(symbol, start_msc, end_msc, flags, window_msc):
+    while start_msc <= end_msc:
+        # the chunk is time_msc in [start_msc, stop_msc). The terminal takes whole seconds, so the request is widened
+        # to them and the ticks outside the chunk are cut here.
+        stop_msc = min(start_msc + window_msc, end_msc + 1)
+        args = (symbol, start_msc // 1000, -(-(stop_msc - 1) // 1000), flags)
+        try:
+            ticks = mt5_copy_ticks_range(*args)
+        except SystemError:
+            ticks = None
+        if ticks is None:
+            _chunk_failed(args)
+            return
+        time_msc = ticks['time_msc']
+        ticks = ticks[numpy.searchsorted(time_msc, start_msc):numpy.searchsorted(time_msc, stop_msc)]
+        if len(ticks):
+            yield ticks
+        start_msc = stop_msc
+
+
+def _iter_ticks_by_count(symbol, start_msc, end_msc, flags, count):
+    cursor_msc = start_msc  # every tick before it has been yielded, none at or after it
+    request = count
+    while cursor_msc <= end_msc:
+        args = (symbol, cursor_msc // 1000, request, flags)
+        try:
+            ticks = mt5_copy_ticks_from(*args)
+        except SystemError:
+            ticks = None
+        if ticks is None:
+            _chunk_failed(args)
+            return
+        exhausted = len(ticks) < request
+        time_msc = ticks['time_msc']
+        lo = numpy.searchsorted(time_msc, cursor_msc)
+        hi = numpy.searchsorted(time_msc, end_msc, side='right')
+        if exhausted or hi < len(ticks):
+            if hi > lo:
+                yield ticks[lo:hi]
+            return
+        # the ticks at the last time_msc may continue beyond the request: hold them back for the next chunk
+        last_msc = time_msc[-1]
+        hi = numpy.searchsorted(time_msc, last_msc)
+        if hi > lo:
+            yield ticks[lo:hi]
+            cursor_msc = int(last_msc)
+            request = count
+        else:
+            # the request only reached ticks before the cursor or at a single time_msc: widen it
+            request *= 2
+
+
 mt5_history_deals_get = _mt5.history_deals_get
 
 
@@ -628,7 +1095,6 @@ mt5_order_send = _mt5.order_send
 
 
 @_context_manager_modified(participation=True)
-@_timed_func
 def order_send(request: dict = None,
                *,
                action: int = None, magic: int = None, order: int = None,
@@ -939,3 +1405,20 @@ def version() -> Tuple[int, int, str]:
 def get_function_dispatch():
     dispatch = dict(sorted((n, f) for n, f in globals().items() if hasattr(f, '__dispatch')))
     return dispatch
+
+
+@_context_manager_modified(participation=False, advanced_features=False)
+def get_latency_histograms() -> dict:
+    """Get the latency histogram of every function in the dispatch table.
+
+    :return: dict of function name -> metrics.LatencyHistogram
+    """
+    return {name: f.latency_histogram for name, f in get_function_dispatch().items()}
+
+
+@_context_manager_modified(participation=False, advanced_features=False)
+def reset_latency_histograms() -> None:
+    """Zero the latency histograms of every function in the dispatch table."""
+    for histogram in get_latency_histograms().values():
+        histogram.reset()
+
@@ -1,55 +1,466 @@
+"""Tick and new bar events of many symbols, polled from one loop.
+
+An :class:`EventEngine` holds subscriptions of (symbol, timeframe, EVENT flags) and polls them in cycles. Each cycle
+requests the last tick of every subscribed symbol once. Only the symbols whose last tick moved are asked for their
+new ticks, and only the (symbol, timeframe) pairs whose next bar open time has been reached are asked for their bar 0.
+The events of a cycle are emitted ordered by time across all symbols. Times are the server times reported by the
+terminal, so no local clock is involved.
+
+Position, order and deal events are found by comparing snapshots keyed on ticket. positions_total, orders_total and
+history_deals_total are asked every cycle, and positions and orders are only requested when one of these counts
+changed, or when ``snapshot_interval`` seconds have passed since the last snapshot. Changes that move no count, like
+a new SL or the price of a pending order, are found by these periodic snapshots. The first cycle finds the last deal
+from the deal counts of growing windows back from the server time, so the deal history is not read. Trade events can
+be subscribed for one symbol or, with the symbol None, for all symbols.
+
+The engine calls the raw backend functions, so the return types and raise_on_errors of the API state do not apply
+to it, and a symbol whose request fails is skipped for the cycle and polled again in the next one.
+
+Iterating an engine polls adaptively. After a cycle with events the next one follows after ``min_sleep`` seconds.
+Each quiet cycle multiplies the pause by ``backoff``, up to ``max_sleep``. When only NEW_BAR events are subscribed,
+the engine sleeps until the next bar is due instead. The server clock is estimated from the tick times for this.
+
+Example:
+    >>> engine = EventEngine([('EURUSD', TIMEFRAME.M1, EVENT.TICK_LAST_CHANGE | EVENT.NEW_BAR),
+    >>>                       ('GBPUSD', TIMEFRAME.H1, EVENT.NEW_BAR)])
+    >>> for event in engine:
+    >>>     if event.type == EVENT.NEW_BAR:
+    >>>         engine.subscribe('USDJPY', TIMEFRAME.H1, EVENT.NEW_BAR)
+    >>> risk = EventEngine([(None, None, EVENT.POSITION_OPENED | EVENT.POSITION_CLOSED | EVENT.DEAL_ADDED)])
+"""
 import enum
+import operator
+import threading
 import time
-from datetime import datetime
-from datetime import timedelta
 
-from . import period_seconds
+import numpy
+
 from .const import COPY_TICKS
+from .const import PERIOD_SECONDS
 from .const import TIMEFRAME
-from .core import copy_rates_from_pos
-from .core import copy_ticks_range
-from .core import symbol_info
+from .core import mt5_copy_rates_from_pos
+from .core import mt5_copy_ticks_range
+from .core import mt5_history_deals_get
+from .core import mt5_history_deals_total
+from .core import mt5_orders_get
+from .core import mt5_orders_total
+from .core import mt5_positions_get
+from .core import mt5_positions_total
+from .core import mt5_symbol_info_tick
+from .helpers import any_symbol
 from .types import *
 
 
 class EVENT(enum.IntFlag):
     TICK_LAST_CHANGE = enum.auto()
     NEW_BAR = enum.auto()
+    POSITION_OPENED = enum.auto()
+    POSITION_CHANGED = enum.auto()
+    POSITION_CLOSED = enum.auto()
+    ORDER_PLACED = enum.auto()
+    ORDER_MODIFIED = enum.auto()
+    ORDER_REMOVED = enum.auto()
+    DEAL_ADDED = enum.auto()
+
+
+_POSITION_EVENTS = EVENT.POSITION_OPENED | EVENT.POSITION_CHANGED | EVENT.POSITION_CLOSED
+_ORDER_EVENTS = EVENT.ORDER_PLACED | EVENT.ORDER_MODIFIED | EVENT.ORDER_REMOVED
+_TRADE_EVENTS = _POSITION_EVENTS | _ORDER_EVENTS | EVENT.DEAL_ADDED
+_HISTORY_END = 2 ** 31 - 1  # upper bound of the deal history requests
+# look-back windows in days searched for the last deal of a new subscription, before the whole history
+_DEAL_WINDOWS = (1, 7, 31, 366)
+
+
+def _state_getter(fields: tuple, market_fields: tuple) -> Callable:
+    return operator.itemgetter(*(i for i, field in enumerate(fields) if field not in market_fields))
+
+
+# the fields that define a change: prices and profits moving with the market are left out
+_POSITION_STATE = _state_getter(TradePosition._fields, ('price_current', 'profit', 'swap'))
+_ORDER_STATE = _state_getter(TradeOrder._fields, ('price_current',))
+
+
+def _next_bar_time(bar_time: int, timeframe: int) -> int:
+    if timeframe == TIMEFRAME.MN1:
+        month = numpy.datetime64(int(bar_time), 's').astype('datetime64[M]') + 1
+        return int(month.astype('datetime64[s]').astype(numpy.int64))
+    return bar_time + PERIOD_SECONDS[timeframe]
+
+
+def new_ticks(ticks: numpy.ndarray, last_msc: int, seen_at_last: Optional[int]) -> Tuple[numpy.ndarray, int, int]:
+    """Select the ticks not seen yet from ticks requested from the second of the last seen tick on.
+
+    Several ticks can share a time_msc, and the terminal may deliver more of them after a poll. The number of
+    ticks already seen at the last time_msc is therefore kept, and only the ticks beyond them are new.
+
+    :param ticks: Ticks sorted by time_msc.
+    :param last_msc: time_msc of the last tick seen.
+    :param seen_at_last: Number of ticks seen at last_msc, or None if all ticks at last_msc count as seen.
+    :return: (new ticks as a view of ``ticks``, new last_msc, new seen_at_last).
+    """
+    time_msc = ticks['time_msc']
+    if seen_at_last is None:
+        start = numpy.searchsorted(time_msc, last_msc, side='right')
+    else:
+        start = min(numpy.searchsorted(time_msc, last_msc, side='left') + seen_at_last, len(ticks))
+    new = ticks[start:]
+    if not len(new):
+        return new, last_msc, seen_at_last
+    last_msc = int(time_msc[-1])
+    return new, last_msc, len(ticks) - int(numpy.searchsorted(time_msc, last_msc, side='left'))
+
+
+def diff_snapshot(old: dict, new: dict, state: Callable = None) -> Tuple[list, list, list]:
+    """Compare two snapshots of ticket -> item.
+
+    :param old: Previous snapshot.
+    :param new: Current snapshot.
+    :param state: Function of an item returning the value compared to find changed items. Whole items are compared
+    by default.
+    :return: (added items, changed items from new, removed items from old).
+    """
+    added = [new[ticket] for ticket in new.keys() - old.keys()]
+    removed = [old[ticket] for ticket in old.keys() - new.keys()]
+    if state is None:
+        changed = [item for ticket, item in new.items() if ticket in old and item != old[ticket]]
+    else:
+        changed = [item for ticket, item in new.items() if ticket in old and state(item) != state(old[ticket])]
+    return added, changed, removed
+
+
+class EventEngine:
+    """Polls the tick and new bar events of a set of subscriptions from one loop. Subscriptions can be added and
+    removed from any thread while the engine runs.
+    """
+
+    def __init__(self, subscriptions: Iterable[tuple] = (), *,
+                 min_sleep: float = 0.001, max_sleep: float = 0.5, backoff: float = 2.0, batch_ticks: bool = False,
+                 snapshot_interval: float = 1.0):
+        """
+
+        :param subscriptions: (symbol, timeframe, event_flags) tuples, see subscribe.
+        :param batch_ticks: Emit one TICK_LAST_CHANGE event per symbol and poll, with the structured array of the
+        new ticks as data and the time_msc of the first one, instead of an event with a CopyTick per tick.
+        :param min_sleep: Seconds between poll cycles while events arrive.
+        :param max_sleep: Longest pause between poll cycles while no events arrive, unless only NEW_BAR events are
+        subscribed and the next bar is due later.
+        :param backoff: Factor the pause grows by with every cycle without events.
+        :param snapshot_interval: Longest time in seconds between position and order snapshots while no count
+        changes. Changes like a new SL or TP are found with this delay.
+        """
+        self.min_sleep = min_sleep
+        self.max_sleep = max_sleep
+        self.backoff = backoff
+        self.batch_ticks = batch_ticks
+        self.snapshot_interval = snapshot_interval
+        self._sleep = min_sleep
+        self._clock_offset = None  # estimated server time - local time.time()
+        self._subscriptions = {}  # (symbol name, timeframe) -> EVENT flags; replaced, never mutated
+        self._lock = threading.Lock()
+        self._ticks = {}  # symbol -> [time_msc of the last tick emitted, ticks emitted at it, last symbol_info_tick]
+        self._bars = {}  # (symbol, timeframe) -> [open time of bar 0, open time of the next bar]
+        self._positions = None  # ticket -> TradePosition of the last snapshot
+        self._orders = None  # ticket -> TradeOrder of the last snapshot
+        self._deals = None  # [time of the last deal seen, tickets of the deals seen at that time]
+        self._snapshot_due = 0.0  # time.monotonic() of the next position and order snapshot
+        for subscription in subscriptions:
+            self.subscribe(*subscription)
+
+    @property
+    def subscriptions(self) -> Dict[tuple, EVENT]:
+        """dict of (symbol, timeframe) -> EVENT flags. Tick only subscriptions have the timeframe None, trade
+        subscriptions of all symbols the symbol None."""
+        return dict(self._subscriptions)
+
+    def subscribe(self, symbol: Union[str, SymbolInfo], timeframe: int = None,
+                  event_flags: Union[EVENT, int] = EVENT.TICK_LAST_CHANGE) -> None:
+        """Add events to watch. Flags of an existing (symbol, timeframe) subscription are combined.
+
+        :param symbol: Symbol name or an object with a name, for example SymbolInfo. None subscribes the position,
+        order and deal events of all symbols.
+        :param timeframe: TIMEFRAME of the NEW_BAR events. Not needed for the other events.
+        :param event_flags: EVENT flags.
+        """
+        event_flags = EVENT(event_flags)
+        if EVENT.NEW_BAR in event_flags and timeframe is None:
+            raise ValueError('NEW_BAR events require a timeframe')
+        if symbol is None and event_flags & ~_TRADE_EVENTS:
+            raise ValueError('TICK_LAST_CHANGE and NEW_BAR events require a symbol')
+        key = (any_symbol(symbol), timeframe)
+        with self._lock:
+            subscriptions = dict(self._subscriptions)
+            subscriptions[key] = subscriptions.get(key, EVENT(0)) | event_flags
+            self._subscriptions = subscriptions
+
+    def unsubscribe(self, symbol: Union[str, SymbolInfo], timeframe: int = None,
+                    event_flags: Union[EVENT, int] = None) -> None:
+        """Stop watching events.
+
+        :param symbol: Symbol name or an object with a name.
+        :param timeframe: Timeframe the events were subscribed with.
+        :param event_flags: EVENT flags to remove. None removes the subscription.
+        """
+        key = (any_symbol(symbol), timeframe)
+        with self._lock:
+            subscriptions = dict(self._subscriptions)
+            flags = subscriptions.pop(key, EVENT(0))
+            if event_flags is not None and flags & ~event_flags:
+                subscriptions[key] = flags & ~event_flags
+            self._subscriptions = subscriptions
+
+    def poll(self) -> List[Event]:
+        """Run one poll cycle.
+
+        :return: The new events of all subscriptions ordered by time_msc.
+        """
+        subscriptions = self._subscriptions
+        tick_symbols = set()
+        bar_keys = set()
+        trade_flags = {}  # symbol or None -> trade EVENT flags
+        for key, flags in subscriptions.items():
+            if EVENT.TICK_LAST_CHANGE in flags:
+                tick_symbols.add(key[0])
+            if EVENT.NEW_BAR in flags:
+                bar_keys.add(key)
+            if flags & _TRADE_EVENTS:
+                trade_flags[key[0]] = trade_flags.get(key[0], EVENT(0)) | flags & _TRADE_EVENTS
+        self._prune(tick_symbols, bar_keys, trade_flags)
+        last_ticks = {}
+        for symbol in tick_symbols.union(s for s, _ in bar_keys):
+            tick = mt5_symbol_info_tick(symbol)
+            if tick is not None:
+                last_ticks[symbol] = tick
+        if last_ticks:
+            # a last tick is never newer than the server clock: the largest offset is the best estimate
+            offset = max(t.time_msc for t in last_ticks.values()) / 1000 - time.time()
+            if self._clock_offset is None or offset > self._clock_offset:
+                self._clock_offset = offset
+        events = []
+        for symbol in tick_symbols:
+            tick = last_ticks.get(symbol)
+            if tick is not None:
+                self._poll_ticks(symbol, tick, events)
+        for key in bar_keys:
+            tick = last_ticks.get(key[0])
+            if tick is not None:
+                self._poll_bar(key, tick, events)
+        if trade_flags:
+            self._poll_trade(trade_flags, events)
+        events.sort(key=lambda e: e.time_msc)
+        return events
+
+    def _prune(self, tick_symbols, bar_keys, trade_flags):
+        for symbol in self._ticks.keys() - tick_symbols:
+            del self._ticks[symbol]
+        for key in self._bars.keys() - bar_keys:
+            del self._bars[key]
+        flags = EVENT(0)
+        for symbol_flags in trade_flags.values():
+            flags |= symbol_flags
+        if not flags:
+            self._deals = None
+        if not flags & _POSITION_EVENTS:
+            self._positions = None
+        if not flags & _ORDER_EVENTS:
+            self._orders = None
+
+    def _poll_ticks(self, symbol, tick, events):
+        state = self._ticks.get(symbol)
+        if state is None:  # new subscription: start after the current tick
+            self._ticks[symbol] = [tick.time_msc, None, tick]
+            return
+        last_msc, seen_at_last, last_tick = state
+        if tick == last_tick:
+            return
+        try:
+            ticks = mt5_copy_ticks_range(symbol, last_msc // 1000, tick.time + 1, COPY_TICKS.ALL)
+        except SystemError:
+            ticks = None
+        if ticks is None:  # the tick stays unseen, so the next cycle asks again
+            return
+        state[2] = tick
+        new, state[0], state[1] = new_ticks(ticks, last_msc, seen_at_last)
+        if not len(new):
+            return
+        if self.batch_ticks:
+            events.append(Event(int(new['time_msc'][0]), EVENT.TICK_LAST_CHANGE, symbol, None, new))
+        else:
+            events.extend(Event(t.time_msc, EVENT.TICK_LAST_CHANGE, symbol, None, t)
+                          for t in map(CopyTick._make, new.tolist()))
+
+    def _poll_bar(self, key, tick, events):
+        state = self._bars.get(key)
+        if state is not None and tick.time < state[1]:
+            return
+        symbol, timeframe = key
+        try:
+            rates = mt5_copy_rates_from_pos(symbol, timeframe, 0, 1)
+        except SystemError:
+            rates = None
+        if rates is None or not len(rates):
+            return
+        bar = CopyRate(*rates[0])
+        bar_time = int(bar.time)
+        if state is None:  # new subscription: start with the current bar
+            self._bars[key] = [bar_time, _next_bar_time(bar_time, timeframe)]
+        elif bar_time != state[0]:
+            self._bars[key] = [bar_time, _next_bar_time(bar_time, timeframe)]
+            events.append(Event(bar_time * 1000, EVENT.NEW_BAR, symbol, timeframe, bar))
+
+    def _poll_trade(self, trade_flags, events):
+        flags = EVENT(0)
+        for symbol_flags in trade_flags.values():
+            flags |= symbol_flags
+        all_symbols = trade_flags.get(None, EVENT(0))
+
+        def emit(time_msc, event, item):
+            if event in all_symbols or event in trade_flags.get(item.symbol, EVENT(0)):
+                events.append(Event(time_msc, event, item.symbol, None, item))
+
+        deals = self._poll_deals()
+        if deals is None:
+            return
+        for deal in deals:
+            emit(deal.time_msc, EVENT.DEAL_ADDED, deal)
+        # closed positions and removed orders carry the time of their deal, or the last known server time
+        if self._clock_offset is not None:
+            now_msc = int((time.time() + self._clock_offset) * 1000)
+        else:
+            now_msc = max((d.time_msc for d in deals), default=self._deals[0] * 1000)
+        now = time.monotonic()
+        snapshot = now >= self._snapshot_due
+        if snapshot:
+            self._snapshot_due = now + self.snapshot_interval
+        if flags & _POSITION_EVENTS:
+            positions = self._snapshot(mt5_positions_total, mt5_positions_get, self._positions, snapshot or deals)
+            if positions is not None:
+                if self._positions is not None:
+                    closing = {d.position_id: d.time_msc for d in deals}
+                    opened, changed, closed = diff_snapshot(self._positions, positions, _POSITION_STATE)
+                    for p in opened:
+                        emit(p.time_msc, EVENT.POSITION_OPENED, p)
+                    for p in changed:
+                        emit(p.time_update_msc, EVENT.POSITION_CHANGED, p)
+                    for p in closed:
+                        emit(closing.get(p.ticket, now_msc), EVENT.POSITION_CLOSED, p)
+                self._positions = positions
+        if flags & _ORDER_EVENTS:
+            orders = self._snapshot(mt5_orders_total, mt5_orders_get, self._orders, snapshot or deals)
+            if orders is not None:
+                if self._orders is not None:
+                    filled = {d.order: d.time_msc for d in deals}
+                    placed, modified, removed = diff_snapshot(self._orders, orders, _ORDER_STATE)
+                    for o in placed:
+                        emit(o.time_setup_msc, EVENT.ORDER_PLACED, o)
+                    for o in modified:
+                        emit(now_msc, EVENT.ORDER_MODIFIED, o)
+                    for o in removed:
+                        emit(filled.get(o.ticket, now_msc), EVENT.ORDER_REMOVED, o)
+                self._orders = orders
+
+    def _snapshot(self, get_total, get_items, last, force) -> Optional[dict]:
+        """A new snapshot of ticket -> item when it is forced or the count changed, else None. When the count or the
+        items cannot be read, the last snapshot is kept and the next cycle takes a new one.
+        """
+        total = get_total()
+        if total is not None and not force and last is not None and total == len(last):
+            return None
+        items = None if total is None else get_items()
+        if items is None:
+            self._snapshot_due = 0.0
+            return None
+        return {item.ticket: item for item in items}
+
+    def _poll_deals(self) -> Optional[list]:
+        """New deals since the last poll, or None if the deal history could not be read."""
+        if self._deals is None:  # new subscription: start after the last deal of the history
+            return self._seed_deals()
+        last, seen = self._deals
+        total = mt5_history_deals_total(last, _HISTORY_END)
+        if total is None:
+            return None
+        if total == len(seen):
+            return []
+        deals = mt5_history_deals_get(last, _HISTORY_END)
+        if deals is None:
+            return None
+        deals = [d for d in deals if d.ticket not in seen]
+        if deals:
+            deals.sort(key=lambda d: d.time_msc)
+            if deals[-1].time != last:
+                last, seen = deals[-1].time, set()
+            self._deals = [last, seen.union(d.ticket for d in deals if d.time == last)]
+        return deals
+
+    def _seed_deals(self) -> Optional[list]:
+        # the counts of growing windows back from the server time find the last deal without reading the history
+        if self._clock_offset is not None:
+            now = int(time.time() + self._clock_offset) + 1
+        else:
+            now = int(time.time()) + 86400  # the server time zone is within a day of UTC
+        for date_from in [now - days * 86400 for days in _DEAL_WINDOWS] + [0]:
+            total = mt5_history_deals_total(date_from, _HISTORY_END)
+            if total is None:
+                return None
+            if total:
+                break
+        else:
+            self._deals = [0, set()]
+            return []
+        deals = mt5_history_deals_get(date_from, _HISTORY_END)
+        if deals is None:
+            return None
+        last = max((d.time for d in deals), default=0)
+        self._deals = [last, {d.ticket for d in deals if d.time == last}]
+        return []
+
+    def next_sleep(self, events: list) -> float:
+        """Get the pause before the next poll cycle and update the backoff. Called by the iterators after each poll.
+
+        :param events: Events of the last poll.
+        :return: Seconds to sleep.
+        """
+        if events:
+            self._sleep = self.min_sleep
+            return self._sleep
+        sleep = self._sleep
+        self._sleep = min(sleep * self.backoff, self.max_sleep)
+        subscriptions = self._subscriptions
+        if (self._bars and self._clock_offset is not None
+                and not any(flags & ~EVENT.NEW_BAR for flags in subscriptions.values())):
+            until_bar = min(state[1] for state in self._bars.values()) - (time.time() + self._clock_offset)
+            if until_bar > sleep:
+                # nothing can happen before the bar opens; poll tightly again once it is due
+                self._sleep = self.min_sleep
+                return until_bar
+        return sleep
+
+    def __iter__(self) -> Iterator[Event]:
+        """Poll forever, yielding the events of each cycle and sleeping adaptively in between."""
+        while True:
+            events = self.poll()
+            yield from events
+            time.sleep(self.next_sleep(events))
 
 
 def iter_event(symbol: Union[str, SymbolInfo],
                timeframe: TIMEFRAME,
                event_flags: Union[EVENT, int],
-               sleep: float = 0.001):
+               sleep: float = 0.001,
+               max_sleep: float = 0.5,
+               batch_ticks: bool = False):
+    """Yield (EVENT, data) for the events of one symbol. See EventEngine for many symbols and for the data.
+
+    :param symbol: Symbol name or SymbolInfo.
+    :param timeframe: TIMEFRAME of the NEW_BAR events.
+    :param event_flags: EVENT flags.
+    :param sleep: Seconds between polls while events arrive.
+    :param max_sleep: Longest pause between polls while no events arrive (see EventEngine).
+    :param batch_ticks: Yield the new ticks of each poll as one array instead of a CopyTick each.
+    """
     if event_flags == 0:
         return
-    symbol = getattr(symbol, 'name', symbol_info(symbol))
-    last_tick = None
-    last_bar = copy_rates_from_pos(symbol.name, timeframe, 0, 1)[0]
-    psec = timedelta(seconds=period_seconds(timeframe))
-    next_bar_time = datetime.fromtimestamp(last_bar['time']) + psec
-    # save as bool to prevent checking condition on each loop
-    do_tick_event = EVENT.TICK_LAST_CHANGE in event_flags
-    do_new_bar_event = EVENT.NEW_BAR in event_flags
-
-    while True:
-        if do_tick_event:
-            now = datetime.now()
-            last_tick_time = now - timedelta(seconds=1) if last_tick is None else datetime.fromtimestamp(last_tick.time)
-            if last_tick_time > now:
-                now, last_tick_time = last_tick_time, now
-            ticks = copy_ticks_range(symbol.name, last_tick_time, now, COPY_TICKS.ALL)
-            if ticks is not None:
-                for tick in ticks:
-                    tick = CopyTick(*tick)
-                    if last_tick is None or tick.time_msc > last_tick.time_msc:
-                        yield EVENT.TICK_LAST_CHANGE, tick
-                        last_tick = tick
-        if do_new_bar_event:
-            if datetime.now() >= next_bar_time:
-                bar = copy_rates_from_pos(symbol.name, timeframe, 0, 1)[0]
-                if (bar_time := bar['time']) != last_bar['time']:
-                    yield EVENT.NEW_BAR, CopyRate(*bar)
-                    last_bar = bar
-                    next_bar_time = datetime.fromtimestamp(bar_time) + psec
-        time.sleep(sleep)
+    engine = EventEngine([(symbol, timeframe, event_flags)], min_sleep=sleep, max_sleep=max_sleep,
+                         batch_ticks=batch_ticks)
+    for event in engine:
+        yield event.type, event.data
@@ -0,0 +1,165 @@
+"""Column views over the structured arrays returned by the copy_rates_* and copy_ticks_* functions.
+
+A frame wraps the array without copying it. Its columns are views into the array, its time columns can be read as
+numpy datetime64 views, and slicing it by position or by time returns a frame over a view of the same memory.
+
+Example:
+    >>> bars = RatesFrame(copy_rates_from_pos('EURUSD', TIMEFRAME.M1, 0, 10_000))
+    >>> ranges = bars.high - bars.low
+    >>> today = bars.between(datetime(2020, 6, 3), datetime(2020, 6, 4))
+    >>> today.datetime[-1]
+    numpy.datetime64('2020-06-03T11:59:00')
+"""
+import datetime as _datetime
+
+import numpy
+
+from . import helpers as _h
+from .types import *
+
+
+class _Frame:
+    """Shared implementation of RatesFrame and TicksFrame."""
+    __slots__ = ('data',)
+    _fields = ()
+    _time_field = None  # the sorted time column that between() searches
+    _time_unit = None  # 's' or 'ms'
+
+    def __init__(self, data: numpy.ndarray):
+        """
+
+        :param data: Structured array as returned by the MetaTrader5 package, or another frame.
+        """
+        if isinstance(data, _Frame):
+            data = data.data
+        names = getattr(getattr(data, 'dtype', None), 'names', None)
+        if names is None or not set(self._fields) <= set(names):
+            raise TypeError(f'{type(self).__name__} requires a structured array with the fields {self._fields}')
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        """A column view for a field name, else a frame over the selected rows (a view for slices)."""
+        if isinstance(key, str):
+            return self.data[key]
+        if isinstance(key, (int, numpy.integer)):
+            key = slice(key, key + 1 or None)
+        return type(self)(self.data[key])
+
+    def __array__(self, dtype=None, copy=None):
+        return self.data if dtype is None else self.data.astype(dtype)
+
+    def __eq__(self, other):
+        return type(other) is type(self) and numpy.array_equal(self.data, other.data)
+
+    __hash__ = None
+
+    def __repr__(self):
+        if not len(self):
+            return f'{type(self).__name__}(rows=0)'
+        time = self.datetime
+        return f'{type(self).__name__}(rows={len(self)}, first={time[0]}, last={time[-1]})'
+
+    @property
+    def datetime(self) -> numpy.ndarray:
+        """The time column as a numpy datetime64 view (no copy)."""
+        return self.data[self._time_field].view(f'datetime64[{self._time_unit}]')
+
+    # the datetime property shadows the datetime class in the class body
+    def between(self, start: Union[_datetime.datetime, int] = None, end: Union[_datetime.datetime, int] = None):
+        """Rows with a time within [start, end], found by binary search on the sorted time column.
+
+        :param start: datetime or seconds since 1970.01.01. Naive datetimes are taken as UTC. None for no bound.
+        :param end: datetime or seconds since 1970.01.01. None for no bound.
+        :return: A frame over a view of the rows.
+        """
+        time = self.data[self._time_field]
+        lo = 0 if start is None else numpy.searchsorted(time, self._to_time(start), side='left')
+        hi = len(time) if end is None else numpy.searchsorted(time, self._to_time(end), side='right')
+        return type(self)(self.data[lo:hi])
+
+    def _to_time(self, value):
+        # a datetime or seconds in the unit of the time field
+        return _h.to_milliseconds(value) if self._time_unit == 'ms' else _h.to_seconds(value)
+
+
+class RatesFrame(_Frame):
+    """Columnar view of a rates array from copy_rates_*."""
+    __slots__ = ()
+    _fields = CopyRate._fields
+    _time_field = 'time'
+    _time_unit = 's'
+
+    @property
+    def time(self) -> numpy.ndarray:
+        return self.data['time']
+
+    @property
+    def open(self) -> numpy.ndarray:
+        return self.data['open']
+
+    @property
+    def high(self) -> numpy.ndarray:
+        return self.data['high']
+
+    @property
+    def low(self) -> numpy.ndarray:
+        return self.data['low']
+
+    @property
+    def close(self) -> numpy.ndarray:
+        return self.data['close']
+
+    @property
+    def tick_volume(self) -> numpy.ndarray:
+        return self.data['tick_volume']
+
+    @property
+    def spread(self) -> numpy.ndarray:
+        return self.data['spread']
+
+    @property
+    def real_volume(self) -> numpy.ndarray:
+        return self.data['real_volume']
+
+
+class TicksFrame(_Frame):
+    """Columnar view of a ticks array from copy_ticks_*. Times are searched and converted from time_msc."""
+    __slots__ = ()
+    _fields = CopyTick._fields
+    _time_field = 'time_msc'
+    _time_unit = 'ms'
+
+    @property
+    def time(self) -> numpy.ndarray:
+        return self.data['time']
+
+    @property
+    def bid(self) -> numpy.ndarray:
+        return self.data['bid']
+
+    @property
+    def ask(self) -> numpy.ndarray:
+        return self.data['ask']
+
+    @property
+    def last(self) -> numpy.ndarray:
+        return self.data['last']
+
+    @property
+    def volume(self) -> numpy.ndarray:
+        return self.data['volume']
+
+    @property
+    def time_msc(self) -> numpy.ndarray:
+        return self.data['time_msc']
+
+    @property
+    def flags(self) -> numpy.ndarray:
+        return self.data['flags']
+
+    @property
+    def volume_real(self) -> numpy.ndarray:
+        return self.data['volume_real']
@@ -1,5 +1,11 @@
+import array
+import calendar
+import json as _stdlib_json
+import logging
 from datetime import datetime
 
+import numpy
+
 from .types import *
 
 try:
@@ -8,9 +14,33 @@ except ImportError:
     import json
 
 
+def _json_dumps(data):
+    try:
+        return json.dumps(data)
+    except TypeError:
+        # eg. datetime args or filter callbacks in a call signature
+        return _stdlib_json.dumps(data, default=str)
+
+
+def _clears_str_cache(method):
+    def wrapper(self, *args, **kwargs):
+        self._str = None
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = method.__name__
+    return wrapper
+
+
 class LogJson(dict):
+    """A log message that renders as a short message and a JSON dump of itself, separated by a tab.
+
+    The rendered string is cached because every handler formats the same record. Setting or deleting top level
+    keys clears the cache; mutating nested values after the first render does not.
+    """
+
     def __init__(self, short_message_=None, dictionary_=None, **kwargs):
         self.default_short_message = 'JSON ENTRY'
+        self._str = None
         if dictionary_ is None and isinstance(short_message_, dict):
             dictionary_, short_message_ = short_message_, None
         is_dict = isinstance(dictionary_, dict)
@@ -21,11 +51,78 @@ class LogJson(dict):
             super().__init__(**kwargs)
 
     def __str__(self):
-        type_ = self['type']
-        msg = self.short_message or type_ or self.default_short_message
-        res = f"{msg}\t{json.dumps(self)}"
+        res = self._str
+        if res is None:
+            type_ = self['type']
+            msg = self.short_message or type_ or self.default_short_message
+            res = self._str = f"{msg}\t{_json_dumps(self)}"
         return res
 
+    def __setitem__(self, key, value):
+        self._str = None
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._str = None
+        super().__delitem__(key)
+
+    update = _clears_str_cache(dict.update)
+    pop = _clears_str_cache(dict.pop)
+    popitem = _clears_str_cache(dict.popitem)
+    setdefault = _clears_str_cache(dict.setdefault)
+    clear = _clears_str_cache(dict.clear)
+
+
+def will_log(logger: logging.Logger, level: int) -> bool:
+    """Check if a record at the level would be emitted by at least one handler, so that building the record can be
+    skipped otherwise.
+
+    :param logger: logging.Logger or any object implementing isEnabledFor.
+    :param level: The logging level of the record.
+    :return: True if the record would be emitted.
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    current = logger if isinstance(logger, logging.Logger) else None
+    if current is None:
+        return True
+    found_handler = False
+    while current:
+        for handler in current.handlers:
+            found_handler = True
+            if level >= handler.level:
+                return True
+        current = current.parent if current.propagate else None
+    return not found_handler and logging.lastResort is not None and level >= logging.lastResort.level
+
+
+def to_seconds(value: Union[datetime, int, float]) -> int:
+    """Convert a datetime or a timestamp to whole seconds since 1970.01.01. Naive datetimes are taken as UTC, the
+    way the terminal interprets them.
+
+    :param value: datetime or seconds.
+    :return: Seconds as int.
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            return int(value.timestamp())
+        return calendar.timegm(value.timetuple())
+    return int(value)
+
+
+def to_milliseconds(value: Union[datetime, int, float]) -> int:
+    """Convert a datetime or a timestamp to whole milliseconds since 1970.01.01, the unit of ``time_msc``. Naive
+    datetimes are taken as UTC.
+
+    :param value: datetime or seconds.
+    :return: Milliseconds as int.
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.replace(tzinfo=None) - value.utcoffset()
+        return calendar.timegm(value.timetuple()) * 1000 + value.microsecond // 1000
+    return int(round(value * 1000))
+
 
 def any_symbol(symbol):
     """Pass any symbol object with a name property or string.
@@ -76,9 +173,69 @@ def make_native(data):
     return __ify(data, ['_asdict', 'tolist'])
 
 
+# array.array typecodes of the numpy column types, by (kind, itemsize)
+_TYPECODES = {
+    ('i', 1): 'b', ('u', 1): 'B', ('i', 2): 'h', ('u', 2): 'H', ('i', 4): 'i', ('u', 4): 'I',
+    ('i', 8): 'q', ('u', 8): 'Q', ('f', 4): 'f', ('f', 8): 'd',
+}
+
+
+def _to_array(column: numpy.ndarray):
+    code = _TYPECODES.get((column.dtype.kind, column.dtype.itemsize))
+    if code is None or array.array(code).itemsize != column.dtype.itemsize:
+        return column.tolist()
+    out = array.array(code)
+    out.frombytes(numpy.ascontiguousarray(column, dtype=column.dtype.newbyteorder('=')).tobytes())
+    return out
+
+
+def to_columns(data: numpy.ndarray) -> Dict[str, array.array]:
+    """Convert a structured array (eg. rates or ticks) to a dict of field name -> array.array of the field's values.
+
+    Every column is a single compact buffer, so the conversion, pickling and unpickling cost about as much as copying
+    the array's memory, instead of one Python object per value like ``tolist``.
+
+    :param data: Structured numpy array.
+    :return: dict of field name -> array.array ('q' for int64, 'd' for float64, ...).
+    """
+    return {name: _to_array(data[name]) for name in data.dtype.names}
+
+
+def make_columnar(data):
+    """Like make_native, except that structured arrays become dicts of columns (see to_columns).
+
+    :param data: Any API returned result from the MetaTrader5 API
+    :return:
+    """
+    if isinstance(data, numpy.ndarray):
+        return to_columns(data) if data.dtype.names else _to_array(data)
+    if hasattr(data, '_asdict'):
+        return make_columnar(data._asdict())
+    T = type(data)
+    if T is tuple or T is list:
+        return T(make_columnar(i) for i in data)
+    if T is dict:
+        return {k: make_columnar(v) for k, v in data.items()}
+    return data
+
+
+def json_default(obj):
+    """``default`` for json.dump(s) that serializes the array.array columns of make_columnar and numpy values.
+
+    Example:
+        >>> json.dumps(copy_rates_from_pos('EURUSD', TIMEFRAME.H1, 0, 100), default=json_default)
+
+    :param obj: Object the json encoder cannot serialize.
+    :return: A JSON serializable equivalent.
+    """
+    if isinstance(obj, (array.array, numpy.ndarray, numpy.generic)):
+        return obj.tolist()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
 def do_trade_action(func, args):
     cleaned = reduce_args(args)
-    request = cleaned.pop('request', {})
+    request = dict(cleaned.pop('request', {}))  # don't mutate the caller's request
     symbol = cleaned.pop('symbol', None) or request.pop('symbol', None)
     cleaned['symbol'] = any_symbol(symbol)
     order_request = reduce_combine(request, cleaned)
@@ -125,6 +282,11 @@ def get_history_type_stuff(func, args):
 
 
 def is_rates_array(array):
+    """Whether ``array`` holds rates: a structured array with the rates fields, or a sequence of rate tuples (as
+    converted by make_native)."""
+    names = getattr(getattr(array, 'dtype', None), 'names', None)
+    if names is not None:
+        return names == CopyRate._fields
     try:
         rate = array[0]
         return type(rate) is tuple and len(rate) == 8
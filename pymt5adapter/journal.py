@@ -0,0 +1,273 @@
+"""Append-only binary journal of ``order_send`` and ``order_check`` traffic.
+
+Every journaled call is written as one fixed-width little-endian record (see ``JOURNAL_DTYPE``) after a short file
+header, so a journal file can be memory-mapped as a NumPy structured array without parsing. The journal rotates by
+size the same way as ``logging.handlers.RotatingFileHandler``: ``orders.jnl`` -> ``orders.jnl.1`` -> ...
+
+Example:
+    >>> with connected(journal='orders.jnl'):
+    >>>     order_send(...)
+    >>> records = read_journal('orders.jnl')
+    >>> records[records['retcode'] != TRADE_RETCODE_DONE]['latency_ns']
+"""
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+import numpy
+
+from .helpers import LogJson
+from .types import *
+
+JOURNAL_MAGIC = b'PMT5JRNL'
+JOURNAL_VERSION = 2
+
+JOURNALED_FUNCTIONS = {
+    'order_send' : 1,
+    'order_check': 2,
+}
+
+# (field, numpy type, struct code)
+_FIELDS = (
+    ('time_ns', '<i8', 'q'),  # UTC wall clock of the call
+    ('function', 'u1', 'B'),  # JOURNALED_FUNCTIONS code
+    ('action', '<u4', 'I'),
+    ('type', '<u4', 'I'),
+    ('retcode', '<u4', 'I'),  # 0 when the call returned None
+    ('error_code', '<i4', 'i'),  # last_error() code when the call returned None, else 0
+    ('latency_ns', '<i8', 'q'),
+    ('symbol', 'S16', '16s'),
+    ('volume', '<f8', 'd'),
+    ('price', '<f8', 'd'),  # request price
+    ('fill_price', '<f8', 'd'),  # result price (order_send)
+    ('sl', '<f8', 'd'),
+    ('tp', '<f8', 'd'),
+    ('magic', '<i8', 'q'),  # signed: the terminal accepts negative magic numbers
+    ('order', '<u8', 'Q'),  # result order ticket, or the request order ticket
+    ('deal', '<u8', 'Q'),
+    ('position', '<u8', 'Q'),
+    ('request_id', '<u4', 'I'),
+)
+
+JOURNAL_DTYPE = numpy.dtype([(name, dtype) for name, dtype, _ in _FIELDS])
+_RECORD = struct.Struct('<' + ''.join(code for *_, code in _FIELDS))
+_HEADER = struct.Struct('<8sII')
+HEADER_SIZE = _HEADER.size
+
+assert _RECORD.size == JOURNAL_DTYPE.itemsize
+
+# value range of the integer struct codes
+_INT_RANGES = {code: (numpy.iinfo(dtype).min, numpy.iinfo(dtype).max)
+               for _, dtype, code in _FIELDS if numpy.dtype(dtype).kind in 'iu'}
+
+
+def _number(value, cast):
+    # requests that failed validation may hold anything
+    try:
+        return cast(value or 0)
+    except (TypeError, ValueError, OverflowError):
+        return cast(0)
+
+
+def _clamped(values) -> tuple:
+    # out of range integers (eg. a bogus ticket of a rejected request) are clamped instead of failing the pack
+    out = []
+    for (_, _, code), value in zip(_FIELDS, values):
+        bounds = _INT_RANGES.get(code)
+        if bounds is not None:
+            value = min(max(value, bounds[0]), bounds[1])
+        out.append(value)
+    return tuple(out)
+
+
+def _request_from_call(args, kwargs) -> dict:
+    request = dict(args[0]) if args and isinstance(args[0], dict) else {}
+    request.update((k, v) for k, v in kwargs.items() if v is not None)
+    return request
+
+
+class OrderJournal:
+    """Writes fixed-width order records to a size-rotated binary file. Thread safe."""
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = 64 * 1024 * 1024, backup_count: int = 5):
+        """
+
+        :param path: Path of the active journal file. It is appended to when it exists.
+        :param max_bytes: The file is rotated before a record would make it larger than this. 0 disables rotation.
+        :param backup_count: Number of rotated files to keep. With 0 the file is truncated instead of rotated.
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self.errors = 0  # records lost to exceptions, see handle_error
+        self._open()
+
+    def _open(self):
+        path = self.path
+        if path.exists() and path.stat().st_size >= HEADER_SIZE:
+            _check_header(path)
+            size = path.stat().st_size
+            # drop a torn trailing record left by a crash
+            size = HEADER_SIZE + (size - HEADER_SIZE) // _RECORD.size * _RECORD.size
+            self._file = open(path, 'r+b', buffering=0)
+            self._file.truncate(size)
+            self._file.seek(size)
+            self._size = size
+        else:
+            self._file = open(path, 'wb', buffering=0)
+            self._file.write(_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, _RECORD.size))
+            self._size = HEADER_SIZE
+
+    def _rotate(self):
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = Path(f'{self.path}.{i}')
+                if src.exists():
+                    os.replace(src, f'{self.path}.{i + 1}')
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            self.path.unlink()
+        self._open()
+
+    def write(self, record: bytes) -> None:
+        """Append one packed record, rotating first when needed.
+
+        :param record: A record packed to the JOURNAL_DTYPE layout.
+        """
+        with self._lock:
+            if self._file is None:
+                raise ValueError(f'{type(self).__name__} is closed')
+            if self.max_bytes and self._size > HEADER_SIZE and self._size + len(record) > self.max_bytes:
+                self._rotate()
+            self._file.write(record)
+            self._size += len(record)
+
+    def record(self, function: str, args: tuple, kwargs: dict, result, latency_ns: int, error_code: int = 0):
+        """Pack and append the record of one journaled call.
+
+        :param function: Name of the API function (a key of JOURNALED_FUNCTIONS).
+        :param args: Positional args of the call.
+        :param kwargs: Keyword args of the call.
+        :param result: The raw OrderSendResult/OrderCheckResult or None.
+        :param latency_ns: Latency of the call.
+        :param error_code: last_error() code when the result is None.
+        """
+        if result is not None:
+            request = result.request._asdict()
+            retcode = result.retcode
+            fill_price = getattr(result, 'price', 0.0)
+            order = getattr(result, 'order', 0) or request.get('order') or 0
+            deal = getattr(result, 'deal', 0)
+            request_id = getattr(result, 'request_id', 0)
+        else:
+            request = _request_from_call(args, kwargs)
+            retcode = fill_price = deal = request_id = 0
+            order = request.get('order') or 0
+        symbol = getattr(request.get('symbol'), 'name', request.get('symbol')) or ''
+        get = request.get
+        self.write(_RECORD.pack(*_clamped((
+            time.time_ns(),
+            JOURNALED_FUNCTIONS.get(function, 0),
+            _number(get('action'), int),
+            _number(get('type'), int),
+            retcode,
+            error_code,
+            latency_ns,
+            str(symbol).encode()[:16],
+            _number(get('volume'), float),
+            _number(get('price'), float),
+            _number(fill_price, float),
+            _number(get('sl'), float),
+            _number(get('tp'), float),
+            _number(get('magic'), int),
+            _number(order, int),
+            _number(deal, int),
+            _number(get('position'), int),
+            _number(request_id, int),
+        ))))
+
+    def handle_error(self, function: str, logger: logging.Logger = None) -> None:
+        """Report the exception raised by ``record`` for a call that has already reached the terminal, whose result
+        must not be lost to a journal failure. Like logging.Handler.handleError, the error is counted in ``errors``
+        and reported instead of raised: logged at ERROR when a logger is given, else printed to stderr when
+        logging.raiseExceptions is set.
+
+        :param function: Name of the journaled API function.
+        :param logger: The logger of the API state, or None.
+        """
+        self.errors += 1
+        exc_type, exc, _ = sys.exc_info()
+        if logger is not None:
+            logger.error(LogJson('Journal Error', {
+                'type'     : 'journal_error',
+                'function' : function,
+                'journal'  : str(self.path),
+                'exception': {
+                    'type'   : getattr(exc_type, '__name__', None),
+                    'message': str(exc),
+                },
+            }))
+        elif logging.raiseExceptions:
+            sys.stderr.write(f'--- {type(self).__name__} error in {function} ({self.path}) ---\n')
+            traceback.print_exc(file=sys.stderr)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f'{type(self).__name__}({str(self.path)!r})'
+
+
+def _check_header(path):
+    with open(path, 'rb') as f:
+        magic, version, record_size = _HEADER.unpack(f.read(HEADER_SIZE))
+    if magic != JOURNAL_MAGIC or version != JOURNAL_VERSION or record_size != _RECORD.size:
+        raise ValueError(f'{path} is not a version {JOURNAL_VERSION} order journal')
+
+
+def read_journal(path: Union[str, Path], include_backups: bool = False) -> numpy.ndarray:
+    """Read a journal as a structured array with the JOURNAL_DTYPE fields.
+
+    :param path: Path of the active journal file.
+    :param include_backups: Prepend the rotated files (oldest first). The result is then a copy instead of a
+    read-only memory map of the file.
+    :return: numpy structured array in write order.
+    """
+    path = Path(path)
+    paths = [path]
+    if include_backups:
+        i = 1
+        while Path(f'{path}.{i}').exists():
+            paths.insert(0, Path(f'{path}.{i}'))
+            i += 1
+    arrays = []
+    for p in paths:
+        _check_header(p)
+        count = (p.stat().st_size - HEADER_SIZE) // _RECORD.size
+        if count:
+            arrays.append(numpy.memmap(p, dtype=JOURNAL_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,)))
+    if not arrays:
+        return numpy.empty(0, dtype=JOURNAL_DTYPE)
+    return arrays[0] if len(arrays) == 1 else numpy.concatenate(arrays)
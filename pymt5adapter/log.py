@@ -1,8 +1,13 @@
+import atexit
 import logging
+import logging.handlers
+import queue
+import threading
 import time
 from pathlib import Path
 
 from . import core
+from .helpers import LogJson
 from .types import *
 
 
@@ -19,16 +24,171 @@ _loglevel_map = {
 }
 
 
+_STOP = object()
+
+
+class QueueFileHandler(logging.handlers.QueueHandler):
+    """Hands log records to a background writer thread which formats them and writes them to the wrapped file
+    handler in batches, flushing once per batch. The calling thread only pays for putting the record into a
+    bounded queue.
+
+    Records are not formatted on the calling thread, so objects referenced by a record must not be mutated after
+    they are logged. The writer is started on the first record and stopped (after draining the queue) by ``stop``;
+    records logged while it stops are written by ``stop`` and logging again restarts it.
+    """
+
+    def __init__(self, handler: logging.FileHandler,
+                 max_queue_size: int = 10_000,
+                 drop_when_full: bool = False,
+                 batch_size: int = 512,
+                 ):
+        """
+
+        :param handler: The logging.FileHandler that formats and writes the records.
+        :param max_queue_size: Maximum number of records waiting to be written.
+        :param drop_when_full: Drop records when the queue is full instead of blocking the logging thread. The
+        number of dropped records is kept in ``dropped`` and reported in the log by the writer.
+        :param batch_size: Maximum number of records written per flush.
+        """
+        if not isinstance(handler, logging.FileHandler):
+            raise TypeError(f'QueueFileHandler wraps a logging.FileHandler, not {type(handler).__name__}')
+        super().__init__(queue.Queue(max_queue_size))
+        self.handler = handler
+        self.drop_when_full = drop_when_full
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # formatting (and the json.dumps of LogJson messages) is deferred to the writer thread
+        return record
+
+    def enqueue(self, record) -> None:
+        if self._writer is None:
+            self.start()
+        if not self.drop_when_full:
+            self.queue.put(record)
+        else:
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+        # the writer may have been stopped after the check above: stop() drains what was queued before it
+        # cleared the writer, a new writer takes everything queued after
+        if self._writer is None:
+            self.start()
+
+    def start(self) -> None:
+        """Start the writer thread if it is not running."""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_batches, name='pymt5adapter-log-writer',
+                                                daemon=True)
+                self._writer.start()
+
+    def stop(self) -> None:
+        """Write all queued records and stop the writer thread."""
+        with self._writer_lock:
+            if self._writer is None:
+                return
+            self.queue.put(_STOP)
+            self._writer.join()
+            self._writer = None
+            # records queued by threads that saw the writer still running
+            while not self.queue.empty():
+                self._write_batch([])
+
+    def flush(self) -> None:
+        """Block until every record queued so far has been written."""
+        if self._writer is not None:
+            self.queue.join()
+
+    def close(self) -> None:
+        self.stop()
+        self.handler.close()
+        super().close()
+
+    def _write_batches(self):
+        get = self.queue.get
+        while not self._write_batch([get()]):
+            pass
+
+    def _write_batch(self, records) -> bool:
+        """Write ``records`` together with the queued records, up to batch_size.
+
+        :return: True when the batch contained the stop sentinel.
+        """
+        q = self.queue
+        while len(records) < self.batch_size:
+            try:
+                records.append(q.get_nowait())
+            except queue.Empty:
+                break
+        taken = len(records)
+        if self.dropped != self._reported_dropped:
+            records.append(self._dropped_record())
+        self._write(records)
+        for _ in range(taken):
+            q.task_done()
+        return any(record is _STOP for record in records)
+
+    def _dropped_record(self):
+        dropped, self._reported_dropped = self.dropped - self._reported_dropped, self.dropped
+        return logging.makeLogRecord(dict(
+            name='pymt5adapter', levelno=logging.WARNING, levelname='WARNING',
+            msg=LogJson('Log Records Dropped', {'type': 'log_records_dropped', 'count': dropped}),
+        ))
+
+    def _write(self, records):
+        handler = self.handler
+        handler.acquire()
+        try:
+            if handler.stream is None:
+                handler.stream = handler._open()
+            write = handler.stream.write
+            for record in records:
+                if record is _STOP or record.levelno < handler.level:
+                    continue
+                try:
+                    if handler.filter(record):
+                        write(handler.format(record) + handler.terminator)
+                except Exception:
+                    handler.handleError(record)
+            handler.flush()
+        finally:
+            handler.release()
+
+
+@core._context_manager_modified(participation=False, advanced_features=False)
+def stop_queued_logging(logger: logging.Logger) -> None:
+    """Write the pending records of and stop all QueueFileHandler writer threads attached to the logger.
+
+    :param logger: A logger returned by get_logger. Any other logger is ignored.
+    """
+    for handler in getattr(logger, 'handlers', ()):
+        if isinstance(handler, QueueFileHandler):
+            handler.stop()
+
+
 @core._context_manager_modified(participation=False, advanced_features=False)
 def get_logger(path_to_logfile: Union[Path, str],
                loglevel: int,
-               time_utc: bool = True
+               time_utc: bool = True,
+               queued: bool = False,
+               max_queue_size: int = 10_000,
+               drop_when_full: bool = False,
                ) -> logging.Logger:
     """Get the default logging.Logger instance for pymy5adapter
 
     :param path_to_logfile: Path to the logfile destination. This can be a string path or a pathlib.Path object
     :param loglevel: This takes the logging loglevel. Same as the parameter from the logging module, eg. logging.INFO
     :param time_utc: When True this will output the log lines in UTC time and Local time when False
+    :param queued: Format and write the records on a background thread (see QueueFileHandler) so that the
+    logging thread never waits for disk I/O. The connected context manager drains and stops the writer on exit.
+    :param max_queue_size: Maximum number of records waiting to be written when queued.
+    :param drop_when_full: Drop records instead of blocking the logging thread when the queue is full.
     :return:
     """
     try:
@@ -43,6 +203,8 @@ def get_logger(path_to_logfile: Union[Path, str],
         _loglevel_map.get(loglevel, 'GENERIC'),
         ('time_utc' if time_utc else 'time_local'),
     ]
+    if queued:
+        name.append('queued')
     name = '.'.join(name)
     if name in cache:
         return cache[name]
@@ -53,6 +215,9 @@ def get_logger(path_to_logfile: Union[Path, str],
     ch.setLevel(logging.DEBUG)
     Formatter = _UTCFormatter if time_utc else logging.Formatter
     ch.setFormatter(Formatter(FORMAT))
+    if queued:
+        ch = QueueFileHandler(ch, max_queue_size=max_queue_size, drop_when_full=drop_when_full)
+        atexit.register(ch.stop)
     logger.addHandler(ch)
     cache[name] = logger
     return logger
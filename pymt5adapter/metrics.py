@@ -0,0 +1,94 @@
+"""Opt-in latency histograms for the wrapped API functions.
+
+Every function exposed through ``core.get_function_dispatch()`` owns a :class:`LatencyHistogram`, which records
+calls while ``collect_metrics`` is set on the API state (it is off by default). Latencies are recorded in
+nanoseconds into fixed, log2-bucketed count arrays (bucket ``i`` holds latencies whose ``int.bit_length()`` is
+``i``) so recording a call is a single list increment and the memory used never grows. Calls that returned None are
+counted in a separate array.
+
+Example:
+    >>> with connected(collect_metrics=True) as conn:
+    >>>     symbol_info_tick('EURUSD')
+    >>>     print(conn.latency_stats()['symbol_info_tick'])
+"""
+from typing import Dict
+
+NUM_BUCKETS = 64
+
+
+class LatencyHistogram:
+    """Log2-bucketed latency and call-count histogram of a single function.
+
+    The arrays are updated in place by the wrapped function call paths and must never be rebound.
+    """
+    __slots__ = ('name', 'counts', 'none_counts', 'max_ns')
+
+    def __init__(self, name: str):
+        """
+
+        :param name: Name of the function the histogram belongs to.
+        """
+        self.name = name
+        self.counts = [0] * NUM_BUCKETS
+        self.none_counts = [0] * NUM_BUCKETS
+        self.max_ns = 0
+
+    def record(self, elapsed_ns: int, returned_none: bool = False) -> None:
+        """Record one call. The wrapped functions inline this for speed.
+
+        :param elapsed_ns: Latency of the call in nanoseconds.
+        :param returned_none: The call returned None.
+        """
+        (self.none_counts if returned_none else self.counts)[elapsed_ns.bit_length()] += 1
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def reset(self) -> None:
+        """Zero all counts in place."""
+        self.counts[:] = self.none_counts[:] = [0] * NUM_BUCKETS
+        self.max_ns = 0
+
+    @property
+    def calls(self) -> int:
+        """Number of calls recorded, including the ones that returned None."""
+        return sum(self.counts) + sum(self.none_counts)
+
+    @property
+    def none_calls(self) -> int:
+        """Number of calls that returned None."""
+        return sum(self.none_counts)
+
+    def percentile(self, q: float) -> int:
+        """Latency (ns) at or below which ``q`` percent of all calls completed. The result is the upper edge of
+        the bucket holding the percentile, capped at the max observed latency, so it overstates by less than 2x.
+
+        :param q: Percentile in the range 0-100.
+        :return: Latency in nanoseconds or 0 if nothing was recorded.
+        """
+        counts = [a + b for a, b in zip(self.counts, self.none_counts)]
+        total = sum(counts)
+        if not total:
+            return 0
+        rank = max(1, -(-total * q // 100))
+        seen = 0
+        for bucket, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                return min((1 << bucket) - 1, self.max_ns)
+        return self.max_ns
+
+    def stats(self) -> Dict[str, float]:
+        """Summary of the histogram.
+
+        :return: dict with calls, none_calls, p50_ms, p99_ms and max_ms.
+        """
+        return dict(
+            calls=self.calls,
+            none_calls=self.none_calls,
+            p50_ms=self.percentile(50) / 1e6,
+            p99_ms=self.percentile(99) / 1e6,
+            max_ms=self.max_ns / 1e6,
+        )
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.name!r}, calls={self.calls}, max_ns={self.max_ns})'
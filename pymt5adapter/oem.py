@@ -1,4 +1,4 @@
-import MetaTrader5 as _mt5
+from .backend import mt5 as _mt5
 
 from . import core
 from .types import *
@@ -0,0 +1,115 @@
+"""Rate limiting and sampling of repeated log records.
+
+When a symbol goes dead, polling functions fail on every call and each failure would log a ``function_debugging``
+warning. A :class:`LogRateLimiter` lets the first ``burst`` records of each key (the function name and error code)
+through per ``interval``. After that only every ``sample_every``-th record is let through, and the rest are counted.
+The counts are reported as summary records once a key's interval has elapsed: every ``check`` (of any key) collects
+the summaries of all elapsed windows, and ``flush`` collects the rest.
+"""
+import logging
+import math
+import threading
+import time
+
+from .helpers import LogJson
+from .types import *
+
+_NO_SUMMARIES = ()
+
+
+class LogRateLimiter:
+    """Per-key fixed window rate limiter with sampling. Thread safe."""
+
+    def __init__(self, burst: Optional[int] = 10, interval: float = 60.0, sample_every: int = 1000):
+        """
+
+        :param burst: Records let through per key and interval. None disables limiting.
+        :param interval: Window length in seconds.
+        :param sample_every: Let every n-th record beyond the burst through. 0 suppresses all of them.
+        """
+        self.burst = burst
+        self.interval = interval
+        self.sample_every = sample_every
+        self._windows = {}
+        # when the earliest window with suppressed records ends
+        self._due = math.inf
+        self._lock = threading.Lock()
+
+    def check(self, key: tuple) -> Tuple[bool, Iterable[dict]]:
+        """Register a record for the key.
+
+        :param key: (function name, error code) of the record.
+        :return: (emit, summaries) where emit tells if the record should be logged and summaries are dicts
+        reporting the records suppressed in the windows (of any key) that have ended since the last check.
+        """
+        if self.burst is None:
+            return True, _NO_SUMMARIES
+        now = time.monotonic()
+        summaries = _NO_SUMMARIES
+        with self._lock:
+            if now >= self._due:
+                summaries = self._collect(now)
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                # [start, emitted, over burst, suppressed]
+                window = self._windows[key] = [now, 0, 0, 0]
+            if window[1] < self.burst:
+                window[1] += 1
+                return True, summaries
+            window[2] += 1
+            if self.sample_every and window[2] % self.sample_every == 0:
+                window[1] += 1
+                return True, summaries
+            if not window[3]:
+                self._due = min(self._due, window[0] + self.interval)
+            window[3] += 1
+            return False, summaries
+
+    def flush(self) -> list:
+        """Collect and reset the summaries of all keys with suppressed records.
+
+        :return: List of summary dicts.
+        """
+        now = time.monotonic()
+        with self._lock:
+            summaries = [self._summary(key, window, now) for key, window in self._windows.items() if window[3]]
+            self._windows.clear()
+            self._due = math.inf
+        return summaries
+
+    def _collect(self, now):
+        # summaries of the ended windows; the windows are dropped so that the keys start over
+        interval = self.interval
+        summaries = []
+        due = math.inf
+        for key, window in list(self._windows.items()):
+            if now - window[0] >= interval:
+                if window[3]:
+                    summaries.append(self._summary(key, window, now))
+                del self._windows[key]
+            elif window[3]:
+                due = min(due, window[0] + interval)
+        self._due = due
+        return summaries
+
+    @staticmethod
+    def _summary(key, window, now):
+        function, error_code = key
+        return {
+            'function'  : function,
+            'error_code': error_code,
+            'emitted'   : window[1],
+            'suppressed': window[3],
+            'window_s'  : round(now - window[0], 3),
+        }
+
+
+def log_suppressed(logger: logging.Logger, summary: dict) -> None:
+    """Log a summary returned by LogRateLimiter.check or LogRateLimiter.flush as a function_debugging_suppressed
+    warning.
+
+    :param logger: The logger of the API state.
+    :param summary: Summary dict of one key.
+    """
+    logger.warning(LogJson(f"Function Debugging Suppressed: {summary['function']}",
+                           dict(type='function_debugging_suppressed', **summary)))
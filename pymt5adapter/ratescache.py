@@ -0,0 +1,140 @@
+"""In-memory LRU cache of ``copy_rates_from_pos`` results.
+
+Strategies often request the same window of recent bars (``copy_rates_from_pos(symbol, timeframe, 0, count)``) on
+every tick, from several components at once. With a cache set, each call first requests only the forming bar 0 from
+the terminal and compares it with the cached window:
+
+- Same bar 0: the cached window is returned. For windows that end at bar 0, its last record is replaced by the
+  fresh bar 0 when that changed.
+- A new bar opened: windows that end at bar 0 are shifted. Only the bars opened since the cached bar 0 are requested
+  (their number is bounded using ``PERIOD_SECONDS``) and appended to the closed bars of the cached window. Other
+  windows are requested again.
+
+Cached windows are shared by every caller and are returned read-only. The cache holds at most ``max_bytes`` of bars
+and drops the least recently used windows beyond that.
+
+Example:
+    >>> with connected(rates_cache=RatesCache(max_bytes=16 * 2 ** 20)) as conn:
+    >>>     rates = copy_rates_from_pos('EURUSD', TIMEFRAME.M5, 0, 500)
+    >>>     conn.rates_cache.info()
+    RatesCacheInfo(hits=0, misses=1, updates=0, entries=1, nbytes=30000)
+"""
+import threading
+from collections import OrderedDict
+
+import numpy
+
+from . import const as _const
+from .types import *
+
+
+class RatesCache:
+    """LRU cache of bar windows keyed by (symbol, timeframe, start_pos, count). Thread safe."""
+
+    def __init__(self, max_bytes: int = 64 * 2 ** 20):
+        """
+
+        :param max_bytes: Most bytes of bars held. Windows larger than this are never cached.
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (open time of bar 0 when fetched, read-only rates)
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._updates = 0
+        self._lock = threading.Lock()
+
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int,
+                            fetch: Callable) -> Optional[numpy.ndarray]:
+        """Get bars like copy_rates_from_pos, from the cache when bar 0 tells that they are still current.
+
+        :param symbol: Symbol name.
+        :param timeframe: TIMEFRAME value.
+        :param start_pos: Index of the newest bar, 0 for the forming bar.
+        :param count: Number of bars.
+        :param fetch: fetch(symbol, timeframe, start_pos, count) requesting bars from the terminal.
+        :return: Read-only rates array, or the result of fetch when it failed.
+        """
+        probe = fetch(symbol, timeframe, 0, 1)
+        if probe is None or not len(probe):
+            return fetch(symbol, timeframe, start_pos, count)
+        bar0 = probe[-1]
+        bar0_time = int(bar0['time'])
+        key = (symbol, timeframe, start_pos, count)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+        rates = None
+        if cached is not None:
+            cached_bar0_time, rates = cached
+            if cached_bar0_time == bar0_time:
+                if start_pos != 0 or not len(rates) or rates[-1] == bar0:
+                    with self._lock:
+                        self._hits += 1
+                    return rates
+                rates = rates.copy()
+                rates[-1] = bar0
+            elif start_pos == 0:
+                rates = self._shift(symbol, timeframe, count, rates, cached_bar0_time, bar0_time, fetch)
+            else:
+                rates = None
+        if rates is None:
+            rates = fetch(symbol, timeframe, start_pos, count)
+            if rates is None:
+                return None
+            if start_pos == 0 and len(rates):
+                bar0_time = int(rates['time'][-1])  # a bar may have opened since the probe
+            hit = False
+        else:
+            hit = True
+        rates.flags.writeable = False
+        self._store(key, bar0_time, rates, hit)
+        return rates
+
+    @staticmethod
+    def _shift(symbol, timeframe, count, rates, cached_bar0_time, bar0_time, fetch):
+        # the bars opened since the cached bar 0 (which has closed since) number at most one per minimal period;
+        # months are at least 28 days
+        min_period = 28 * 86400 if timeframe == _const.TIMEFRAME_MN1 else _const.PERIOD_SECONDS[timeframe]
+        tail_count = (bar0_time - cached_bar0_time) // min_period + 1
+        if not len(rates) or tail_count >= count:
+            return None
+        tail = fetch(symbol, timeframe, 0, tail_count)
+        if tail is None or not len(tail) or tail['time'][0] > cached_bar0_time:
+            return None
+        closed = rates[:numpy.searchsorted(rates['time'], tail['time'][0])]
+        return numpy.concatenate((closed, tail))[-count:]
+
+    def _store(self, key, bar0_time, rates, hit):
+        with self._lock:
+            if hit:
+                self._hits += 1
+                self._updates += 1
+            else:
+                self._misses += 1
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old[1].nbytes
+            if rates.nbytes > self.max_bytes:
+                return
+            self._entries[key] = (bar0_time, rates)
+            self._nbytes += rates.nbytes
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+
+    def info(self) -> RatesCacheInfo:
+        """Get the cache statistics.
+
+        :return: RatesCacheInfo with the hits (calls answered without requesting the whole window), the misses,
+        the updates (hits that refreshed bar 0 or shifted the window), and the number and bytes of cached windows.
+        """
+        with self._lock:
+            return RatesCacheInfo(self._hits, self._misses, self._updates, len(self._entries), self._nbytes)
+
+    def clear(self) -> None:
+        """Drop all cached windows and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = self._hits = self._misses = self._updates = 0
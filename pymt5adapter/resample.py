@@ -0,0 +1,175 @@
+"""Build bars of higher timeframes from lower timeframe bars or from ticks, vectorized with NumPy.
+
+Bar alignment follows the terminal. Bar open times are taken from the times as given, which the terminal reports
+in server time labeled as UTC, so a D1 bar opens at the server's midnight:
+
+- Timeframes up to D1 open at multiples of their ``PERIOD_SECONDS`` since 1970.01.01 00:00. For example, H4 bars
+  open at 00:00, 04:00, 08:00, and so on.
+- W1 bars open on Sunday at 00:00.
+- MN1 bars open on the first day of the month at 00:00.
+
+Only periods that contain data produce a bar, so there are no bars for weekends or holidays.
+
+Example:
+    >>> m1 = copy_rates_range('EURUSD', TIMEFRAME.M1, datetime(2020, 1, 1), datetime(2021, 1, 1))
+    >>> h4 = resample_rates(m1, TIMEFRAME.H4)
+    >>> by_timeframe = resample_rates_many(m1, [TIMEFRAME.H1, TIMEFRAME.H4, TIMEFRAME.D1])
+    >>> m1_from_ticks = resample_ticks(copy_ticks_range('EURUSD', start, end, COPY_TICKS_ALL), TIMEFRAME.M1,
+    >>>                                point=symbol_info('EURUSD').point)
+"""
+from typing import Dict
+from typing import Iterable
+
+import numpy
+
+from . import const as _const
+
+RATES_DTYPE = numpy.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+
+_WEEK_OFFSET = 3 * 86400  # 1970.01.04 was the first Sunday after the epoch
+
+
+def bar_open_time(seconds, timeframe):
+    """Open time of the bar of ``timeframe`` that contains each of ``seconds``.
+
+    :param seconds: Scalar or array of UTC seconds.
+    :param timeframe: TIMEFRAME value.
+    :return: int64 array of bar open times.
+    """
+    t = numpy.asarray(seconds, dtype=numpy.int64)
+    if timeframe == _const.TIMEFRAME_MN1:
+        months = t.astype('datetime64[s]').astype('datetime64[M]')
+        return months.astype('datetime64[s]').astype(numpy.int64)
+    if timeframe == _const.TIMEFRAME_W1:
+        return (t - _WEEK_OFFSET) // 604800 * 604800 + _WEEK_OFFSET
+    period = _const.PERIOD_SECONDS[timeframe]
+    return t // period * period
+
+
+def _sorted_bar_open_time(seconds, timeframe):
+    """bar_open_time for sorted times, with the slow calendar math of MN1 done once per day instead of per value."""
+    t = numpy.ascontiguousarray(seconds, dtype=numpy.int64)
+    if timeframe != _const.TIMEFRAME_MN1 or not len(t):
+        return bar_open_time(t, timeframe)
+    days = t // 86400
+    starts = _group_starts(days)
+    months = bar_open_time(days[starts] * 86400, timeframe)
+    return numpy.repeat(months, numpy.diff(numpy.r_[starts, len(t)]))
+
+
+def _group_starts(keys):
+    """Index of the first element of each run of equal keys."""
+    if not len(keys):
+        return numpy.empty(0, dtype=numpy.intp)
+    return numpy.flatnonzero(numpy.r_[True, keys[1:] != keys[:-1]])
+
+
+def _columns(rates):
+    # reduceat on a field of a structured array is strided and several times slower than on a contiguous copy;
+    # open and close are only indexed at the bar bounds and stay views
+    return {name: rates[name] if name in ('open', 'close') else numpy.ascontiguousarray(rates[name])
+            for name in RATES_DTYPE.names}
+
+
+def _to_rates(columns):
+    out = numpy.empty(len(columns['time']), dtype=RATES_DTYPE)
+    for name in RATES_DTYPE.names:
+        out[name] = columns[name]
+    return out
+
+
+def _resample_columns(columns, timeframe):
+    keys = _sorted_bar_open_time(columns['time'], timeframe)
+    starts = _group_starts(keys)
+    if not len(starts):
+        return {name: column[:0] for name, column in columns.items()}
+    ends = numpy.r_[starts[1:], len(keys)] - 1
+    return {
+        'time'       : keys[starts],
+        'open'       : columns['open'][starts],
+        'high'       : numpy.maximum.reduceat(columns['high'], starts),
+        'low'        : numpy.minimum.reduceat(columns['low'], starts),
+        'close'      : columns['close'][ends],
+        'tick_volume': numpy.add.reduceat(columns['tick_volume'], starts),
+        'spread'     : numpy.minimum.reduceat(columns['spread'], starts),
+        'real_volume': numpy.add.reduceat(columns['real_volume'], starts),
+    }
+
+
+def _divides(source, target):
+    """Whether bars of the source timeframe never straddle a bar of the target timeframe."""
+    if source in (_const.TIMEFRAME_W1, _const.TIMEFRAME_MN1):
+        return False
+    if target in (_const.TIMEFRAME_W1, _const.TIMEFRAME_MN1):
+        return 86400 % _const.PERIOD_SECONDS[source] == 0
+    return _const.PERIOD_SECONDS[target] % _const.PERIOD_SECONDS[source] == 0
+
+
+def resample_rates(rates: numpy.ndarray, timeframe: int) -> numpy.ndarray:
+    """Aggregate bars into bars of a higher timeframe.
+
+    :param rates: Bars sorted by time, as returned by the copy_rates_* functions, of a lower timeframe that divides
+    ``timeframe`` (M1 works for every timeframe).
+    :param timeframe: TIMEFRAME value of the result.
+    :return: Bars in the rates dtype: first open, highest high, lowest low, last close, summed tick_volume and
+    real_volume, and the minimal spread, which is the spread the terminal reports for a bar.
+    """
+    return _to_rates(_resample_columns(_columns(rates), timeframe))
+
+
+def resample_rates_many(rates: numpy.ndarray, timeframes: Iterable[int]) -> Dict[int, numpy.ndarray]:
+    """Aggregate bars into several higher timeframes at once, like resample_rates for each of them.
+
+    The timeframes are built in ascending order, each from the highest timeframe already built that divides it
+    (H4 from H1, D1 from H4, ...), so only the first one reads the input bars.
+
+    :param rates: Bars sorted by time of a lower timeframe that divides every one of ``timeframes``.
+    :param timeframes: TIMEFRAME values of the results.
+    :return: dict of TIMEFRAME value -> bars in the rates dtype.
+    """
+    built = [(None, _columns(rates))]
+    results = {}
+    for timeframe in sorted(set(timeframes), key=_const.PERIOD_SECONDS.__getitem__):
+        source = next(columns for tf, columns in reversed(built) if tf is None or _divides(tf, timeframe))
+        columns = _resample_columns(source, timeframe)
+        built.append((timeframe, columns))
+        results[timeframe] = _to_rates(columns)
+    return results
+
+
+def resample_ticks(ticks: numpy.ndarray, timeframe: int, *, price: str = 'bid', point: float = None) -> numpy.ndarray:
+    """Build bars from ticks.
+
+    :param ticks: Ticks sorted by time_msc, as returned by the copy_ticks_* functions.
+    :param timeframe: TIMEFRAME value of the result.
+    :param price: Tick field the OHLC prices are built from: 'bid' (forex and CFD charts) or 'last' (exchange
+    symbols). Ticks where it is 0 are skipped.
+    :param point: Symbol point size used to express the spread in points. Without it the spread is 0.
+    :return: Bars in the rates dtype. tick_volume counts the ticks of the bar, real_volume sums their volume and
+    spread is the minimal ask - bid of the bar in points.
+    """
+    prices = numpy.ascontiguousarray(ticks[price])
+    if not prices.all():
+        ticks = ticks[prices != 0]
+        prices = numpy.ascontiguousarray(ticks[price])
+    keys = _sorted_bar_open_time(ticks['time_msc'] // 1000, timeframe)
+    starts = _group_starts(keys)
+    out = numpy.empty(len(starts), dtype=RATES_DTYPE)
+    if not len(starts):
+        return out
+    ends = numpy.r_[starts[1:], len(keys)] - 1
+    out['time'] = keys[starts]
+    out['open'] = prices[starts]
+    out['high'] = numpy.maximum.reduceat(prices, starts)
+    out['low'] = numpy.minimum.reduceat(prices, starts)
+    out['close'] = prices[ends]
+    out['tick_volume'] = numpy.diff(numpy.r_[starts, len(keys)])
+    if point:
+        out['spread'] = numpy.rint(numpy.minimum.reduceat(ticks['ask'] - ticks['bid'], starts) / point)
+    else:
+        out['spread'] = 0
+    out['real_volume'] = numpy.add.reduceat(numpy.ascontiguousarray(ticks['volume']), starts)
+    return out
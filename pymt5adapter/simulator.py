@@ -0,0 +1,938 @@
+"""Deterministic in-process stand-in for the ``MetaTrader5`` package.
+
+The simulator implements the same function surface as ``MetaTrader5`` (terminal/account info, symbols, rates,
+ticks, positions, orders, deals, ``order_send``/``order_check`` and ``last_error``) on top of seeded synthetic
+data, so the adapter can be exercised and benchmarked on machines without a terminal. It is selected with the
+``PYMT5ADAPTER_BACKEND=simulator`` environment variable (see :mod:`pymt5adapter.backend`).
+
+Data conventions:
+    - All times are UTC seconds since 1970.01.01. Naive ``datetime`` arguments are interpreted as UTC.
+    - Markets are closed from Saturday 00:00 until Monday 00:00 and no bars or ticks exist in that window.
+    - Prices are a pure function of (seed, symbol, time), so every call returns identical data for the same
+      arguments and clock. Bars of higher timeframes are aggregated from the M1 bars. W1 bars open on Sunday
+      and MN1 bars on the first day of the calendar month.
+    - The clock follows the wall clock unless it is frozen with :func:`set_time`.
+    - Market orders are filled immediately at the current bid/ask. Pending orders are stored but never triggered.
+"""
+import calendar
+import fnmatch
+import math
+import threading
+import time
+import zlib
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict
+from typing import Union
+
+import numpy
+
+from . import const as _const
+from .resample import bar_open_time
+from .resample import resample_rates
+
+IS_SIMULATOR = True
+
+__version__ = '5.0.33'
+__author__ = 'MetaQuotes Software Corp. (pymt5adapter simulator)'
+
+Tick = namedtuple('Tick', 'time bid ask last volume time_msc flags volume_real')
+AccountInfo = namedtuple('AccountInfo', (
+    'login trade_mode leverage limit_orders margin_so_mode trade_allowed trade_expert margin_mode currency_digits '
+    'fifo_close balance credit profit equity margin margin_free margin_level margin_so_call margin_so_so '
+    'margin_initial margin_maintenance assets liabilities commission_blocked name server currency company'
+))
+TerminalInfo = namedtuple('TerminalInfo', (
+    'community_account community_connection connected dlls_allowed trade_allowed tradeapi_disabled email_enabled '
+    'ftp_enabled notifications_enabled mqid build maxbars codepage ping_last community_balance retransmission '
+    'company name language path data_path commondata_path'
+))
+SymbolInfo = namedtuple('SymbolInfo', (
+    'custom chart_mode select visible session_deals session_buy_orders session_sell_orders volume volumehigh '
+    'volumelow time digits spread spread_float ticks_bookdepth trade_calc_mode trade_mode start_time '
+    'expiration_time trade_stops_level trade_freeze_level trade_exemode swap_mode swap_rollover3days '
+    'margin_hedged_use_leg expiration_mode filling_mode order_mode order_gtc_mode option_mode option_right bid '
+    'bidhigh bidlow ask askhigh asklow last lasthigh lastlow volume_real volumehigh_real volumelow_real '
+    'option_strike point trade_tick_value trade_tick_value_profit trade_tick_value_loss trade_tick_size '
+    'trade_contract_size trade_accrued_interest trade_face_value trade_liquidity_rate volume_min volume_max '
+    'volume_step volume_limit swap_long swap_short margin_initial margin_maintenance session_volume '
+    'session_turnover session_interest session_buy_orders_volume session_sell_orders_volume session_open '
+    'session_close session_aw session_price_settlement session_price_limit_min session_price_limit_max '
+    'margin_hedged price_change price_volatility price_theoretical price_greeks_delta price_greeks_theta '
+    'price_greeks_gamma price_greeks_vega price_greeks_rho price_greeks_omega price_sensitivity basis category '
+    'currency_base currency_profit currency_margin bank description exchange formula isin name page path'
+))
+TradeRequest = namedtuple('TradeRequest', (
+    'action magic order symbol volume price stoplimit sl tp deviation type type_filling type_time expiration '
+    'comment position position_by'
+))
+OrderSendResult = namedtuple('OrderSendResult', (
+    'retcode deal order volume price bid ask comment request_id retcode_external request'
+))
+OrderCheckResult = namedtuple('OrderCheckResult', (
+    'retcode balance equity profit margin margin_free margin_level comment request'
+))
+TradeOrder = namedtuple('TradeOrder', (
+    'ticket time_setup time_setup_msc time_done time_done_msc time_expiration type type_time type_filling state '
+    'magic position_id position_by_id reason volume_initial volume_current price_open sl tp price_current '
+    'price_stoplimit symbol comment external_id'
+))
+TradePosition = namedtuple('TradePosition', (
+    'ticket time time_msc time_update time_update_msc type magic identifier reason volume price_open sl tp '
+    'price_current swap profit symbol comment external_id'
+))
+TradeDeal = namedtuple('TradeDeal', (
+    'ticket order time time_msc type entry magic position_id reason volume price commission swap profit fee '
+    'symbol comment external_id'
+))
+
+# The MetaTrader5 record types cannot be pickled (pickle fails to look them up by name); mimic that.
+for _record_type in (Tick, AccountInfo, TerminalInfo, SymbolInfo, TradeRequest, OrderSendResult, OrderCheckResult,
+                     TradeOrder, TradePosition, TradeDeal):
+    _record_type.__module__ = 'builtins'
+del _record_type
+
+RATES_DTYPE = numpy.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+TICKS_DTYPE = numpy.dtype([
+    ('time', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('volume', '<u8'),
+    ('time_msc', '<i8'), ('flags', '<u4'), ('volume_real', '<f8'),
+])
+
+# name: (base price, digits, contract size)
+DEFAULT_SYMBOLS = {
+    'EURUSD': (1.10, 5, 100_000),
+    'GBPUSD': (1.27, 5, 100_000),
+    'USDJPY': (145.0, 3, 100_000),
+    'USDCHF': (0.90, 5, 100_000),
+    'AUDUSD': (0.66, 5, 100_000),
+    'USDCAD': (1.35, 5, 100_000),
+    'NZDUSD': (0.61, 5, 100_000),
+    'EURJPY': (158.0, 3, 100_000),
+    'XAUUSD': (1900.0, 2, 100),
+}
+
+_SUCCESS = (_const.RES_S_OK, 'Success')
+_ERROR_DESCRIPTIONS = {
+    _const.RES_E_FAIL          : 'Terminal: Call failed',
+    _const.RES_E_INVALID_PARAMS: 'Terminal: Invalid params',
+    _const.RES_E_NOT_FOUND     : 'Terminal: Not found',
+    _const.RES_E_INTERNAL_FAIL_CONN: 'No IPC connection',
+}
+_PRICE_WAVES = (  # (relative amplitude, period in seconds)
+    (0.05, 31_770_917),
+    (0.02, 2_531_713),
+    (0.004, 86_400),
+    (0.0012, 3600),
+    (0.0003, 300),
+)
+_U64_MASK = (1 << 64) - 1
+
+
+class _SimError(Exception):
+    def __init__(self, code, description=None):
+        super().__init__(code, description)
+        self.code = code
+        self.description = description or _ERROR_DESCRIPTIONS.get(code, 'Terminal: Call failed')
+
+
+def _mix(x):
+    """splitmix64 finalizer: a cheap, vectorized, stateless hash of uint64 values."""
+    z = numpy.asarray(x).astype(numpy.uint64)
+    with numpy.errstate(over='ignore'):
+        z = z + numpy.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> numpy.uint64(30))) * numpy.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> numpy.uint64(27))) * numpy.uint64(0x94D049BB133111EB)
+        return z ^ (z >> numpy.uint64(31))
+
+
+def _uniform(key, x):
+    return (_mix(numpy.uint64(key) ^ _mix(x)) >> numpy.uint64(11)).astype(numpy.float64) * (2.0 ** -53)
+
+
+def _to_seconds(value) -> float:
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            return value.timestamp()
+        return calendar.timegm(value.timetuple()) + value.microsecond / 1e6
+    if isinstance(value, (int, float, numpy.integer, numpy.floating)) and not isinstance(value, bool):
+        return float(value)
+    raise _SimError(_const.RES_E_INVALID_PARAMS)
+
+
+def _to_count(value) -> int:
+    if isinstance(value, (int, numpy.integer)) and not isinstance(value, bool) and value >= 0:
+        return int(value)
+    raise _SimError(_const.RES_E_INVALID_PARAMS)
+
+
+def _is_trading_time(seconds):
+    weekday = (numpy.asarray(seconds) // 86400 + 3) % 7  # 0 == Monday
+    return weekday < 5
+
+
+def _match_group(name: str, group: str) -> bool:
+    """Apply a terminal style group filter, e.g. ``"*USD*, !EUR*"``."""
+    selected = False
+    for condition in (c.strip() for c in group.split(',')):
+        if not condition:
+            continue
+        if condition.startswith('!'):
+            if fnmatch.fnmatchcase(name, condition[1:]):
+                selected = False
+        elif fnmatch.fnmatchcase(name, condition):
+            selected = True
+    return selected
+
+
+def _bar_close_time(open_time: int, timeframe) -> int:
+    if timeframe == _const.TIMEFRAME_MN1:
+        month = numpy.datetime64(int(open_time), 's').astype('datetime64[M]') + 1
+        return int(month.astype('datetime64[s]').astype(numpy.int64))
+    return int(open_time) + _const.PERIOD_SECONDS[timeframe]
+
+
+class _Symbol:
+    def __init__(self, name, seed, base=None, digits=None, contract_size=None):
+        crc = zlib.crc32(name.encode())
+        if base is None:
+            base, digits, contract_size = DEFAULT_SYMBOLS.get(name, (1.0 + crc % 1000 / 100, 5, 100_000))
+        self.name = name
+        self.base = base
+        self.digits = digits
+        self.point = round(10.0 ** -digits, digits)
+        self.contract_size = contract_size
+        self.key = (crc * 0x100000001B3 ^ seed) & _U64_MASK
+        self.phases = _uniform(self.key, numpy.arange(len(_PRICE_WAVES))) * 2 * math.pi
+        self.spread = 8 + crc % 12
+        self.currency_base = name[:3]
+        self.currency_profit = name[3:6] or 'USD'
+        self.selected = name in DEFAULT_SYMBOLS
+
+    def price(self, seconds):
+        t = numpy.asarray(seconds, dtype=numpy.float64)
+        wave = numpy.zeros_like(t)
+        for (amplitude, period), phase in zip(_PRICE_WAVES, self.phases):
+            wave += amplitude * numpy.sin(t * (2 * math.pi / period) + phase)
+        return self.base * (1.0 + wave)
+
+
+class _Terminal:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.configure_defaults()
+
+    def configure_defaults(self):
+        self.seed = 0
+        self.symbol_specs = dict(DEFAULT_SYMBOLS)
+        self.maxbars = 100_000
+        self.history_start = calendar.timegm((2015, 1, 1, 0, 0, 0))
+        self.call_latency = 0.0
+        self.account_trade_mode = _const.ACCOUNT_TRADE_MODE_DEMO
+        self.trade_allowed = True
+        self.initial_balance = 10_000.0
+        self.frozen_time = None
+        self.time_offset = 0.0
+        self.reset()
+
+    def reset(self):
+        self.symbols = {name: _Symbol(name, self.seed, *spec) for name, spec in self.symbol_specs.items()}
+        self.initialized = False
+        self.last_error = _SUCCESS
+        self.login = 10_000_001
+        self.balance = self.initial_balance
+        self.ticket_counter = 100_000
+        self.request_counter = 0
+        self.tick_cache = {}
+        self.positions = {}
+        self.orders = {}
+        self.history_orders = []
+        self.deals = []
+
+    # clock -------------------------------------------------------------------------------------------------------
+    def now(self) -> float:
+        if self.frozen_time is not None:
+            return self.frozen_time
+        return time.time() + self.time_offset
+
+    def last_trading_second(self, seconds: int) -> int:
+        day, weekday = seconds // 86400, (seconds // 86400 + 3) % 7
+        if weekday >= 5:
+            return (day - (weekday - 4)) * 86400 + 86399
+        return seconds
+
+    # market data -------------------------------------------------------------------------------------------------
+    def symbol(self, name) -> _Symbol:
+        try:
+            return self.symbols[name]
+        except (KeyError, TypeError):
+            raise _SimError(_const.RES_E_FAIL)
+
+    def m1_bars(self, sym: _Symbol, minute_from: int, minute_to: int) -> numpy.ndarray:
+        """M1 bars for the epoch minutes [minute_from, minute_to)."""
+        now = self.now()
+        minute_from = max(minute_from, self.history_start // 60)
+        minute_to = min(minute_to, int(now // 60) + 1)
+        minutes = numpy.arange(minute_from, max(minute_from, minute_to), dtype=numpy.int64)
+        t = minutes * 60
+        t = t[_is_trading_time(t)]
+        if not len(t):
+            return numpy.empty(0, dtype=RATES_DTYPE)
+        m = (t // 60).astype(numpy.uint64)
+        o = sym.price(t)
+        c = sym.price(numpy.minimum(t + 60, now))
+        wiggle = sym.point * (2.0 + 8.0 * _uniform(sym.key, m * numpy.uint64(4)))
+        bars = numpy.empty(len(t), dtype=RATES_DTYPE)
+        bars['time'] = t
+        bars['open'] = numpy.round(o, sym.digits)
+        bars['close'] = numpy.round(c, sym.digits)
+        bars['high'] = numpy.round(numpy.maximum(o, c) + wiggle * _uniform(sym.key, m * numpy.uint64(4) + 1),
+                                   sym.digits)
+        bars['low'] = numpy.round(numpy.minimum(o, c) - wiggle * _uniform(sym.key, m * numpy.uint64(4) + 2),
+                                  sym.digits)
+        bars['tick_volume'] = 10 + _mix(sym.key ^ (m * numpy.uint64(4) + 3)) % numpy.uint64(60)
+        bars['spread'] = sym.spread + (_mix(sym.key ^ m) % numpy.uint64(3)).astype(numpy.int32)
+        bars['real_volume'] = 0
+        return bars
+
+    def rates_between(self, sym: _Symbol, timeframe, time_from: float, time_to: float) -> numpy.ndarray:
+        """Bars with an open time within [time_from, time_to]."""
+        if timeframe not in _const.PERIOD_SECONDS:
+            raise _SimError(_const.RES_E_INVALID_PARAMS)
+        time_to = min(time_to, self.now())
+        if time_to < time_from:
+            return numpy.empty(0, dtype=RATES_DTYPE)
+        first_open = int(bar_open_time(int(time_from), timeframe))
+        last_close = _bar_close_time(int(bar_open_time(int(time_to), timeframe)), timeframe)
+        m1 = self.m1_bars(sym, first_open // 60, last_close // 60)
+        bars = m1 if timeframe == _const.TIMEFRAME_M1 else resample_rates(m1, timeframe)
+        mask = (bars['time'] >= time_from) & (bars['time'] <= time_to)
+        return bars[mask]
+
+    def rates_back(self, sym: _Symbol, timeframe, time_to: float, count: int, skip: int = 0) -> numpy.ndarray:
+        """The ``count`` bars preceding the ``skip`` most recent bars that opened at or before ``time_to``."""
+        if timeframe not in _const.PERIOD_SECONDS:
+            raise _SimError(_const.RES_E_INVALID_PARAMS)
+        if count >= self.maxbars:
+            raise _SimError(_const.RES_E_INVALID_PARAMS)
+        needed = count + skip
+        span = needed * _const.PERIOD_SECONDS[timeframe] * 1.5 + 4 * 86400
+        while True:
+            time_from = time_to - span
+            bars = self.rates_between(sym, timeframe, time_from, time_to)
+            if len(bars) >= needed or time_from <= self.history_start:
+                break
+            span *= 2
+        bars = bars[max(0, len(bars) - needed):len(bars) - skip]
+        return bars.copy()
+
+    def ticks_between(self, sym: _Symbol, msc_from: int, msc_to: int) -> numpy.ndarray:
+        """Ticks with time_msc within [msc_from, msc_to]."""
+        msc_to = min(msc_to, int(self.now() * 1000))
+        sec_from = max(msc_from // 1000, self.history_start)
+        seconds = numpy.arange(sec_from, max(sec_from, msc_to // 1000 + 1), dtype=numpy.int64)
+        seconds = seconds[_is_trading_time(seconds)]
+        s = seconds.astype(numpy.uint64)
+        counts = (_mix(sym.key ^ (s * numpy.uint64(8) + 5)) % numpy.uint64(4)).astype(numpy.int64)
+        total = int(counts.sum())
+        ticks = numpy.zeros(total, dtype=TICKS_DTYPE)
+        if not total:
+            return ticks
+        tick_seconds = numpy.repeat(seconds, counts)
+        tick_counts = numpy.repeat(counts, counts)
+        index_in_second = numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        uid = tick_seconds.astype(numpy.uint64) * numpy.uint64(8) + index_in_second.astype(numpy.uint64)
+        hashed = _mix(sym.key ^ uid)
+        slot = 1000 // tick_counts
+        offset = index_in_second * slot + (hashed % slot.astype(numpy.uint64)).astype(numpy.int64)
+        # a share of ticks arrive within the same millisecond as the previous one
+        same_msc = (index_in_second > 0) & (hashed % numpy.uint64(7) == 0)
+        offset[same_msc] = offset[numpy.flatnonzero(same_msc) - 1]
+        time_msc = tick_seconds * 1000 + offset
+        noise = (_uniform(sym.key, uid + numpy.uint64(1 << 62)) - 0.5) * 3 * sym.point
+        bid = numpy.round(sym.price(time_msc / 1000.0) + noise, sym.digits)
+        spread = sym.spread + (hashed >> numpy.uint64(40)) % numpy.uint64(3)
+        ticks['time'] = tick_seconds
+        ticks['bid'] = bid
+        ticks['ask'] = numpy.round(bid + spread.astype(numpy.float64) * sym.point, sym.digits)
+        ticks['time_msc'] = time_msc
+        ticks['flags'] = _const.TICK_FLAG_BID | _const.TICK_FLAG_ASK
+        return ticks[(time_msc >= msc_from) & (time_msc <= msc_to)]
+
+    def last_tick(self, sym: _Symbol):
+        now = self.now()
+        cached = self.tick_cache.get(sym.name)
+        if cached is not None and cached[0] == now:
+            return cached[1]
+        second = self.last_trading_second(int(now))
+        window = 60
+        while True:
+            ticks = self.ticks_between(sym, (second - window) * 1000, int(self.now() * 1000))
+            if len(ticks) or second - window < self.history_start:
+                break
+            window *= 2
+        if not len(ticks):
+            return None
+        tick = Tick(*(v.item() for v in ticks[-1]))
+        self.tick_cache[sym.name] = (now, tick)
+        return tick
+
+    # trading -----------------------------------------------------------------------------------------------------
+    def next_ticket(self) -> int:
+        self.ticket_counter += 1
+        return self.ticket_counter
+
+    def profit(self, sym: _Symbol, position_type, volume, price_open, price_close) -> float:
+        direction = 1.0 if position_type == _const.POSITION_TYPE_BUY else -1.0
+        profit = direction * (price_close - price_open) * volume * sym.contract_size
+        if sym.currency_profit != 'USD':
+            profit /= price_close
+        return round(profit, 2)
+
+    def position_snapshot(self, p: dict):
+        sym = self.symbols[p['symbol']]
+        tick = self.last_tick(sym)
+        price_current = tick.bid if p['type'] == _const.POSITION_TYPE_BUY else tick.ask
+        profit = self.profit(sym, p['type'], p['volume'], p['price_open'], price_current)
+        return TradePosition(**dict(p, price_current=price_current, profit=profit))
+
+    def order_snapshot(self, o: dict):
+        sym = self.symbols[o['symbol']]
+        tick = self.last_tick(sym)
+        price_current = tick.ask if o['type'] % 2 == 0 else tick.bid
+        return TradeOrder(**dict(o, price_current=price_current))
+
+    def account_figures(self):
+        profit = sum(self.position_snapshot(p).profit for p in self.positions.values())
+        margin = sum(
+            p['volume'] * self.symbols[p['symbol']].contract_size / 100.0 for p in self.positions.values())
+        equity = round(self.balance + profit, 2)
+        margin_level = round(equity / margin * 100, 2) if margin else 0.0
+        return round(profit, 2), equity, round(margin, 2), round(equity - margin, 2), margin_level
+
+
+_terminal = _Terminal()
+
+
+def _api(require_connection=True):
+    def decorator(f):
+        def wrapper(*args, **kwargs):
+            with _terminal.lock:
+                latency = _terminal.call_latency
+                if isinstance(latency, dict):
+                    latency = latency.get(f.__name__, 0.0)
+                if latency:
+                    deadline = time.perf_counter() + latency
+                    while time.perf_counter() < deadline:
+                        pass
+                try:
+                    if require_connection and not _terminal.initialized:
+                        raise _SimError(_const.RES_E_INTERNAL_FAIL_CONN)
+                    result = f(*args, **kwargs)
+                except _SimError as e:
+                    _terminal.last_error = (e.code, e.description)
+                    return None
+                _terminal.last_error = _SUCCESS
+                return result
+
+        wrapper.__name__ = f.__name__
+        wrapper.__qualname__ = f.__qualname__
+        wrapper.__doc__ = f.__doc__
+        return wrapper
+
+    return decorator
+
+
+# SIMULATOR CONTROL ---------------------------------------------------------------------------------------------
+def configure(*, seed: int = None,
+              symbols=None,
+              maxbars: int = None,
+              history_start=None,
+              call_latency: Union[float, Dict[str, float]] = None,
+              account_trade_mode: int = None,
+              trade_allowed: bool = None,
+              balance: float = None,
+              ) -> None:
+    """Change the simulated terminal. Trading state is reset when any argument is passed.
+
+    :param seed: Seed for the synthetic price data.
+    :param symbols: Iterable of symbol names or a dict of name -> (base price, digits, contract size).
+    :param maxbars: Terminal 'Max bars in chart' setting.
+    :param history_start: First available bar/tick as a datetime or UTC seconds.
+    :param call_latency: Simulated IPC round trip in seconds, spent (busy waiting) inside every API call. A dict
+    of function name -> seconds sets the latency per function.
+    :param account_trade_mode: ACCOUNT_TRADE_MODE of the simulated account.
+    :param trade_allowed: Terminal auto-trading switch.
+    :param balance: Initial account balance.
+    """
+    t = _terminal
+    with t.lock:
+        if seed is not None:
+            t.seed = int(seed)
+        if symbols is not None:
+            if isinstance(symbols, dict):
+                t.symbol_specs = dict(symbols)
+            else:
+                t.symbol_specs = {name: DEFAULT_SYMBOLS.get(name, (None, None, None)) for name in symbols}
+        if maxbars is not None:
+            t.maxbars = int(maxbars)
+        if history_start is not None:
+            t.history_start = int(_to_seconds(history_start))
+        if call_latency is not None:
+            t.call_latency = dict(call_latency) if isinstance(call_latency, dict) else float(call_latency)
+        if account_trade_mode is not None:
+            t.account_trade_mode = account_trade_mode
+        if trade_allowed is not None:
+            t.trade_allowed = trade_allowed
+        if balance is not None:
+            t.initial_balance = float(balance)
+        initialized = t.initialized
+        t.reset()
+        t.initialized = initialized
+
+
+def reset() -> None:
+    """Restore the default configuration, clear all trading state and unfreeze the clock."""
+    with _terminal.lock:
+        _terminal.configure_defaults()
+
+
+def set_time(value=None) -> None:
+    """Freeze the simulated clock at ``value`` (datetime or UTC seconds) or follow the wall clock when None."""
+    with _terminal.lock:
+        _terminal.frozen_time = None if value is None else _to_seconds(value)
+
+
+def advance(seconds: float) -> None:
+    """Move the simulated clock forward by ``seconds``."""
+    with _terminal.lock:
+        if _terminal.frozen_time is not None:
+            _terminal.frozen_time += seconds
+        else:
+            _terminal.time_offset += seconds
+
+
+def now() -> float:
+    """Current simulated time in UTC seconds."""
+    return _terminal.now()
+
+
+# TERMINAL ------------------------------------------------------------------------------------------------------
+@_api(require_connection=False)
+def initialize(path=None, *, login=None, password=None, server=None, portable=False, timeout=None, **kwargs):
+    if login is not None:
+        _terminal.login = int(login)
+    _terminal.initialized = True
+    return True
+
+
+@_api()
+def login(login, *, password=None, server=None, timeout=None, **kwargs):
+    _terminal.login = int(login)
+    return True
+
+
+@_api(require_connection=False)
+def shutdown():
+    _terminal.initialized = False
+    return True
+
+
+def last_error():
+    return _terminal.last_error
+
+
+@_api()
+def version():
+    return 500, 2560, '15 Jul 2020'
+
+
+@_api()
+def terminal_info():
+    return TerminalInfo(
+        community_account=False, community_connection=False, connected=True, dlls_allowed=False,
+        trade_allowed=_terminal.trade_allowed, tradeapi_disabled=False, email_enabled=False, ftp_enabled=False,
+        notifications_enabled=False, mqid=False, build=2560, maxbars=_terminal.maxbars, codepage=0,
+        ping_last=1000, community_balance=0.0, retransmission=0.0, company='pymt5adapter',
+        name='MetaTrader 5 Simulator', language='English', path='', data_path='', commondata_path='',
+    )
+
+
+@_api()
+def account_info():
+    profit, equity, margin, margin_free, margin_level = _terminal.account_figures()
+    return AccountInfo(
+        login=_terminal.login, trade_mode=_terminal.account_trade_mode, leverage=100, limit_orders=200,
+        margin_so_mode=0, trade_allowed=True, trade_expert=True, margin_mode=2, currency_digits=2,
+        fifo_close=False, balance=round(_terminal.balance, 2), credit=0.0, profit=profit, equity=equity,
+        margin=margin, margin_free=margin_free, margin_level=margin_level, margin_so_call=50.0,
+        margin_so_so=30.0, margin_initial=0.0, margin_maintenance=0.0, assets=0.0, liabilities=0.0,
+        commission_blocked=0.0, name='Simulated Account', server='Simulator-Demo', currency='USD',
+        company='pymt5adapter',
+    )
+
+
+# SYMBOLS -------------------------------------------------------------------------------------------------------
+_STRING_SYMBOL_FIELDS = {
+    'basis', 'category', 'currency_base', 'currency_profit', 'currency_margin', 'bank', 'description',
+    'exchange', 'formula', 'isin', 'name', 'page', 'path',
+}
+
+
+def _symbol_info(sym: _Symbol):
+    tick = _terminal.last_tick(sym)
+    info = {f: ('' if f in _STRING_SYMBOL_FIELDS else 0) for f in SymbolInfo._fields}
+    info.update(
+        custom=False, select=sym.selected, visible=sym.selected, time=tick.time, digits=sym.digits,
+        spread=int(round((tick.ask - tick.bid) / sym.point)), spread_float=True, trade_mode=4,
+        trade_exemode=2, expiration_mode=15, filling_mode=3, order_mode=127, bid=tick.bid, ask=tick.ask,
+        bidhigh=tick.bid, bidlow=tick.bid, askhigh=tick.ask, asklow=tick.ask, point=sym.point,
+        trade_tick_value=1.0, trade_tick_value_profit=1.0, trade_tick_value_loss=1.0,
+        trade_tick_size=sym.point, trade_contract_size=float(sym.contract_size), volume_min=0.01,
+        volume_max=100.0, volume_step=0.01, margin_hedged=sym.contract_size / 2,
+        currency_base=sym.currency_base, currency_profit=sym.currency_profit, currency_margin=sym.currency_base,
+        description=f'Simulated {sym.name}', name=sym.name, path=f'Simulated\\{sym.name}',
+    )
+    return SymbolInfo(**info)
+
+
+@_api()
+def symbols_total():
+    return len(_terminal.symbols)
+
+
+@_api()
+def symbols_get(group=None):
+    symbols = _terminal.symbols.values()
+    if group:
+        symbols = [s for s in symbols if _match_group(s.name, group)]
+    return tuple(_symbol_info(s) for s in symbols)
+
+
+@_api()
+def symbol_info(symbol):
+    return _symbol_info(_terminal.symbol(symbol))
+
+
+@_api()
+def symbol_info_tick(symbol):
+    return _terminal.last_tick(_terminal.symbol(symbol))
+
+
+@_api()
+def symbol_select(symbol, enable=True):
+    _terminal.symbol(symbol).selected = bool(enable)
+    return True
+
+
+# RATES AND TICKS -----------------------------------------------------------------------------------------------
+@_api()
+def copy_rates_from(symbol, timeframe, date_from, count):
+    sym = _terminal.symbol(symbol)
+    return _terminal.rates_back(sym, timeframe, _to_seconds(date_from), _to_count(count))
+
+
+@_api()
+def copy_rates_from_pos(symbol, timeframe, start_pos, count):
+    sym = _terminal.symbol(symbol)
+    return _terminal.rates_back(sym, timeframe, _terminal.now(), _to_count(count), _to_count(start_pos))
+
+
+@_api()
+def copy_rates_range(symbol, timeframe, date_from, date_to):
+    sym = _terminal.symbol(symbol)
+    bars = _terminal.rates_between(sym, timeframe, _to_seconds(date_from), _to_seconds(date_to))
+    if len(bars) >= _terminal.maxbars:
+        raise _SimError(_const.RES_E_INVALID_PARAMS)
+    return bars
+
+
+def _filter_tick_flags(ticks, flags):
+    if flags == _const.COPY_TICKS_TRADE:
+        return ticks[(ticks['flags'] & (_const.TICK_FLAG_LAST | _const.TICK_FLAG_VOLUME)) != 0]
+    return ticks
+
+
+@_api()
+def copy_ticks_from(symbol, date_from, count, flags):
+    sym = _terminal.symbol(symbol)
+    count = _to_count(count)
+    msc = int(_to_seconds(date_from) * 1000)
+    now_msc = int(_terminal.now() * 1000)
+    chunks, total, window = [], 0, 3_600_000
+    while total < count and msc <= now_msc:
+        ticks = _filter_tick_flags(_terminal.ticks_between(sym, msc, msc + window - 1), flags)
+        chunks.append(ticks[:count - total])
+        total += len(chunks[-1])
+        msc += window
+    return numpy.concatenate(chunks) if chunks else numpy.empty(0, dtype=TICKS_DTYPE)
+
+
+@_api()
+def copy_ticks_range(symbol, date_from, date_to, flags):
+    sym = _terminal.symbol(symbol)
+    msc_from = int(_to_seconds(date_from) * 1000)
+    msc_to = int(_to_seconds(date_to) * 1000)
+    return _filter_tick_flags(_terminal.ticks_between(sym, msc_from, msc_to), flags)
+
+
+# TRADING -------------------------------------------------------------------------------------------------------
+def _trade_request(request: dict):
+    fields = {f: 0 for f in TradeRequest._fields}
+    fields.update(symbol='', comment='', volume=0.0, price=0.0, stoplimit=0.0, sl=0.0, tp=0.0)
+    fields.update((k, v) for k, v in request.items() if k in fields)
+    return TradeRequest(**fields)
+
+
+def _validate_request(request):
+    if not isinstance(request, dict):
+        raise _SimError(_const.RES_E_INVALID_PARAMS)
+    action = request.get('action')
+    if action not in (_const.TRADE_ACTION_DEAL, _const.TRADE_ACTION_PENDING, _const.TRADE_ACTION_SLTP,
+                      _const.TRADE_ACTION_MODIFY, _const.TRADE_ACTION_REMOVE):
+        return _const.TRADE_RETCODE_INVALID
+    if action in (_const.TRADE_ACTION_DEAL, _const.TRADE_ACTION_PENDING):
+        if request.get('symbol') not in _terminal.symbols:
+            return _const.TRADE_RETCODE_INVALID
+        volume = request.get('volume')
+        if not isinstance(volume, float) or volume <= 0.0:
+            return _const.TRADE_RETCODE_INVALID_VOLUME
+    if action == _const.TRADE_ACTION_DEAL:
+        if request.get('type') not in (_const.ORDER_TYPE_BUY, _const.ORDER_TYPE_SELL):
+            return _const.TRADE_RETCODE_INVALID
+        position = request.get('position')
+        if position and position not in _terminal.positions:
+            return _const.TRADE_RETCODE_POSITION_CLOSED
+    elif action == _const.TRADE_ACTION_PENDING:
+        if request.get('type') not in range(_const.ORDER_TYPE_BUY_LIMIT, _const.ORDER_TYPE_SELL_STOP_LIMIT + 1):
+            return _const.TRADE_RETCODE_INVALID
+        if not request.get('price'):
+            return _const.TRADE_RETCODE_INVALID_PRICE
+    elif action == _const.TRADE_ACTION_SLTP:
+        if request.get('position') not in _terminal.positions:
+            return _const.TRADE_RETCODE_POSITION_CLOSED
+    elif request.get('order') not in _terminal.orders:
+        return _const.TRADE_RETCODE_INVALID_ORDER
+    return _const.TRADE_RETCODE_DONE
+
+
+def _history_order(ticket, request, tick_time_msc, state, price, position_id):
+    return dict(
+        ticket=ticket, time_setup=tick_time_msc // 1000, time_setup_msc=tick_time_msc,
+        time_done=tick_time_msc // 1000, time_done_msc=tick_time_msc, time_expiration=0,
+        type=request.get('type', 0), type_time=request.get('type_time', 0),
+        type_filling=request.get('type_filling', 0), state=state, magic=request.get('magic', 0),
+        position_id=position_id, position_by_id=0, reason=_const.ORDER_REASON_EXPERT,
+        volume_initial=request.get('volume', 0.0), volume_current=0.0, price_open=price,
+        sl=request.get('sl', 0.0), tp=request.get('tp', 0.0), price_current=price,
+        price_stoplimit=request.get('stoplimit', 0.0), symbol=request.get('symbol', ''),
+        comment=request.get('comment', ''), external_id='',
+    )
+
+
+def _execute_deal(request, tick):
+    t = _terminal
+    sym = t.symbols[request['symbol']]
+    is_buy = request['type'] == _const.ORDER_TYPE_BUY
+    price = tick.ask if is_buy else tick.bid
+    volume = request['volume']
+    order_ticket = t.next_ticket()
+    deal_ticket = t.next_ticket()
+    position_ticket = request.get('position')
+    profit = 0.0
+    if position_ticket:
+        position = t.positions[position_ticket]
+        volume = min(volume, position['volume'])
+        profit = t.profit(sym, position['type'], volume, position['price_open'], price)
+        t.balance += profit
+        position['volume'] = round(position['volume'] - volume, 8)
+        position['time_update'], position['time_update_msc'] = tick.time, tick.time_msc
+        if position['volume'] <= 0.0:
+            del t.positions[position_ticket]
+        entry = _const.DEAL_ENTRY_OUT
+    else:
+        position_ticket = order_ticket
+        t.positions[position_ticket] = dict(
+            ticket=position_ticket, time=tick.time, time_msc=tick.time_msc, time_update=tick.time,
+            time_update_msc=tick.time_msc, type=request['type'], magic=request.get('magic', 0),
+            identifier=position_ticket, reason=_const.POSITION_REASON_EXPERT, volume=volume, price_open=price,
+            sl=request.get('sl', 0.0), tp=request.get('tp', 0.0), price_current=price, swap=0.0, profit=0.0,
+            symbol=sym.name, comment=request.get('comment', ''), external_id='',
+        )
+        entry = _const.DEAL_ENTRY_IN
+    t.history_orders.append(
+        _history_order(order_ticket, request, tick.time_msc, _const.ORDER_STATE_FILLED, price, position_ticket))
+    t.deals.append(dict(
+        ticket=deal_ticket, order=order_ticket, time=tick.time, time_msc=tick.time_msc, type=request['type'],
+        entry=entry, magic=request.get('magic', 0), position_id=position_ticket,
+        reason=_const.DEAL_REASON_EXPERT, volume=volume, price=price, commission=0.0, swap=0.0,
+        profit=profit, fee=0.0, symbol=sym.name, comment=request.get('comment', ''), external_id='',
+    ))
+    return deal_ticket, order_ticket, volume, price
+
+
+@_api()
+def order_check(request):
+    retcode = _validate_request(request)
+    profit, equity, margin, margin_free, margin_level = _terminal.account_figures()
+    return OrderCheckResult(
+        retcode=0 if retcode == _const.TRADE_RETCODE_DONE else retcode, balance=round(_terminal.balance, 2),
+        equity=equity, profit=profit, margin=margin, margin_free=margin_free, margin_level=margin_level,
+        comment='Done' if retcode == _const.TRADE_RETCODE_DONE else 'Invalid request',
+        request=_trade_request(request),
+    )
+
+
+@_api()
+def order_send(request):
+    t = _terminal
+    retcode = _validate_request(request)
+    t.request_counter += 1
+    deal = order = 0
+    volume = price = bid = ask = 0.0
+    if retcode == _const.TRADE_RETCODE_DONE:
+        action = request['action']
+        if request.get('symbol') in t.symbols:
+            tick = t.last_tick(t.symbols[request['symbol']])
+            bid, ask = tick.bid, tick.ask
+        if action == _const.TRADE_ACTION_DEAL:
+            deal, order, volume, price = _execute_deal(request, tick)
+        elif action == _const.TRADE_ACTION_PENDING:
+            order = t.next_ticket()
+            volume, price = request['volume'], request['price']
+            t.orders[order] = dict(
+                _history_order(order, request, tick.time_msc, _const.ORDER_STATE_PLACED, price, 0),
+                time_done=0, time_done_msc=0, volume_current=volume,
+            )
+        elif action == _const.TRADE_ACTION_SLTP:
+            position = t.positions[request['position']]
+            position.update(sl=request.get('sl', 0.0), tp=request.get('tp', 0.0))
+        elif action == _const.TRADE_ACTION_MODIFY:
+            order = request['order']
+            for key, field in (('price', 'price_open'), ('sl', 'sl'), ('tp', 'tp'), ('stoplimit', 'price_stoplimit')):
+                if key in request:
+                    t.orders[order][field] = request[key]
+        elif action == _const.TRADE_ACTION_REMOVE:
+            order = request['order']
+            removed = t.orders.pop(order)
+            removed.update(state=_const.ORDER_STATE_CANCELED, time_done=int(t.now()),
+                           time_done_msc=int(t.now() * 1000))
+            t.history_orders.append(removed)
+    return OrderSendResult(
+        retcode=retcode, deal=deal, order=order, volume=volume, price=price, bid=bid, ask=ask,
+        comment='Request executed' if retcode == _const.TRADE_RETCODE_DONE else 'Invalid request',
+        request_id=t.request_counter, retcode_external=0, request=_trade_request(request),
+    )
+
+
+@_api()
+def order_calc_margin(action, symbol, volume, price):
+    sym = _terminal.symbol(symbol)
+    margin = volume * sym.contract_size * price / 100.0
+    if sym.currency_base != 'USD':
+        return round(margin, 2)
+    return round(margin / price, 2)
+
+
+@_api()
+def order_calc_profit(action, symbol, volume, price_open, price_close):
+    return _terminal.profit(_terminal.symbol(symbol), action, volume, price_open, price_close)
+
+
+def _filter_tickets(items, symbol, group, ticket):
+    if ticket is not None:
+        return [i for i in items if i['ticket'] == ticket]
+    if symbol is not None:
+        return [i for i in items if i['symbol'] == symbol]
+    if group is not None:
+        return [i for i in items if _match_group(i['symbol'], group)]
+    return list(items)
+
+
+@_api()
+def positions_total():
+    return len(_terminal.positions)
+
+
+@_api()
+def positions_get(symbol=None, group=None, ticket=None):
+    items = _filter_tickets(_terminal.positions.values(), symbol, group, ticket)
+    return tuple(_terminal.position_snapshot(p) for p in items)
+
+
+@_api()
+def orders_total():
+    return len(_terminal.orders)
+
+
+@_api()
+def orders_get(symbol=None, group=None, ticket=None):
+    items = _filter_tickets(_terminal.orders.values(), symbol, group, ticket)
+    return tuple(_terminal.order_snapshot(o) for o in items)
+
+
+def _history(items, time_key, date_from, date_to, group, ticket, position, ticket_key):
+    if ticket is not None:
+        return tuple(i for i in items if i[ticket_key] == ticket)
+    if position is not None:
+        return tuple(i for i in items if i['position_id'] == position)
+    if date_from is None or date_to is None:
+        raise _SimError(_const.RES_E_INVALID_PARAMS)
+    t0, t1 = _to_seconds(date_from), _to_seconds(date_to)
+    items = (i for i in items if t0 <= i[time_key] <= t1)
+    if group:
+        items = (i for i in items if _match_group(i['symbol'], group))
+    return tuple(items)
+
+
+@_api()
+def history_orders_total(date_from, date_to):
+    return len(_history(_terminal.history_orders, 'time_setup', date_from, date_to, None, None, None, 'ticket'))
+
+
+@_api()
+def history_orders_get(date_from=None, date_to=None, group=None, ticket=None, position=None, **kwargs):
+    items = _history(_terminal.history_orders, 'time_setup', date_from, date_to, group, ticket, position, 'ticket')
+    return tuple(TradeOrder(**o) for o in items)
+
+
+@_api()
+def history_deals_total(date_from, date_to):
+    return len(_history(_terminal.deals, 'time', date_from, date_to, None, None, None, 'order'))
+
+
+@_api()
+def history_deals_get(date_from=None, date_to=None, group=None, ticket=None, position=None, **kwargs):
+    items = _history(_terminal.deals, 'time', date_from, date_to, group, ticket, position, 'order')
+    return tuple(TradeDeal(**d) for d in items)
+
+
+# MetaTrader5 package helper functions --------------------------------------------------------------------------
+def _RawOrder(order_type, symbol, volume, price, comment=None, ticket=None):
+    request = dict(action=_const.TRADE_ACTION_DEAL, symbol=symbol, volume=float(volume), type=order_type,
+                   price=price or 0.0, deviation=10, comment=comment or '')
+    if ticket is not None:
+        request['position'] = ticket
+    return order_send(request)
+
+
+def Buy(symbol, volume, price=None, *, comment=None, ticket=None):
+    return _RawOrder(_const.ORDER_TYPE_BUY, symbol, volume, price, comment, ticket)
+
+
+def Sell(symbol, volume, price=None, *, comment=None, ticket=None):
+    return _RawOrder(_const.ORDER_TYPE_SELL, symbol, volume, price, comment, ticket)
+
+
+def Close(symbol, *, comment=None, ticket=None):
+    positions = positions_get(ticket=ticket) if ticket is not None else positions_get(symbol=symbol)
+    if not positions:
+        return None
+    closed = True
+    for p in positions:
+        order_type = _const.ORDER_TYPE_SELL if p.type == _const.POSITION_TYPE_BUY else _const.ORDER_TYPE_BUY
+        result = _RawOrder(order_type, p.symbol, p.volume, None, comment, p.ticket)
+        closed = closed and result is not None and result.retcode == _const.TRADE_RETCODE_DONE
+    return closed
@@ -1,16 +1,144 @@
+import asyncio
+import contextvars
 import logging
+import threading
+
+from .ratelimit import LogRateLimiter
+
+_FIELDS = (
+    'raise_on_errors',
+    'max_bars',
+    'logger',
+    'return_as_dict',
+    'return_as_native_python_objects',
+    'collect_metrics',
+    'journal',
+    'log_rate_limiter',
+    'bar_store',
+    'rates_cache',
+)
+
+# call path keys <-> small int mode ids, see _ApiState.mode
+_mode_ids = {}
+_mode_keys = []
+_mode_lock = threading.Lock()
+
+
+def _mode_id(key: tuple) -> int:
+    try:
+        return _mode_ids[key]
+    except KeyError:
+        with _mode_lock:
+            if key not in _mode_ids:
+                _mode_keys.append(key)
+                _mode_ids[key] = len(_mode_keys) - 1
+            return _mode_ids[key]
+
+
+def mode_key(mode: int) -> tuple:
+    """Get the call path key of a mode id.
+
+    :param mode: _ApiState.mode
+    :return: (collect_metrics, use_logger, raise_on_errors, convert) where convert is 'native', 'columns', 'dict' or None.
+    """
+    return _mode_keys[mode]
+
+
+class _ApiState:
+    """Immutable snapshot of the API settings. ``mode`` identifies the call path of the wrapped functions that the
+    settings require.
+    """
+    __slots__ = _FIELDS + ('mode',)
+
+    def __init__(self,
+                 raise_on_errors=None,
+                 max_bars=None,
+                 logger=None,
+                 return_as_dict=None,
+                 return_as_native_python_objects=None,
+                 collect_metrics=None,
+                 journal=None,
+                 log_rate_limiter=None,
+                 bar_store=None,
+                 rates_cache=None,
+                 ):
+        set_ = object.__setattr__
+        set_(self, 'raise_on_errors', raise_on_errors or False)
+        set_(self, 'max_bars', max_bars or 100_000)
+        set_(self, 'logger', logger)
+        set_(self, 'return_as_dict', return_as_dict or False)
+        set_(self, 'return_as_native_python_objects', return_as_native_python_objects or False)
+        set_(self, 'collect_metrics', collect_metrics or False)
+        set_(self, 'journal', journal)
+        set_(self, 'log_rate_limiter', log_rate_limiter or LogRateLimiter())
+        set_(self, 'bar_store', bar_store)
+        set_(self, 'rates_cache', rates_cache)
+        if self.return_as_native_python_objects == 'columns':
+            convert = 'columns'
+        elif self.return_as_native_python_objects:
+            convert = 'native'
+        elif self.return_as_dict:
+            convert = 'dict'
+        else:
+            convert = None
+        key = bool(self.collect_metrics), bool(self.logger), bool(self.raise_on_errors), convert
+        set_(self, 'mode', _mode_id(key))
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in _FIELDS}
+
+    def replace(self, **changes) -> '_ApiState':
+        settings = self.as_dict()
+        settings.update(changes)
+        return _ApiState(**settings)
+
+
+# The state of the current thread or asyncio task. Contexts that never set one (eg. new threads) fall back to
+# _root_state[0], which follows the changes made in the main thread outside of asyncio tasks. This way configuring
+# the API in the main thread still applies to worker threads.
+_context_state = contextvars.ContextVar('pymt5adapter_state', default=None)
+_root_state = [_ApiState()]
+
+
+def _publishes_root() -> bool:
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    try:
+        return asyncio.current_task() is None
+    except RuntimeError:  # no running event loop
+        return True
+
+
+class _StateToken:
+    __slots__ = ('context_token', 'previous_root')
+
+    def __init__(self, context_token, previous_root):
+        self.context_token = context_token
+        self.previous_root = previous_root
 
 
 class _GlobalState:
     """
-    Borg shared state class
+    Facade over the context-local API state. Each thread and asyncio task reads and replaces its own immutable
+    _ApiState snapshot, so no locks are needed and settings changed in one never leak into another. The exception
+    is the main thread outside of asyncio tasks: its changes also become the state of threads that never set one.
     """
-    __shared_state = {}
 
-    def __init__(self):
-        self.__dict__ = self.__shared_state
-        if 'max_bars' not in self.__shared_state:
-            self.set_defaults()
+    @staticmethod
+    def current() -> _ApiState:
+        """Get the state snapshot of the current context."""
+        # inlined in the properties below since they are read on hot paths
+        return _context_state.get() or _root_state[0]
+
+    @staticmethod
+    def _set(new_state: _ApiState) -> _StateToken:
+        previous_root = None
+        if _publishes_root():
+            previous_root, _root_state[0] = _root_state[0], new_state
+        return _StateToken(_context_state.set(new_state), previous_root)
 
     def set_defaults(self,
                      raise_on_errors=None,
@@ -18,6 +146,11 @@ class _GlobalState:
                      logger=None,
                      return_as_dict=None,
                      return_as_native_python_objects=None,
+                     collect_metrics=None,
+                     journal=None,
+                     log_rate_limiter=None,
+                     bar_store=None,
+                     rates_cache=None,
                      ):
         """Initializes the instance variables and provides a method for setting the state with a single call.
 
@@ -26,31 +159,126 @@ class _GlobalState:
         :param max_bars:
         :param logger:
         :param return_as_dict:
-        :param return_as_native_python_objects:
+        :param return_as_native_python_objects: True or 'columns' (see connected).
+        :param collect_metrics: Record per-function latency histograms. Defaults to False rather than always on, since
+        timing every call would break the overhead budget of the default state (see connected).
+        :param journal: journal.OrderJournal recording order_send and order_check calls.
+        :param log_rate_limiter: ratelimit.LogRateLimiter for the function_debugging warnings of failed calls.
+        Defaults to a new LogRateLimiter().
+        :param bar_store: barstore.BarStore serving copy_rates_range from disk.
+        :param rates_cache: ratescache.RatesCache serving copy_rates_from_pos from memory.
         :return:
         """
-        self.raise_on_errors = raise_on_errors or False
-        self.max_bars = max_bars or 100_000
-        self._logger = logger
-        self.return_as_dict = return_as_dict or False
-        self.return_as_native_python_objects = return_as_native_python_objects or False
+        self._set(_ApiState(raise_on_errors, max_bars, logger, return_as_dict, return_as_native_python_objects,
+                            collect_metrics, journal, log_rate_limiter, bar_store, rates_cache))
 
     def get_state(self):
-        state = dict(
-            raise_on_errors=self.raise_on_errors,
-            max_bars=self.max_bars,
-            logger=self.logger,
-            return_as_dict=self.return_as_dict
-        )
-        return state
+        return self.current().as_dict()
+
+    def push(self, **changes) -> _StateToken:
+        """Change several settings of the current context in one step.
+
+        :param changes: Setting names and values.
+        :return: Token for restoring the previous state with ``restore``.
+        """
+        return self._set(self.current().replace(**changes))
+
+    def restore(self, token: _StateToken) -> None:
+        """Restore the state from before the ``push`` that returned the token in one step.
+
+        :param token: Token returned by push.
+        """
+        context_token = token.context_token
+        try:
+            _context_state.reset(context_token)
+        except ValueError:  # restored from another context than the one that pushed
+            old_value = context_token.old_value
+            _context_state.set(None if old_value is contextvars.Token.MISSING else old_value)
+        if token.previous_root is not None:
+            _root_state[0] = token.previous_root
+
+    def _change(self, name, value):
+        self._set(self.current().replace(**{name: value}))
 
     @property
     def logger(self) -> logging.Logger:
-        return self._logger
+        return (_context_state.get() or _root_state[0]).logger
 
     @logger.setter
     def logger(self, new_logger: logging.Logger):
-        self._logger = new_logger
+        self._change('logger', new_logger)
+
+    @property
+    def raise_on_errors(self) -> bool:
+        return (_context_state.get() or _root_state[0]).raise_on_errors
+
+    @raise_on_errors.setter
+    def raise_on_errors(self, flag: bool):
+        self._change('raise_on_errors', flag)
+
+    @property
+    def max_bars(self) -> int:
+        return (_context_state.get() or _root_state[0]).max_bars
+
+    @max_bars.setter
+    def max_bars(self, max_bars: int):
+        self._change('max_bars', max_bars)
+
+    @property
+    def return_as_dict(self) -> bool:
+        return (_context_state.get() or _root_state[0]).return_as_dict
+
+    @return_as_dict.setter
+    def return_as_dict(self, flag: bool):
+        self._change('return_as_dict', flag)
+
+    @property
+    def return_as_native_python_objects(self) -> bool:
+        return (_context_state.get() or _root_state[0]).return_as_native_python_objects
+
+    @return_as_native_python_objects.setter
+    def return_as_native_python_objects(self, flag: bool):
+        self._change('return_as_native_python_objects', flag)
+
+    @property
+    def collect_metrics(self) -> bool:
+        return (_context_state.get() or _root_state[0]).collect_metrics
+
+    @collect_metrics.setter
+    def collect_metrics(self, flag: bool):
+        self._change('collect_metrics', flag)
+
+    @property
+    def journal(self):
+        return (_context_state.get() or _root_state[0]).journal
+
+    @journal.setter
+    def journal(self, new_journal):
+        self._change('journal', new_journal)
+
+    @property
+    def log_rate_limiter(self) -> LogRateLimiter:
+        return (_context_state.get() or _root_state[0]).log_rate_limiter
+
+    @log_rate_limiter.setter
+    def log_rate_limiter(self, limiter: LogRateLimiter):
+        self._change('log_rate_limiter', limiter)
+
+    @property
+    def bar_store(self):
+        return (_context_state.get() or _root_state[0]).bar_store
+
+    @bar_store.setter
+    def bar_store(self, store):
+        self._change('bar_store', store)
+
+    @property
+    def rates_cache(self):
+        return (_context_state.get() or _root_state[0]).rates_cache
+
+    @rates_cache.setter
+    def rates_cache(self, cache):
+        self._change('rates_cache', cache)
 
 
 global_state: _GlobalState = _GlobalState()
@@ -1,16 +1,28 @@
+import time
+
 from . import const
 from .context import _ContextAwareBase
-from .core import copy_rates_from_pos
+from .core import mt5_copy_rates_from_pos
 from .core import symbol_info
 from .core import symbol_info_tick
 from .core import symbol_select
+from .types import Iterable
 from .types import SymbolInfo
 from .types import Union
 
 
 class Symbol(_ContextAwareBase):
-    def __init__(self, symbol: Union[str, SymbolInfo]):
+    def __init__(self, symbol: Union[str, SymbolInfo], *, daily_interval: float = 1.0):
+        """
+
+        :param symbol: Symbol name or SymbolInfo.
+        :param daily_interval: Seconds the current D1 bar behind day_volume and day_real_volume is reused before
+        it is requested again. refresh_rates() and refresh_daily_bars() refresh it regardless.
+        """
         super().__init__()
+        self.daily_interval = daily_interval
+        self._daily_bar = None
+        self._daily_expires = None
         self.name = symbol
 
     @property
@@ -57,19 +69,37 @@ class Symbol(_ContextAwareBase):
         return self.tick.volume
 
     def _daily(self, key):
-        rate = copy_rates_from_pos(self.name, const.TIMEFRAME.D1, 0, 1)
+        if self._daily_expires is None or time.monotonic() >= self._daily_expires:
+            self._set_daily(_fetch_daily_bar(self.name))
         try:
-            return rate[0][key]
+            return int(self._daily_bar[key])
         except:
             return 0
 
+    def _set_daily(self, bar):
+        self._daily_bar = bar
+        self._daily_expires = time.monotonic() + self.daily_interval
+
     @property
     def day_real_volume(self):
         return self._daily('real_volume')
 
     @property
     def day_volume(self):
-        return self._daily('volume')
+        return self._daily('tick_volume')
+
+    @classmethod
+    def refresh_daily_bars(cls, symbols: Iterable['Symbol']) -> None:
+        """Refresh the D1 bar behind day_volume and day_real_volume of many symbols in one pass.
+
+        Each symbol's bar is read with its own raw copy_rates_from_pos call, which bypasses the logger, metrics and
+        raise_on_errors of the API state. A symbol whose call fails caches no bar, so its day volumes read 0 until
+        the next refresh.
+
+        :param symbols: Symbol instances.
+        """
+        for symbol in symbols:
+            symbol._set_daily(_fetch_daily_bar(symbol.name))
 
     @property
     def volume_real(self):
@@ -92,6 +122,7 @@ class Symbol(_ContextAwareBase):
 
     def refresh_rates(self):
         self._tick = symbol_info_tick(self.name)
+        self._daily_expires = None  # the D1 bar is requested again on the next read
         return self
 
     def _refresh(self):
@@ -189,3 +220,12 @@ class Symbol(_ContextAwareBase):
         self.page = info.page
         self.path = info.path
         return self
+
+
+def _fetch_daily_bar(name):
+    # the raw call: the bar is read as a numpy record whatever return type or raise_on_errors the API state sets
+    try:
+        rate = mt5_copy_rates_from_pos(name, const.TIMEFRAME.D1, 0, 1)
+    except SystemError:
+        return None
+    return rate[0] if rate is not None and len(rate) else None
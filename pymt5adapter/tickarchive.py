@@ -0,0 +1,216 @@
+"""Columnar on-disk archive of ticks, partitioned by symbol and UTC day.
+
+Every field of the ticks is stored in its own file of raw little-endian values
+(``<directory>/<symbol>/<YYYY-MM-DD>/<field>.col``) with the dtype MetaTrader5 uses for that field. The files are
+read through memory maps. A range query finds its bounds by binary search on the ``time_msc`` column of the first
+and last day, so it reads no data outside the range and does not need the terminal.
+
+Example:
+    >>> archive = TickArchive('ticks')
+    >>> with connected():
+    >>>     archive.write('EURUSD', copy_ticks_range('EURUSD', monday, saturday, COPY_TICKS_ALL))
+    >>> bids = archive.columns('EURUSD', monday, saturday, fields=['time_msc', 'bid'])
+"""
+import os
+import threading
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict
+from typing import List
+
+import numpy
+
+from . import helpers as _h
+from .types import *
+
+TICKS_DTYPE = numpy.dtype([
+    ('time', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('volume', '<u8'),
+    ('time_msc', '<i8'), ('flags', '<u4'), ('volume_real', '<f8'),
+])
+
+_MSC_PER_DAY = 86_400_000
+_EPOCH = date(1970, 1, 1)
+
+
+class TickArchive:
+    """Tick columns in day partitions under one directory. Thread safe within a process."""
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+
+        :param directory: Root directory of the archive. It is created when missing.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # (symbol, day) -> {field: memmap} of the partitions read since their last write
+        self._maps = {}
+
+    def path(self, symbol: str, day: date) -> Path:
+        """Directory of the partition holding the ticks of the symbol on the UTC day."""
+        return self.directory / str(symbol) / day.isoformat()
+
+    def days(self, symbol: str) -> List[date]:
+        """The UTC days with archived ticks of the symbol, in ascending order."""
+        symbol_dir = self.directory / str(symbol)
+        if not symbol_dir.is_dir():
+            return []
+        return sorted(date.fromisoformat(p.name) for p in symbol_dir.iterdir() if p.is_dir())
+
+    def write(self, symbol: str, ticks: numpy.ndarray) -> int:
+        """Archive ticks sorted by time_msc, as returned by copy_ticks_range or copy_ticks_from.
+
+        The new ticks replace the stored ticks of a day within their time_msc range and are merged with the stored
+        ticks before and after it, so ranges can be archived in any order and archiving an overlapping range again
+        does not duplicate ticks. Ticks later than all stored ticks are appended in place. Any other write rewrites
+        the day's column files, and arrays returned by ``columns`` before it keep showing the old data (on Windows,
+        where a mapped file cannot be replaced, they must be released first).
+
+        :param symbol: Financial instrument name.
+        :param ticks: Structured array with the TICKS_DTYPE fields.
+        :return: Number of ticks written.
+        """
+        if ticks is None or not len(ticks):
+            return 0
+        msc = ticks['time_msc']
+        day_numbers = msc // _MSC_PER_DAY
+        bounds = numpy.flatnonzero(numpy.r_[True, day_numbers[1:] != day_numbers[:-1], True])
+        with self._lock:
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                day = _EPOCH + timedelta(days=int(day_numbers[lo]))
+                self._write_day(symbol, day, ticks[lo:hi])
+        return len(ticks)
+
+    def _write_day(self, symbol, day, ticks):
+        self._maps.pop((symbol, day), None)  # release the memory maps before the files change
+        part = self.path(symbol, day)
+        part.mkdir(parents=True, exist_ok=True)
+        stored = _open_columns(part, TICKS_DTYPE.names)
+        count = len(stored['time_msc']) if stored else 0
+        if not count or stored['time_msc'][-1] < ticks['time_msc'][0]:
+            del stored
+            for name in TICKS_DTYPE.names:
+                dtype = TICKS_DTYPE.fields[name][0]
+                with open(part / f'{name}.col', 'ab+') as f:
+                    f.truncate(count * dtype.itemsize)  # drops the torn tail of a crashed write
+                    f.write(numpy.ascontiguousarray(ticks[name], dtype=dtype).tobytes())
+            return
+        # backfill or overlap: merge and replace the files, which leaves the memory maps of the old ones valid
+        lo = int(numpy.searchsorted(stored['time_msc'], ticks['time_msc'][0], side='left'))
+        hi = int(numpy.searchsorted(stored['time_msc'], ticks['time_msc'][-1], side='right'))
+        merged = {
+            name: numpy.concatenate([stored[name][:lo], ticks[name], stored[name][hi:]]).astype(
+                TICKS_DTYPE.fields[name][0], copy=False)
+            for name in TICKS_DTYPE.names
+        }
+        del stored
+        for name, column in merged.items():
+            tmp = part / f'{name}.col.tmp'
+            column.tofile(tmp)
+            os.replace(tmp, part / f'{name}.col')
+
+    def _day_columns(self, symbol, day):
+        key = symbol, day
+        maps = self._maps.get(key)
+        if maps is None:
+            maps = self._maps[key] = _open_columns(self.path(symbol, day), TICKS_DTYPE.names)
+        return maps
+
+    def columns(self, symbol: str, datetime_from: Union[datetime, int], datetime_to: Union[datetime, int],
+                fields: Iterable[str] = None) -> Dict[str, numpy.ndarray]:
+        """Get the archived ticks with a time_msc within [datetime_from, datetime_to] column by column.
+
+        :param symbol: Financial instrument name.
+        :param datetime_from: datetime or seconds since 1970.01.01.
+        :param datetime_to: datetime or seconds since 1970.01.01.
+        :param fields: Names of the columns to return. Defaults to all TICKS_DTYPE fields.
+        :return: Dict of field name -> 1-d array in the field's MetaTrader5 dtype. The arrays are read-only views of
+        the memory-mapped files when the range falls within one day, else the concatenated slices of each day.
+        """
+        fields = list(TICKS_DTYPE.names if fields is None else fields)
+        slices = self._slices(symbol, _h.to_milliseconds(datetime_from), _h.to_milliseconds(datetime_to))
+        if len(slices) == 1:
+            maps, lo, hi = slices[0]
+            return {name: maps[name][lo:hi] for name in fields}
+        return {
+            name: numpy.concatenate([maps[name][lo:hi] for maps, lo, hi in slices])
+            if slices else numpy.empty(0, dtype=TICKS_DTYPE.fields[name][0])
+            for name in fields
+        }
+
+    def copy_ticks_range(self, symbol: str, datetime_from: Union[datetime, int],
+                         datetime_to: Union[datetime, int]) -> numpy.ndarray:
+        """Get the archived ticks with a time_msc within [datetime_from, datetime_to] like copy_ticks_range.
+
+        :return: Structured array in the TICKS_DTYPE layout of the MetaTrader5 package (a copy).
+        """
+        slices = self._slices(symbol, _h.to_milliseconds(datetime_from), _h.to_milliseconds(datetime_to))
+        out = numpy.empty(sum(hi - lo for _, lo, hi in slices), dtype=TICKS_DTYPE)
+        for name in TICKS_DTYPE.names:
+            column = out[name]
+            i = 0
+            for maps, lo, hi in slices:
+                column[i:i + hi - lo] = maps[name][lo:hi]
+                i += hi - lo
+        return out
+
+    def _slices(self, symbol, msc_from, msc_to):
+        """[(columns of a day, lo, hi)] covering the range."""
+        if msc_to < msc_from:
+            return []
+        first_day = _EPOCH + timedelta(days=msc_from // _MSC_PER_DAY)
+        last_day = _EPOCH + timedelta(days=msc_to // _MSC_PER_DAY)
+        slices = []
+        with self._lock:
+            for day in self.days(symbol):
+                if day < first_day or day > last_day:
+                    continue
+                maps = self._day_columns(symbol, day)
+                if not maps:
+                    continue
+                time_msc = maps['time_msc']
+                lo = int(numpy.searchsorted(time_msc, msc_from, side='left')) if day == first_day else 0
+                hi = int(numpy.searchsorted(time_msc, msc_to, side='right')) if day == last_day else len(time_msc)
+                if hi > lo:
+                    slices.append((maps, lo, hi))
+        return slices
+
+    def clear(self, symbol: str = None) -> None:
+        """Delete archived ticks.
+
+        :param symbol: Only delete the ticks of this symbol.
+        """
+        with self._lock:
+            self._maps.clear()
+            symbol_dirs = [self.directory / symbol] if symbol is not None else list(self.directory.iterdir())
+            for symbol_dir in symbol_dirs:
+                if not symbol_dir.is_dir():
+                    continue
+                for part in symbol_dir.iterdir():
+                    for column in part.glob('*.col*'):
+                        column.unlink()
+                    part.rmdir()
+                symbol_dir.rmdir()
+
+    def __repr__(self):
+        return f'{type(self).__name__}({str(self.directory)!r})'
+
+
+def _open_columns(part: Path, names) -> Dict[str, numpy.ndarray]:
+    """Memory map the columns of a partition. Returns {} for a missing or empty partition."""
+    sizes = {}
+    for name in TICKS_DTYPE.names:
+        try:
+            sizes[name] = (part / f'{name}.col').stat().st_size // TICKS_DTYPE.fields[name][0].itemsize
+        except FileNotFoundError:
+            return {}
+    # columns can differ in length after a crash during a write: the ticks missing a column are ignored
+    count = min(sizes.values())
+    if not count:
+        return {}
+    return {
+        name: numpy.memmap(part / f'{name}.col', dtype=TICKS_DTYPE.fields[name][0], mode='r', shape=(count,))
+        for name in names
+    }
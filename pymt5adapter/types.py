@@ -1,17 +1,28 @@
-import MetaTrader5 as _mt5
 from collections import namedtuple
 
 from typing import Callable
+from typing import Dict
 from typing import Iterable
+from typing import Iterator
+from typing import List
 from typing import Tuple
 from typing import Union
 from typing import Any
+from typing import AsyncIterator
 from typing import Optional
 from typing import Type
 
+from .backend import mt5 as _mt5
+
 # custom namedtuples
 CopyRate = namedtuple("CopyRate", "time, open, high, low, close, tick_volume, spread, real_volume")
 CopyTick = namedtuple("CopyTick", "time, bid, ask, last, volume, time_msc, flags, volume_real")
+# result of the *_batch functions: data by symbol (or stacked) and last_error() by failed symbol
+Batch = namedtuple("Batch", "data, errors")
+# EventEngine events: time in ms, EVENT flag, symbol, timeframe (None but for bars), CopyTick, CopyRate,
+# TradePosition, TradeOrder or TradeDeal
+Event = namedtuple("Event", "time_msc, type, symbol, timeframe, data")
+RatesCacheInfo = namedtuple("RatesCacheInfo", "hits, misses, updates, entries, nbytes")
 # MT5 namedtuple objects for typing
 Tick = _mt5.Tick
 AccountInfo = _mt5.AccountInfo
@@ -0,0 +1,46 @@
+"""Backend selection and simulator fixtures shared by the test modules.
+
+The suite runs against the simulator backend unless PYMT5ADAPTER_BACKEND selects another one. The modules in
+TERMINAL_MODULES need a live MetaTrader 5 terminal and are skipped on the simulator. Tests marked ``simulator`` are
+skipped on any other backend, and get the simulator reset with its clock frozen at the module's ``START`` (Wednesday
+noon by default).
+"""
+import os
+from datetime import datetime
+from datetime import timezone
+
+import pytest
+
+TERMINAL_MODULES = {'test_metatrader.py', 'test_pymt5adapter.py'}
+WEDNESDAY_NOON = datetime(2020, 6, 3, 12, 0, tzinfo=timezone.utc)
+
+
+def pytest_configure(config):
+    # before the test modules import the package, which resolves the backend once
+    os.environ.setdefault('PYMT5ADAPTER_BACKEND', 'simulator')
+    config.addinivalue_line('markers', 'simulator: needs PYMT5ADAPTER_BACKEND=simulator')
+    config.addinivalue_line('markers', 'terminal: needs a MetaTrader 5 terminal')
+
+
+def pytest_collection_modifyitems(config, items):
+    from pymt5adapter import backend
+    for item in items:
+        if item.path.name in TERMINAL_MODULES:
+            item.add_marker(pytest.mark.terminal)
+        if backend.is_simulated and item.get_closest_marker('terminal'):
+            item.add_marker(pytest.mark.skip(reason='requires a MetaTrader 5 terminal'))
+        elif not backend.is_simulated and item.get_closest_marker('simulator'):
+            item.add_marker(pytest.mark.skip(reason='requires PYMT5ADAPTER_BACKEND=simulator'))
+
+
+@pytest.fixture(autouse=True)
+def frozen(request):
+    if request.node.get_closest_marker('simulator') is None:
+        yield None
+        return
+    from pymt5adapter import backend
+    sim = backend.mt5
+    sim.reset()
+    sim.set_time(getattr(request.module, 'START', WEDNESDAY_NOON))
+    yield sim
+    sim.reset()
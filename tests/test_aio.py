@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from datetime import datetime
+from datetime import timezone
+
+import numpy
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import aio
+from pymt5adapter import backend
+from pymt5adapter.event import EVENT
+from pymt5adapter.event import EventEngine
+from pymt5adapter.state import global_state as state
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+START = datetime(2020, 6, 3, 11, 59, 50, tzinfo=timezone.utc)
+
+
+def test_async_calls_run_on_one_thread_with_the_task_settings():
+    threads = set()
+
+    def spy():
+        threads.add(threading.current_thread().name)
+        return state.raise_on_errors
+
+    async def main():
+        async with aio.connected(raise_on_errors=True) as conn:
+            assert state.raise_on_errors and await aio.run(spy)
+            rates = await aio.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.M1, 0, 100)
+            assert numpy.array_equal(rates, sim.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.M1, 0, 100))
+            with pytest.raises(mta.MT5Error):
+                await aio.symbol_info_tick('NOPE')
+            conn.raise_on_errors = False
+            assert await aio.symbol_info_tick('NOPE') is None
+            results = await asyncio.gather(*(aio.symbol_info_tick(s) for s in ('EURUSD', 'GBPUSD', 'USDJPY')))
+            assert [r.bid for r in results] == [sim.symbol_info_tick(s).bid for s in ('EURUSD', 'GBPUSD', 'USDJPY')]
+            t_from = datetime(2020, 6, 3, 10, tzinfo=timezone.utc)
+            chunks = [c async for c in aio.iter_rates('EURUSD', mta.TIMEFRAME.M1, t_from, START, chunk=30)]
+            assert len(chunks) == 4 and await aio.run(spy) is False
+        assert not state.raise_on_errors and await aio.last_error() is not None
+
+    asyncio.run(main())
+    assert threads == {t for t in threads if t.startswith('pymt5adapter')} and len(threads) == 1
+
+
+def test_async_event_stream_applies_backpressure():
+    async def main():
+        async with aio.connected():
+            engine = EventEngine([('EURUSD', None, EVENT.TICK_LAST_CHANGE), ('GBPUSD', None, EVENT.TICK_LAST_CHANGE)],
+                                 min_sleep=0)
+            await aio.run(engine.poll)  # the subscriptions start at START
+            stream = aio.iter_events(engine, maxsize=2)
+            seen = []
+            sim.advance(10)
+            async for event in stream:
+                seen.append(event)
+                if len(seen) == 3:
+                    sim.advance(10)  # a slow consumer: no ticks are lost while the producer waits
+                if event.time_msc > (START.timestamp() + 15) * 1000:
+                    break
+            await stream.aclose()
+            expected = sum(len(mta.copy_ticks_range(s, START, seen[-1].time_msc / 1000, mta.COPY_TICKS_ALL))
+                           for s in ('EURUSD', 'GBPUSD'))
+            return seen, expected
+
+    seen, expected = asyncio.run(main())
+    assert [e.time_msc for e in seen] == sorted(e.time_msc for e in seen)
+    assert len(seen) == expected
@@ -0,0 +1,65 @@
+from datetime import datetime
+from datetime import timezone
+
+import numpy
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import backend
+from pymt5adapter.barstore import BarStore
+from pymt5adapter.barstore import HEADER_SIZE
+from pymt5adapter.barstore import RATES_DTYPE
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+WEDNESDAY_NOON = datetime(2020, 6, 3, 12, 0, tzinfo=timezone.utc)
+
+
+def test_repeat_ranges_are_served_from_disk(tmp_path):
+    fetched = []
+
+    def fetch(*args):
+        fetched.append(args[2:])
+        return mta.core._fetch_rates_range(*args)
+
+    t_from = datetime(2020, 6, 1, tzinfo=timezone.utc)
+    with mta.connected(bar_store=tmp_path) as conn:
+        store = conn.bar_store
+        expected = mta.copy_rates_range('EURUSD', mta.TIMEFRAME.M1, t_from, WEDNESDAY_NOON)
+        path = store.path('EURUSD', mta.TIMEFRAME.M1)
+        assert path.stat().st_size == HEADER_SIZE + len(expected) * RATES_DTYPE.itemsize
+        # closed bars come from disk, an open ended range refetches from the last stored bar on
+        closed = store.copy_rates_range('EURUSD', mta.TIMEFRAME.M1, t_from, datetime(2020, 6, 2), fetch)
+        assert not fetched and numpy.array_equal(closed, expected[expected['time'] <= closed[-1]['time']])
+        sim.advance(30)
+        forming = store.copy_rates_range('EURUSD', mta.TIMEFRAME.M1, t_from, WEDNESDAY_NOON, fetch)
+        assert fetched == [(int(WEDNESDAY_NOON.timestamp()), int(WEDNESDAY_NOON.timestamp()))]
+        assert len(forming) == len(expected) and forming[-1]['close'] != expected[-1]['close']
+        now = datetime(2020, 6, 3, 13, 0, tzinfo=timezone.utc)
+        sim.set_time(now)
+        cached = mta.copy_rates_range('EURUSD', mta.TIMEFRAME.M1, t_from, now)
+        live = mta.core._fetch_rates_range('EURUSD', mta.TIMEFRAME.M1, int(t_from.timestamp()),
+                                           int(now.timestamp()))
+        assert numpy.array_equal(cached, live) and len(cached) == len(expected) + 60
+        # reaching back before the stored span fetches the missing head only
+        fetched.clear()
+        head_from = datetime(2020, 5, 29, tzinfo=timezone.utc)
+        older = store.copy_rates_range('EURUSD', mta.TIMEFRAME.M1, head_from, datetime(2020, 6, 1, 1), fetch)
+        assert fetched == [(int(head_from.timestamp()), int(cached[0]['time']) - 1)]
+        assert older[-1]['time'] == datetime(2020, 6, 1, 1, tzinfo=timezone.utc).timestamp()
+        fetched.clear()
+        store.copy_rates_range('EURUSD', mta.TIMEFRAME.M1, head_from, t_from, fetch)
+        assert not fetched
+        store.clear('EURUSD')
+        assert not path.exists()
+
+
+def test_store_files_survive_reconnects(tmp_path):
+    store = BarStore(tmp_path)
+    t_from = datetime(2020, 5, 1, tzinfo=timezone.utc)
+    with mta.connected(bar_store=store):
+        first = mta.copy_rates('EURUSD', mta.TIMEFRAME.H1, datetime_from=t_from, datetime_to=WEDNESDAY_NOON)
+    assert mta.copy_rates_range('EURUSD', mta.TIMEFRAME.H1, t_from, WEDNESDAY_NOON) is None  # not connected
+    with mta.connected(bar_store=tmp_path):
+        assert numpy.array_equal(first, mta.copy_rates_range('EURUSD', mta.TIMEFRAME.H1, t_from, WEDNESDAY_NOON))
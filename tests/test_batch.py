@@ -0,0 +1,40 @@
+from datetime import datetime
+from datetime import timezone
+
+import numpy
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import backend
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+
+
+def test_batched_rates_and_ticks():
+    with mta.connected(raise_on_errors=True, collect_metrics=True):
+        symbols = ['EURUSD', mta.symbol_info('GBPUSD'), 'NOPE', 'USDJPY']
+        mta.reset_latency_histograms()
+        batch = mta.copy_rates_batch(symbols, mta.TIMEFRAME.M5, count=50)
+        assert list(batch.data) == ['EURUSD', 'GBPUSD', 'USDJPY']
+        assert list(batch.errors) == ['NOPE'] and batch.errors['NOPE'][0] != mta.ERROR_CODE.OK
+        for name, bars in batch.data.items():
+            assert numpy.array_equal(bars, mta.copy_rates_from_pos(name, mta.TIMEFRAME.M5, 0, 50))
+        assert mta.copy_rates_batch.latency_histogram.calls == 1
+        stacked = mta.copy_rates_batch(symbols, mta.TIMEFRAME.M5, count=50, stack=True).data
+        assert stacked.shape == (4, 50) and not stacked[2]['time'].any()
+        assert numpy.array_equal(stacked[3], batch.data['USDJPY'])
+        buffer = numpy.ones((8, 50), dtype=stacked.dtype)
+        refilled = mta.copy_rates_batch(symbols, mta.TIMEFRAME.M5, count=50, out=buffer).data
+        assert refilled.base is buffer and numpy.array_equal(refilled, stacked)
+        with pytest.raises(ValueError):
+            mta.copy_rates_batch(symbols, mta.TIMEFRAME.M5, count=10, out=buffer)
+        t_from = datetime(2020, 6, 3, 11, 59, 58, tzinfo=timezone.utc)
+        ticks = mta.copy_ticks_batch(symbols, t_from, 1000, mta.COPY_TICKS_ALL, stack=True).data
+        expected = mta.copy_ticks_from('EURUSD', t_from, 1000, mta.COPY_TICKS_ALL)
+        assert 0 < len(expected) < 1000  # the clock stops the ticks short: padded at the end
+        assert numpy.array_equal(ticks[0, :len(expected)], expected) and not ticks[0, len(expected):]['time_msc'].any()
+    with mta.connected(return_as_native_python_objects=True):
+        native = mta.copy_rates_batch(['EURUSD', 'NOPE'], mta.TIMEFRAME.H1, count=2)
+        assert isinstance(native['data']['EURUSD'], list) and 'NOPE' in native['errors']
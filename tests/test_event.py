@@ -0,0 +1,243 @@
+import collections
+from datetime import datetime
+from datetime import timezone
+
+import numpy
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import backend
+from pymt5adapter import event
+from pymt5adapter.event import EVENT
+from pymt5adapter.event import EventEngine
+from pymt5adapter.event import iter_event
+from pymt5adapter.event import new_ticks
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+START = datetime(2020, 6, 3, 11, 59, 50, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Counts the raw terminal calls of the engines by function name."""
+    counts = collections.Counter()
+
+    def counting(name, raw):
+        def call(*args):
+            counts[name] += 1
+            return raw(*args)
+
+        return call
+
+    for name in dir(event):
+        if name.startswith('mt5_'):
+            monkeypatch.setattr(event, name, counting(name[4:], getattr(event, name)))
+    return counts
+
+
+def test_engine_merges_symbols_in_time_order(calls):
+    engine = EventEngine([('EURUSD', mta.TIMEFRAME.M1, EVENT.TICK_LAST_CHANGE | EVENT.NEW_BAR),
+                          ('GBPUSD', None, EVENT.TICK_LAST_CHANGE),
+                          ('USDJPY', mta.TIMEFRAME.M1, EVENT.NEW_BAR)])
+    with mta.connected():
+        assert engine.poll() == []  # subscriptions start at the current tick and bar
+        start_msc = {symbol: mta.symbol_info_tick(symbol).time_msc for symbol in ('EURUSD', 'GBPUSD')}
+        calls.clear()
+        sim.advance(5)
+        events = engine.poll()
+        assert calls['copy_rates_from_pos'] == 0  # no bar polls before the next bar opens
+        times = [e.time_msc for e in events]
+        assert times == sorted(times) and {e.symbol for e in events} == {'EURUSD', 'GBPUSD'}
+        for symbol in ('EURUSD', 'GBPUSD'):
+            expected = mta.copy_ticks_range(symbol, START, datetime(2020, 6, 3, 11, 59, 55, tzinfo=timezone.utc),
+                                            mta.COPY_TICKS_ALL)
+            expected = expected[expected['time_msc'] > start_msc[symbol]]
+            assert [e.data for e in events if e.symbol == symbol] == [mta.types.CopyTick(*t) for t in expected]
+        sim.advance(10)
+        events = engine.poll()
+        bars = [e for e in events if e.type == EVENT.NEW_BAR]
+        assert [(e.symbol, e.data.time) for e in sorted(bars, key=lambda e: e.symbol)] == [
+            ('EURUSD', 1591185600), ('USDJPY', 1591185600)]
+        ticks = [e for e in events if e.type == EVENT.TICK_LAST_CHANGE]
+        assert [e.time_msc for e in events] == sorted(e.time_msc for e in events)
+        assert all(e.time_msc < 1591185600000 for e in events[:events.index(bars[0])])
+        assert len(ticks) == sum(len(mta.copy_ticks_range(s, 1591185595, 1591185605, mta.COPY_TICKS_ALL))
+                                 for s in ('EURUSD', 'GBPUSD'))
+        engine.unsubscribe('EURUSD', mta.TIMEFRAME.M1, EVENT.NEW_BAR)
+        engine.unsubscribe('GBPUSD')
+        engine.subscribe('USDJPY', None)
+        assert engine.subscriptions == {('EURUSD', mta.TIMEFRAME.M1): EVENT.TICK_LAST_CHANGE,
+                                        ('USDJPY', mta.TIMEFRAME.M1): EVENT.NEW_BAR,
+                                        ('USDJPY', None): EVENT.TICK_LAST_CHANGE}
+        engine.poll()
+        sim.advance(60)
+        events = engine.poll()
+        assert {(e.symbol, e.type) for e in events} == {('EURUSD', EVENT.TICK_LAST_CHANGE),
+                                                        ('USDJPY', EVENT.TICK_LAST_CHANGE), ('USDJPY', EVENT.NEW_BAR)}
+        with pytest.raises(ValueError):
+            engine.subscribe('EURUSD', None, EVENT.NEW_BAR)
+
+
+def test_iter_event_accepts_names():
+    sim.set_time(None)  # a running clock, from START
+    sim.advance(START.timestamp() - sim.now())
+    with mta.connected():
+        events = iter_event('EURUSD', mta.TIMEFRAME.M1, EVENT.TICK_LAST_CHANGE, sleep=0.01)
+        first = None
+        for _ in range(3):
+            event, tick = next(events)
+            assert event == EVENT.TICK_LAST_CHANGE and isinstance(tick, mta.types.CopyTick)
+            assert first is None or tick.time_msc >= first
+            first = tick.time_msc
+
+
+def test_adaptive_polling():
+    engine = EventEngine([('EURUSD', None, EVENT.TICK_LAST_CHANGE)], min_sleep=0.001, max_sleep=0.01)
+    with mta.connected():
+        engine.poll()
+        assert [engine.next_sleep([]) for _ in range(6)] == [0.001, 0.002, 0.004, 0.008, 0.01, 0.01]
+        sim.advance(5)
+        assert engine.next_sleep(engine.poll()) == 0.001
+        bars = EventEngine([('EURUSD', mta.TIMEFRAME.M1, EVENT.NEW_BAR)], min_sleep=0.001, max_sleep=0.01)
+        bars.poll()
+        # only NEW_BAR: sleeps until the bar opens at 12:00, about 5 s after the last tick
+        assert 4.5 < bars.next_sleep([]) < 6 and 4.5 < bars.next_sleep([]) < 6
+        sim.advance(10)
+        events = bars.poll()
+        assert [e.type for e in events] == [EVENT.NEW_BAR] and bars.next_sleep(events) == 0.001
+        assert 50 < bars.next_sleep([]) < 60
+        bars.subscribe('GBPUSD')
+        assert [bars.next_sleep([]) for _ in range(2)] == [0.001, 0.002]  # ticks are subscribed too: backing off
+
+
+def test_new_ticks_share_time_msc():
+    ticks = numpy.zeros(6, dtype=[('time_msc', '<i8'), ('bid', '<f8')])
+    ticks['time_msc'] = [1000, 1500, 1500, 1700, 1700, 1700]
+    ticks['bid'] = numpy.arange(6)
+    new, last_msc, seen = new_ticks(ticks[:5], 1000, None)  # one 1700 tick delivered so far
+    assert new['bid'].tolist() == [1, 2, 3, 4] and (last_msc, seen) == (1700, 2)
+    new, last_msc, seen = new_ticks(ticks, last_msc, seen)  # a late tick at 1700
+    assert new['bid'].tolist() == [5] and (last_msc, seen) == (1700, 3)
+    new, last_msc, seen = new_ticks(ticks, last_msc, seen)
+    assert not len(new) and (last_msc, seen) == (1700, 3)
+    assert new_ticks(ticks, 1500, None)[0]['bid'].tolist() == [3, 4, 5]
+
+
+def test_batched_tick_events():
+    subscriptions = [('EURUSD', None, EVENT.TICK_LAST_CHANGE), ('GBPUSD', None, EVENT.TICK_LAST_CHANGE)]
+    each, batched = EventEngine(subscriptions), EventEngine(subscriptions, batch_ticks=True)
+    with mta.connected():
+        each.poll(), batched.poll()
+        sim.advance(30)
+        events, batches = each.poll(), batched.poll()
+    assert len(batches) == 2 and all(isinstance(e.data, numpy.ndarray) for e in batches)
+    for batch in batches:
+        ticks = [e.data for e in events if e.symbol == batch.symbol]
+        assert [mta.types.CopyTick(*t) for t in batch.data] == ticks and batch.time_msc == ticks[0].time_msc
+
+
+def test_trade_events_from_snapshots(calls):
+    engine = EventEngine([(None, None, EVENT.POSITION_OPENED | EVENT.POSITION_CLOSED | EVENT.DEAL_ADDED),
+                          ('EURUSD', None, EVENT.POSITION_CHANGED | EVENT.ORDER_PLACED | EVENT.ORDER_MODIFIED
+                           | EVENT.ORDER_REMOVED)], snapshot_interval=3600)
+    with mta.connected():
+        sim.Buy('EURUSD', 0.1)
+        assert engine.poll() == []  # the existing position and deal are the starting snapshot
+        kept = mta.positions_get()[0]
+        sim.advance(1)
+        buy, sell = sim.Buy('GBPUSD', 0.2), sim.Sell('EURUSD', 0.05, ticket=kept.ticket)
+        events = engine.poll()
+        assert [(e.type, e.symbol) for e in events] == [
+            (EVENT.DEAL_ADDED, 'GBPUSD'), (EVENT.POSITION_OPENED, 'GBPUSD'),
+            (EVENT.DEAL_ADDED, 'EURUSD'), (EVENT.POSITION_CHANGED, 'EURUSD')]
+        assert events[0].data.ticket == buy.deal and events[1].data.ticket == buy.order
+        assert events[2].data.ticket == sell.deal and events[3].data.volume == 0.05
+        price = mta.symbol_info_tick('EURUSD').ask - 0.01
+        placed = sim.order_send(dict(action=mta.TRADE_ACTION.PENDING, symbol='EURUSD', volume=0.1, price=price,
+                                     type=mta.ORDER_TYPE.BUY_LIMIT))
+        sim.advance(1)
+        assert [(e.type, e.data.ticket) for e in engine.poll()] == [(EVENT.ORDER_PLACED, placed.order)]
+        sim.advance(1)
+        calls.clear()
+        assert engine.poll() == [] and calls['positions_get'] == 0  # no count changed: no snapshot
+        sim.order_send(dict(action=mta.TRADE_ACTION.MODIFY, order=placed.order, price=price - 0.01))
+        sim.order_send(dict(action=mta.TRADE_ACTION.SLTP, position=kept.ticket, sl=1.0))
+        assert engine.poll() == []  # found by the next snapshot
+        engine._snapshot_due = 0
+        events = engine.poll()
+        assert {(e.type, e.data.ticket) for e in events} == {(EVENT.ORDER_MODIFIED, placed.order),
+                                                             (EVENT.POSITION_CHANGED, kept.ticket)}
+        sim.order_send(dict(action=mta.TRADE_ACTION.REMOVE, order=placed.order))
+        sim.advance(1)
+        closed = sim.Sell('GBPUSD', 0.2, ticket=buy.order)
+        events = engine.poll()
+        assert {(e.type, e.data.ticket) for e in events} == {(EVENT.ORDER_REMOVED, placed.order),
+                                                             (EVENT.DEAL_ADDED, closed.deal),
+                                                             (EVENT.POSITION_CLOSED, buy.order)}
+        closing = next(e for e in events if e.type == EVENT.POSITION_CLOSED)
+        assert closing.time_msc == next(e for e in events if e.type == EVENT.DEAL_ADDED).data.time_msc
+        with pytest.raises(ValueError):
+            engine.subscribe(None, None, EVENT.TICK_LAST_CHANGE)
+
+
+def test_engine_ignores_the_api_state_and_skips_failed_symbols():
+    engine = EventEngine([('EURUSD', mta.TIMEFRAME.M1, EVENT.TICK_LAST_CHANGE | EVENT.NEW_BAR),
+                          ('NOPE', mta.TIMEFRAME.M1, EVENT.TICK_LAST_CHANGE | EVENT.NEW_BAR)])
+    with mta.connected(return_as_native_python_objects='columns', raise_on_errors=True):
+        assert engine.poll() == []
+        sim.advance(15)
+        events = engine.poll()
+    assert {e.symbol for e in events} == {'EURUSD'} and EVENT.NEW_BAR in {e.type for e in events}
+    assert all(isinstance(e.data, (mta.types.CopyTick, mta.types.CopyRate)) for e in events)
+
+
+def test_failed_trade_reads_keep_the_last_snapshot(monkeypatch):
+    engine = EventEngine([(None, None, EVENT.POSITION_OPENED | EVENT.ORDER_PLACED | EVENT.DEAL_ADDED)],
+                         snapshot_interval=3600)
+    with mta.connected():
+        sim.Buy('EURUSD', 0.1)
+        assert engine.poll() == []
+        with monkeypatch.context() as patch:
+            for name in ('mt5_history_deals_get', 'mt5_positions_get', 'mt5_orders_get'):
+                patch.setattr(event, name, lambda *args: None)
+            sim.advance(1)
+            buy = sim.Buy('GBPUSD', 0.2)
+            assert engine.poll() == []
+        assert [(e.type, e.data.ticket) for e in engine.poll()] == [(EVENT.DEAL_ADDED, buy.deal),
+                                                                    (EVENT.POSITION_OPENED, buy.order)]
+        with monkeypatch.context() as patch:
+            patch.setattr(event, 'mt5_positions_get', lambda *args: None)
+            sim.advance(1)
+            sell = sim.Sell('USDJPY', 0.3)
+            assert [(e.type, e.data.ticket) for e in engine.poll()] == [(EVENT.DEAL_ADDED, sell.deal)]
+        # the failed snapshot is taken in the next cycle although no count changes any more
+        assert [(e.type, e.data.ticket) for e in engine.poll()] == [(EVENT.POSITION_OPENED, sell.order)]
+
+
+def test_new_subscriptions_do_not_read_the_deal_history(monkeypatch):
+    requested = []
+
+    def history_deals_get(date_from, date_to):
+        requested.append(date_from)
+        return sim.history_deals_get(date_from, date_to)
+
+    monkeypatch.setattr(event, 'mt5_history_deals_get', history_deals_get)
+    engine = EventEngine([('EURUSD', None, EVENT.TICK_LAST_CHANGE | EVENT.DEAL_ADDED)])
+    with mta.connected():
+        sim.set_time(START.timestamp() - 3 * 86400)
+        old = sim.Buy('EURUSD', 0.1)
+        sim.set_time(START)
+        sim.Sell('EURUSD', 0.1, ticket=old.order)
+        assert engine.poll() == []
+        # the last deal is found in the 1 day window back from the server time, the older one is not read
+        assert len(requested) == 1 and abs(requested[0] - (START.timestamp() - 86400)) <= 1
+        sim.advance(1)
+        buy = sim.Buy('EURUSD', 0.2)
+        assert [(e.type, e.data.ticket) for e in engine.poll()] == [(EVENT.DEAL_ADDED, buy.deal)]
+    engine = EventEngine([(None, None, EVENT.DEAL_ADDED)])
+    with mta.connected():
+        sim.shutdown()
+        assert engine.poll() == []
+        assert engine._deals is None  # seeded by the next successful poll
@@ -0,0 +1,40 @@
+import pickle
+from datetime import datetime
+from datetime import timezone
+
+import numpy
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import backend
+from pymt5adapter.helpers import is_rates_array
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+
+
+def test_rates_frame_is_a_view():
+    with mta.connected():
+        rates = mta.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.M15, 0, 500)
+        ticks = mta.copy_ticks_from('EURUSD', datetime(2020, 6, 3, 11, tzinfo=timezone.utc), 1000,
+                                    mta.COPY_TICKS_ALL)
+    bars = mta.RatesFrame(rates)
+    assert len(bars) == 500 and numpy.asarray(bars) is rates
+    for column in (bars.time, bars.open, bars.high, bars.low, bars.close, bars['spread'], bars.datetime):
+        assert numpy.shares_memory(column, rates)
+    assert numpy.array_equal(bars.high - bars.low, rates['high'] - rates['low'])
+    assert bars.datetime[-1] == numpy.datetime64('2020-06-03T12:00:00')
+    day = bars.between(datetime(2020, 6, 2), datetime(2020, 6, 2, 23, 45))
+    assert len(day) == 96 and numpy.shares_memory(day.close, rates)
+    assert day.datetime[0] == numpy.datetime64('2020-06-02T00:00:00')
+    assert bars.between(start=datetime(2020, 6, 3, 11, 30)).time.tolist() == rates['time'][-3:].tolist()
+    assert bars[-1] == bars[499:] and isinstance(bars[rates['close'] > rates['open']], mta.RatesFrame)
+    assert pickle.loads(pickle.dumps(bars)) == bars
+    frame = mta.TicksFrame(ticks)
+    second = frame.between(datetime(2020, 6, 3, 11, 0, 1), datetime(2020, 6, 3, 11, 0, 1, 999000))
+    assert len(second) and (second.time == int(datetime(2020, 6, 3, 11, 0, 1, tzinfo=timezone.utc).timestamp())).all()
+    assert frame.datetime.dtype == numpy.dtype('datetime64[ms]') and numpy.shares_memory(frame.ask, ticks)
+    with pytest.raises(TypeError):
+        mta.RatesFrame(ticks)
+    assert is_rates_array(rates) and not is_rates_array(ticks) and is_rates_array(rates.tolist())
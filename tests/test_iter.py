@@ -0,0 +1,41 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+import numpy
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import backend
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+WEDNESDAY_NOON = datetime(2020, 6, 3, 12, 0, tzinfo=timezone.utc)
+
+
+def test_iter_rates_and_ticks():
+    t_from = datetime(2020, 6, 1, tzinfo=timezone.utc)
+    with mta.connected():
+        expected = mta.copy_rates_range('EURUSD', mta.TIMEFRAME.M5, t_from, WEDNESDAY_NOON)
+        for chunk in (100, timedelta(hours=5)):
+            chunks = list(mta.iter_rates('EURUSD', mta.TIMEFRAME.M5, t_from, WEDNESDAY_NOON, chunk=chunk))
+            assert len(chunks) > 5 and all(len(c) <= 100 for c in chunks if chunk == 100)
+            assert numpy.array_equal(numpy.concatenate(chunks), expected)
+        tick_from = datetime(2020, 6, 3, 10, 0, 0, 500000, tzinfo=timezone.utc)
+        tick_to = datetime(2020, 6, 3, 10, 20, tzinfo=timezone.utc)
+        ticks = mta.copy_ticks_range('EURUSD', tick_from, tick_to, mta.COPY_TICKS_ALL)
+        assert (numpy.diff(ticks['time_msc']) == 0).any()  # ties to split correctly
+        for chunk in (97, timedelta(seconds=7, milliseconds=333)):
+            chunks = list(mta.iter_ticks('EURUSD', tick_from, tick_to, mta.COPY_TICKS_ALL, chunk=chunk))
+            assert numpy.array_equal(numpy.concatenate(chunks), ticks)
+            assert all(a['time_msc'][-1] < b['time_msc'][0] for a, b in zip(chunks, chunks[1:]))
+        assert max(len(c) for c in mta.iter_ticks('EURUSD', tick_from, tick_to, mta.COPY_TICKS_ALL, chunk=97)) <= 97
+        assert list(mta.iter_ticks('NOPE', tick_from, tick_to, mta.COPY_TICKS_ALL)) == []
+    with mta.connected(raise_on_errors=True):
+        with pytest.raises(mta.MT5Error):
+            next(mta.iter_rates('NOPE', mta.TIMEFRAME.M5, t_from, WEDNESDAY_NOON))
+        for chunk in (97, timedelta(minutes=1)):
+            with pytest.raises(mta.MT5Error) as error:
+                next(mta.iter_ticks('NOPE', tick_from, tick_to, mta.COPY_TICKS_ALL, chunk=chunk))
+            assert error.value.error_code == sim.last_error()[0]
@@ -0,0 +1,103 @@
+import logging
+
+import numpy
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import backend
+from pymt5adapter.journal import HEADER_SIZE
+from pymt5adapter.journal import JOURNAL_DTYPE
+from pymt5adapter.journal import OrderJournal
+from pymt5adapter.journal import read_journal
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+
+
+def test_order_traffic_is_journaled(tmp_path):
+    path = tmp_path / 'orders.jnl'
+    with mta.connected(journal=path, return_as_dict=True) as conn:
+        buy = dict(action=mta.TRADE_ACTION_DEAL, symbol='EURUSD', type=mta.ORDER_TYPE_BUY, volume=0.1, magic=3)
+        assert mta.order_check(buy)['retcode'] == 0
+        sent = mta.order_send(buy)
+        mta.order_send(action=mta.TRADE_ACTION_DEAL, symbol='EURUSD', type=mta.ORDER_TYPE_BUY, volume=0.0)
+        mta.order_send(action=mta.TRADE_ACTION_DEAL, symbol='EURUSD', type=mta.ORDER_TYPE_BUY, volume='x')
+        mta.symbol_info_tick('EURUSD')
+        journal = conn.journal
+    assert journal.closed
+    records = read_journal(path)
+    assert isinstance(records, numpy.memmap) and records.dtype == JOURNAL_DTYPE
+    assert list(records['function']) == [2, 1, 1, 1]
+    assert list(records['retcode']) == [0, mta.TRADE_RETCODE_DONE] + [mta.TRADE_RETCODE_INVALID_VOLUME] * 2
+    assert not records['error_code'].any()
+    done = records[1]
+    assert done['order'] == sent['order'] and done['deal'] == sent['deal']
+    assert done['fill_price'] == sent['price'] and done['volume'] == 0.1 and done['magic'] == 3
+    assert done['symbol'] == b'EURUSD' and done['latency_ns'] > 0
+
+
+def test_failed_calls_share_the_last_error(tmp_path, monkeypatch):
+    calls = []
+
+    def counting_last_error():
+        calls.append(1)
+        return sim.last_error()
+
+    monkeypatch.setattr(mta.core, 'mt5_last_error', counting_last_error)
+    logger = mta.get_logger(path_to_logfile=tmp_path / 'failed.log', loglevel=logging.DEBUG)
+    for i, settings in enumerate([dict(), dict(logger=logger), dict(raise_on_errors=True)]):
+        path = tmp_path / f'failed{i}.jnl'
+        with mta.connected(journal=path, **settings):
+            sim.shutdown()  # order_send returns None
+            calls.clear()
+            try:
+                mta.order_send(action=mta.TRADE_ACTION_DEAL, symbol='EURUSD', type=mta.ORDER_TYPE_BUY, volume=0.1)
+            except mta.MT5Error:
+                assert settings.get('raise_on_errors')
+            assert len(calls) == 1
+        record, = read_journal(path)
+        assert record['error_code'] == mta.ERROR_CODE.INTERNAL_FAIL_CONN and record['retcode'] == 0
+
+
+def test_rotation_and_backups(tmp_path):
+    path = tmp_path / 'orders.jnl'
+    journal = OrderJournal(path, max_bytes=HEADER_SIZE + 3 * JOURNAL_DTYPE.itemsize, backup_count=2)
+    with mta.connected(journal=journal):
+        for i in range(10):
+            mta.order_check(action=mta.TRADE_ACTION_DEAL, symbol='EURUSD', type=mta.ORDER_TYPE_BUY,
+                            volume=0.01, magic=i)
+    assert not journal.closed
+    journal.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['orders.jnl', 'orders.jnl.1', 'orders.jnl.2']
+    assert list(read_journal(path)['magic']) == [9]
+    assert list(read_journal(path, include_backups=True)['magic']) == [3, 4, 5, 6, 7, 8, 9]
+    # reopening appends and drops a torn trailing record
+    with open(path, 'ab') as f:
+        f.write(b'\0' * 5)
+    with OrderJournal(path) as journal:
+        journal.record('order_send', (), dict(symbol='GBPUSD', volume=1.0), None, 10, -2)
+    records = read_journal(path)
+    assert list(records['symbol']) == [b'EURUSD', b'GBPUSD']
+    assert records[-1]['retcode'] == 0 and records[-1]['error_code'] == -2 and records[-1]['volume'] == 1.0
+
+
+def test_journal_failures_never_lose_the_result(tmp_path, capsys):
+    logger = mta.get_logger(path_to_logfile=tmp_path / 'journal.log', loglevel=logging.INFO)
+    for i, settings in enumerate([dict(), dict(logger=logger)]):
+        with mta.connected(journal=tmp_path / f'closed{i}.jnl', **settings) as conn:
+            conn.journal.close()
+            result = mta.order_send(action=mta.TRADE_ACTION_DEAL, symbol='EURUSD', type=mta.ORDER_TYPE_BUY,
+                                    volume=0.1)
+            assert result.retcode == mta.TRADE_RETCODE_DONE
+            assert conn.journal.errors == 1
+    assert 'OrderJournal error in order_send' in capsys.readouterr().err
+    assert 'journal_error' in (tmp_path / 'journal.log').read_text()
+    # out of range integers are clamped instead of failing the record
+    path = tmp_path / 'range.jnl'
+    with mta.connected(journal=path) as conn:
+        mta.order_check(action=mta.TRADE_ACTION_DEAL, symbol='EURUSD', type=mta.ORDER_TYPE_BUY, volume=0.1,
+                        magic=-1, position=-5, order=2 ** 70)
+        assert conn.journal.errors == 0
+    record, = read_journal(path)
+    assert record['magic'] == -1 and record['position'] == 0 and record['order'] == 2 ** 64 - 1
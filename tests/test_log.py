@@ -0,0 +1,167 @@
+import json
+import logging
+import threading
+from datetime import datetime
+
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter.log import QueueFileHandler
+
+
+def read_entries(path):
+    return [json.loads(line.split('\t')[3]) for line in path.read_text().splitlines()]
+
+
+@pytest.mark.simulator
+def test_queued_logger_is_drained_on_exit(tmp_path):
+    path = tmp_path / 'queued.log'
+    logger = mta.get_logger(path_to_logfile=path, loglevel=logging.DEBUG, queued=True)
+    handler, = logger.handlers
+    assert isinstance(handler, QueueFileHandler)
+    with mta.connected(logger=logger):
+        for _ in range(100):
+            mta.symbol_info_tick('EURUSD')
+        mta.order_send(action=mta.TRADE_ACTION_DEAL, symbol='EURUSD', type=mta.ORDER_TYPE_BUY, volume=0.01)
+    assert handler._writer is None
+    types = [entry['type'] for entry in read_entries(path)]
+    assert types[0] == 'terminal_connection_state' and types[-1] == 'terminal_connection_state'
+    assert types.count('function_debugging') == 101
+    assert types.index('order_request') < types.index('order_response')
+
+
+def test_records_are_formatted_on_the_writer_thread(tmp_path):
+    formatted_on = []
+
+    class Message:
+        def __str__(self):
+            formatted_on.append(threading.current_thread().name)
+            return json.dumps({'type': 'probe'})
+
+    path = tmp_path / 'thread.log'
+    logger = mta.get_logger(path_to_logfile=path, loglevel=logging.INFO, queued=True)
+    logger.propagate = False  # pytest's capture handler on the root logger formats on the calling thread
+    logger.info(Message())
+    logger.handlers[0].flush()
+    assert formatted_on == ['pymt5adapter-log-writer']
+    mta.log.stop_queued_logging(logger)
+
+
+def test_drop_when_full(tmp_path):
+    path = tmp_path / 'drop.log'
+    logger = mta.get_logger(path_to_logfile=path, loglevel=logging.INFO, queued=True, max_queue_size=2,
+                            drop_when_full=True)
+    handler = logger.handlers[0]
+    handler.handler.acquire()  # stall the writer
+    try:
+        for i in range(50):
+            logger.info(mta.LogJson('Probe', {'type': 'probe', 'i': i}))
+    finally:
+        handler.handler.release()
+    mta.log.stop_queued_logging(logger)
+    entries = read_entries(path)
+    dropped = [e for e in entries if e['type'] == 'log_records_dropped']
+    assert handler.dropped > 0 and sum(e['count'] for e in dropped) == handler.dropped
+    assert len(entries) - len(dropped) + handler.dropped == 50
+
+
+def test_records_logged_while_stopping_are_written(tmp_path):
+    path = tmp_path / 'stopping.log'
+    logger = mta.get_logger(path_to_logfile=path, loglevel=logging.INFO, queued=True)
+    handler = logger.handlers[0]
+    logger.info(mta.LogJson('Probe', {'type': 'probe', 'i': 0}))
+    writer = handler._writer
+    join = writer.join
+
+    def join_then_log():
+        join()  # the writer has exited but is not cleared yet
+        logger.info(mta.LogJson('Probe', {'type': 'probe', 'i': 1}))
+
+    writer.join = join_then_log
+    mta.log.stop_queued_logging(logger)
+    assert handler._writer is None and handler.queue.empty()
+    assert [e['i'] for e in read_entries(path)] == [0, 1]
+
+
+def test_queue_file_handler_requires_a_file_handler():
+    with pytest.raises(TypeError):
+        QueueFileHandler(logging.StreamHandler())
+
+
+def test_log_json_caches_its_rendering():
+    entry = mta.LogJson('Probe', {'type': 'probe', 'when': datetime(2020, 1, 1)})
+    rendered = str(entry)
+    assert rendered.startswith('Probe\t') and '2020-01-01' in rendered
+    assert str(entry) is rendered
+    entry['x'] = 1
+    assert str(entry) is not rendered and '"x": 1' in str(entry)
+    entry.update(y=2)
+    assert '"y": 2' in str(entry)
+
+
+@pytest.mark.simulator
+def test_records_are_not_built_unless_emitted(tmp_path, monkeypatch):
+    built = []
+
+    class CountingLogJson(mta.LogJson):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            built.append(self['type'])
+
+    logger = logging.getLogger('pymt5adapter.test_lazy_records')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = logging.FileHandler(tmp_path / 'lazy.log')
+    handler.setLevel(logging.WARNING)
+    logger.addHandler(handler)
+    try:
+        with mta.connected(logger=logger):
+            monkeypatch.setattr(mta.core._h, 'LogJson', CountingLogJson)
+            mta.symbol_info_tick('EURUSD')
+            mta.order_send(action=mta.TRADE_ACTION_DEAL, symbol='EURUSD', type=mta.ORDER_TYPE_BUY, volume=0.01)
+            assert built == []
+            mta.symbol_info_tick('NOPE')
+            assert built == ['function_debugging']
+            handler.setLevel(logging.DEBUG)
+            mta.symbol_info_tick('EURUSD')
+            assert built[-1] == 'function_debugging' and len(built) == 2
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def test_log_rate_limiter(monkeypatch):
+    from pymt5adapter import ratelimit
+    clock = [0.0]
+    monkeypatch.setattr(ratelimit.time, 'monotonic', lambda: clock[0])
+    limiter = ratelimit.LogRateLimiter(burst=3, interval=10, sample_every=5)
+    key = ('symbol_info_tick', -1)
+    emitted = [limiter.check(key)[0] for _ in range(23)]
+    assert emitted[:3] == [True] * 3 and sum(emitted) == 3 + 4
+    other = ('copy_ticks_range', -1)
+    assert limiter.check(other) == (True, ())
+    clock[0] = 10.0
+    # an ended window is reported by the next check of any key
+    emit, summaries = limiter.check(other)
+    assert emit and summaries == [dict(function='symbol_info_tick', error_code=-1, emitted=7, suppressed=16,
+                                       window_s=10)]
+    assert limiter.check(key) == (True, ())
+    limiter.check(key), limiter.check(key), limiter.check(key)
+    assert limiter.flush() == [dict(function='symbol_info_tick', error_code=-1, emitted=3, suppressed=1, window_s=0)]
+    assert limiter.flush() == []
+
+
+@pytest.mark.simulator
+def test_failure_storms_are_rate_limited(tmp_path):
+    path = tmp_path / 'storm.log'
+    logger = mta.get_logger(path_to_logfile=path, loglevel=logging.INFO)
+    limiter = mta.ratelimit.LogRateLimiter(burst=5, sample_every=100)
+    with mta.connected(logger=logger, log_rate_limiter=limiter):
+        for _ in range(1000):
+            mta.symbol_info_tick('DEAD')
+        mta.symbol_info('DEAD')
+    entries = read_entries(path)
+    debugging = [e['call_signature']['function'] for e in entries if e['type'] == 'function_debugging']
+    assert debugging.count('symbol_info_tick') == 5 + 9 and debugging.count('symbol_info') == 1
+    summary, = [e for e in entries if e['type'] == 'function_debugging_suppressed']
+    assert summary['function'] == 'symbol_info_tick' and summary['suppressed'] == 1000 - 14
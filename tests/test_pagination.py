@@ -0,0 +1,35 @@
+from datetime import datetime
+from datetime import timezone
+
+import numpy
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import backend
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+WEDNESDAY_NOON = datetime(2020, 6, 3, 12, 0, tzinfo=timezone.utc)
+
+
+def test_paginated_rates():
+    sim.configure(maxbars=1000)
+    with mta.connected():
+        assert mta.core._state.max_bars == 1000
+        rates = mta.copy_rates('EURUSD', mta.TIMEFRAME.M1, count=5000, paginate=True)
+        assert len(rates) == 5000 and numpy.all(numpy.diff(rates['time']) > 0)
+        assert rates[-1]['time'] == int(WEDNESDAY_NOON.timestamp())
+        assert len(mta.copy_rates('EURUSD', mta.TIMEFRAME.M1, count=5000)) == 999
+        t_from, t_to = datetime(2020, 5, 1, tzinfo=timezone.utc), datetime(2020, 5, 20, tzinfo=timezone.utc)
+        assert mta.copy_rates_range('EURUSD', mta.TIMEFRAME.M5, t_from, t_to) is None
+        ranged = mta.copy_rates_range('EURUSD', mta.TIMEFRAME.M5, t_from, t_to, paginate=True)
+        assert ranged[0]['time'] == t_from.timestamp() and ranged[-1]['time'] == t_to.timestamp()
+        assert ranged.base is None  # weekends leave the preallocation partly empty: not kept alive by a view
+        sim.configure(maxbars=100_000)
+        assert numpy.array_equal(ranged, mta.copy_rates_range('EURUSD', mta.TIMEFRAME.M5, t_from, t_to))
+        sim.configure(maxbars=1000)
+        early = mta.copy_rates('EURUSD', mta.TIMEFRAME.D1, datetime_from=datetime(2015, 3, 1), count=3000,
+                               paginate=True)
+        assert early[0]['time'] == datetime(2015, 1, 1, tzinfo=timezone.utc).timestamp()
+        assert early[-1]['time'] == datetime(2015, 3, 1, tzinfo=timezone.utc).timestamp() - 86400 * 2
@@ -0,0 +1,67 @@
+from datetime import datetime
+from datetime import timezone
+
+import numpy
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import backend
+from pymt5adapter.ratescache import RatesCache
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+START = datetime(2020, 6, 3, 12, 0, 30, tzinfo=timezone.utc)
+
+
+def test_cached_windows_follow_bar_0():
+    requested = []
+
+    def fetch(symbol, timeframe, start_pos, count):
+        requested.append(count)
+        return sim.copy_rates_from_pos(symbol, timeframe, start_pos, count)
+
+    cache = RatesCache()
+    with mta.connected():
+        def check(start_pos=0):
+            rates = cache.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.M1, start_pos, 500, fetch)
+            assert numpy.array_equal(rates, sim.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.M1, start_pos, 500))
+            assert not rates.flags.writeable
+            return rates
+
+        first = check()
+        assert check() is first and requested == [1, 500, 1]
+        sim.advance(20)  # bar 0 is still forming
+        refreshed = check()
+        assert refreshed[-1] != first[-1] and numpy.array_equal(refreshed[:-1], first[:-1]) and requested[-1] == 1
+        sim.advance(185)  # three new bars
+        del requested[:]
+        check()
+        assert requested == [1, 4]
+        check(start_pos=10)
+        sim.advance(60)
+        check(start_pos=10)
+        assert requested[-2:] == [1, 500]
+        # across the weekend the bound on the new bars (one per minute) exceeds the window: requested again
+        sim.set_time(datetime(2020, 6, 8, 0, 5, tzinfo=timezone.utc))
+        check()
+        assert requested[-2:] == [1, 500]
+    info = cache.info()
+    assert (info.hits, info.misses, info.updates, info.entries) == (3, 4, 2, 2)
+    assert info.nbytes == 2 * first.nbytes
+    cache.clear()
+    assert cache.info() == mta.types.RatesCacheInfo(0, 0, 0, 0, 0)
+
+
+def test_connected_rates_cache_is_bounded():
+    with mta.connected(rates_cache=RatesCache(max_bytes=25_000)) as conn:
+        rates = mta.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.M5, 0, 200)
+        assert mta.copy_rates(symbol='EURUSD', timeframe=mta.TIMEFRAME.M5, start_pos=0, count=200) is rates
+        for symbol in ('GBPUSD', 'USDJPY'):
+            mta.copy_rates_from_pos(symbol, mta.TIMEFRAME.M5, 0, 200)
+        assert conn.rates_cache.info().entries == 2  # 9600 bytes each: the EURUSD window was evicted
+        assert mta.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.M5, 0, 200) is not rates
+        assert mta.copy_rates_from_pos('NOPE', mta.TIMEFRAME.M5, 0, 200) is None
+        assert conn.rates_cache.info().misses == 4
+    with mta.connected(rates_cache=True) as conn:
+        assert isinstance(conn.rates_cache, RatesCache)
@@ -0,0 +1,63 @@
+from datetime import datetime
+from datetime import timezone
+
+import numpy
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import backend
+from pymt5adapter.resample import bar_open_time
+from pymt5adapter.resample import resample_rates
+from pymt5adapter.resample import resample_rates_many
+from pymt5adapter.resample import resample_ticks
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+
+
+def test_bar_alignment():
+    t = int(datetime(2020, 6, 3, 13, 47, 5, tzinfo=timezone.utc).timestamp())  # a Wednesday
+    expected = {
+        mta.TIMEFRAME.M15: datetime(2020, 6, 3, 13, 45),
+        mta.TIMEFRAME.H4 : datetime(2020, 6, 3, 12),
+        mta.TIMEFRAME.D1 : datetime(2020, 6, 3),
+        mta.TIMEFRAME.W1 : datetime(2020, 5, 31),
+        mta.TIMEFRAME.MN1: datetime(2020, 6, 1),
+    }
+    for timeframe, open_time in expected.items():
+        assert bar_open_time(t, timeframe) == open_time.replace(tzinfo=timezone.utc).timestamp()
+
+
+def test_resampled_rates_match_the_terminal():
+    t_from, t_to = datetime(2020, 3, 1, tzinfo=timezone.utc), datetime(2020, 6, 3, 12, 0, tzinfo=timezone.utc)
+    with mta.connected():
+        m1 = mta.copy_rates_range('EURUSD', mta.TIMEFRAME.M1, t_from, t_to, paginate=True)
+        timeframes = (mta.TIMEFRAME.MN1, mta.TIMEFRAME.M5, mta.TIMEFRAME.H1, mta.TIMEFRAME.H4, mta.TIMEFRAME.D1,
+                      mta.TIMEFRAME.W1, mta.TIMEFRAME.M3)
+        many = resample_rates_many(m1, timeframes)
+        assert set(many) == set(timeframes)
+        for timeframe in timeframes:
+            expected = mta.copy_rates_range('EURUSD', timeframe, int(bar_open_time(m1['time'][0], timeframe)), t_to)
+            assert numpy.array_equal(resample_rates(m1, timeframe), expected), mta.TIMEFRAME(timeframe).name
+            assert numpy.array_equal(many[timeframe], expected), mta.TIMEFRAME(timeframe).name
+        h1 = resample_rates(m1, mta.TIMEFRAME.H1)
+        assert numpy.array_equal(resample_rates(h1, mta.TIMEFRAME.D1), resample_rates(m1, mta.TIMEFRAME.D1))
+    assert len(resample_rates(m1[:0], mta.TIMEFRAME.H1)) == 0
+    assert len(resample_rates_many(m1[:0], [mta.TIMEFRAME.H1, mta.TIMEFRAME.D1])[mta.TIMEFRAME.D1]) == 0
+
+
+def test_resampled_ticks():
+    with mta.connected():
+        ticks = mta.copy_ticks_range('EURUSD', datetime(2020, 6, 3, 10, 58, tzinfo=timezone.utc),
+                                     datetime(2020, 6, 3, 11, 2, tzinfo=timezone.utc), mta.COPY_TICKS_ALL)
+    ticks[5]['bid'] = 0.0
+    bars = resample_ticks(ticks, mta.TIMEFRAME.M1, point=0.00001)
+    assert list(bars['time'] % 60) == [0] * len(bars) and len(bars) == 4
+    valid = ticks[ticks['bid'] != 0]
+    first = valid[valid['time_msc'] // 60_000 == bars['time'][0] // 60]
+    assert bars['open'][0] == first['bid'][0] and bars['close'][0] == first['bid'][-1]
+    assert bars['high'][0] == first['bid'].max() and bars['low'][0] == first['bid'].min()
+    assert bars['tick_volume'][0] == len(first) and bars['tick_volume'].sum() == len(valid)
+    assert bars['spread'][0] == round((first['ask'] - first['bid']).min() / 0.00001)
+    assert not resample_ticks(ticks, mta.TIMEFRAME.M1)['spread'].any()
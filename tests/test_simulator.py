@@ -0,0 +1,104 @@
+import os
+
+from datetime import datetime
+from datetime import timezone
+
+import numpy
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import backend
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+WEDNESDAY_NOON = datetime(2020, 6, 3, 12, 0, tzinfo=timezone.utc)
+
+
+def test_backend_selection():
+    assert backend.load_backend('simulator') is sim
+    assert mta.__version__['MetaTrader5'] == sim.__version__
+    assert mta.Tick is sim.Tick
+
+
+def test_requires_connection():
+    assert mta.symbol_info_tick('EURUSD') is None
+    assert mta.last_error()[0] == mta.ERROR_CODE.INTERNAL_FAIL_CONN
+
+
+def test_rates_are_deterministic():
+    with mta.connected():
+        r1 = mta.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.M1, 0, 500)
+        r2 = mta.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.M1, 0, 500)
+        assert len(r1) == 500
+        assert numpy.array_equal(r1, r2)
+        assert r1[-1]['time'] == int(WEDNESDAY_NOON.timestamp())
+        assert numpy.all(numpy.diff(r1['time']) > 0)
+        assert numpy.all(r1['high'] >= numpy.maximum(r1['open'], r1['close']))
+        assert numpy.all(r1['low'] <= numpy.minimum(r1['open'], r1['close']))
+        h1 = mta.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.H1, 1, 1)[0]
+        m1 = mta.copy_rates_range('EURUSD', mta.TIMEFRAME.M1, int(h1['time']), int(h1['time']) + 3599)
+        assert h1['open'] == m1[0]['open'] and h1['close'] == m1[-1]['close']
+        assert h1['high'] == m1['high'].max() and h1['low'] == m1['low'].min()
+
+
+def test_rates_respect_maxbars():
+    with mta.connected():
+        maxbars = mta.terminal_info().maxbars
+        assert mta.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.M1, 0, maxbars) is None
+        assert mta.last_error()[0] == mta.ERROR_CODE.INVALID_PARAMS
+
+
+def test_weekend_has_no_data():
+    saturday = datetime(2020, 6, 6, 12, 0, tzinfo=timezone.utc)
+    with mta.connected():
+        assert len(mta.copy_ticks_range('EURUSD', saturday, saturday.timestamp() + 3600, mta.COPY_TICKS.ALL)) == 0
+        sim.set_time(saturday)
+        assert mta.symbol_info_tick('EURUSD').time < datetime(2020, 6, 6, tzinfo=timezone.utc).timestamp()
+
+
+def test_ticks():
+    with mta.connected():
+        ticks = mta.copy_ticks_range('EURUSD', WEDNESDAY_NOON.timestamp() - 60, WEDNESDAY_NOON,
+                                     mta.COPY_TICKS.ALL)
+        assert len(ticks) > 0
+        assert numpy.all(numpy.diff(ticks['time_msc']) >= 0)
+        assert numpy.all(ticks['ask'] > ticks['bid'])
+        assert ticks[-1]['time_msc'] == mta.symbol_info_tick('EURUSD').time_msc
+        ticks_from = mta.copy_ticks_from('EURUSD', WEDNESDAY_NOON.timestamp() - 60, 10, mta.COPY_TICKS.ALL)
+        assert numpy.array_equal(ticks_from, ticks[:10])
+
+
+def test_trading_round_trip():
+    with mta.connected():
+        result = mta.order_send(action=mta.TRADE_ACTION_DEAL, symbol='EURUSD', type=mta.ORDER_TYPE_BUY,
+                                volume=1.0, magic=7)
+        assert result.retcode == mta.TRADE_RETCODE_DONE
+        positions = mta.positions_get(symbol='EURUSD')
+        assert len(positions) == 1 and positions[0].magic == 7
+        result = mta.order_send(action=mta.TRADE_ACTION_DEAL, symbol='EURUSD', type=mta.ORDER_TYPE_SELL,
+                                volume=1.0, position=positions[0].ticket)
+        assert result.retcode == mta.TRADE_RETCODE_DONE
+        assert mta.positions_total() == 0
+        deals = mta.history_deals_get(position=positions[0].ticket)
+        assert [d.entry for d in deals] == [mta.DEAL_ENTRY_IN, mta.DEAL_ENTRY_OUT]
+        assert mta.order_send(action=mta.TRADE_ACTION_DEAL, symbol='EURUSD', type=mta.ORDER_TYPE_BUY,
+                              volume=0.0).retcode == mta.TRADE_RETCODE_INVALID_VOLUME
+
+
+def test_symbol_groups():
+    with mta.connected():
+        names = {s.name for s in mta.symbols_get(group='*USD*, !EUR*')}
+        assert 'GBPUSD' in names and 'EURUSD' not in names
+        sim.configure(symbols=['AAA', 'BBB'])
+        assert mta.symbols_total() == 2
+
+
+def test_benchmark_covers_dispatch():
+    import sys
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+    import bench_overhead
+    with mta.connected():
+        cases = bench_overhead.build_cases(0)
+    missing = set(mta.core.get_function_dispatch()) - set(cases) - bench_overhead.SKIPPED
+    assert not missing
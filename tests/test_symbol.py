@@ -0,0 +1,36 @@
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import backend
+from pymt5adapter.symbol import Symbol
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+
+
+def test_symbol_daily_bar_cache(monkeypatch):
+    calls = []
+
+    def counting_copy_rates_from_pos(*args):
+        calls.append(args[0])
+        return sim.copy_rates_from_pos(*args)
+
+    monkeypatch.setattr(mta.symbol, 'mt5_copy_rates_from_pos', counting_copy_rates_from_pos)
+    with mta.connected() as conn:
+        day = sim.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.D1, 0, 1)[0]
+        eurusd = Symbol('EURUSD', daily_interval=60)
+        symbols = [eurusd, Symbol('GBPUSD', daily_interval=60), Symbol('USDJPY', daily_interval=60)]
+        # the daily bar is read with the raw call, so the return type and raise_on_errors settings do not apply
+        conn.native_python_objects = 'columns'
+        conn.raise_on_errors = True
+        assert eurusd.day_volume == day['tick_volume'] > 0 and eurusd.day_real_volume == day['real_volume']
+        assert calls == ['EURUSD']
+        sim.advance(300)
+        assert eurusd.day_volume == day['tick_volume'] and len(calls) == 1
+        sim.advance(300)
+        Symbol.refresh_daily_bars(symbols)
+        assert calls[1:] == ['EURUSD', 'GBPUSD', 'USDJPY']
+        for symbol in symbols:
+            assert symbol.day_volume == sim.copy_rates_from_pos(symbol.name, mta.TIMEFRAME.D1, 0, 1)[0]['tick_volume']
+        assert eurusd.day_volume > day['tick_volume'] and len(calls) == 4
@@ -0,0 +1,78 @@
+from datetime import date
+from datetime import datetime
+from datetime import timezone
+
+import numpy
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import backend
+from pymt5adapter.tickarchive import TickArchive
+from pymt5adapter.tickarchive import TICKS_DTYPE
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+
+
+def test_archived_ranges_match_the_terminal(tmp_path):
+    archive = TickArchive(tmp_path)
+    t_from = datetime(2020, 6, 1, 22, 0, tzinfo=timezone.utc)
+    t_to = datetime(2020, 6, 3, 11, 0, tzinfo=timezone.utc)
+    with mta.connected():
+        ticks = mta.copy_ticks_range('EURUSD', t_from, t_to, mta.COPY_TICKS_ALL)
+        assert ticks.dtype == TICKS_DTYPE
+        assert archive.write('EURUSD', ticks[:len(ticks) // 2]) == len(ticks) // 2
+        # overlapping writes replace the stored ticks instead of duplicating them
+        archive.write('EURUSD', ticks[len(ticks) // 3:])
+        inner_from = datetime(2020, 6, 2, 9, 30, 0, 250000, tzinfo=timezone.utc)
+        inner_to = datetime(2020, 6, 2, 9, 45, tzinfo=timezone.utc)
+        inner = mta.copy_ticks_range('EURUSD', inner_from, inner_to, mta.COPY_TICKS_ALL)
+    assert archive.days('EURUSD') == [date(2020, 6, 1), date(2020, 6, 2), date(2020, 6, 3)]
+    assert numpy.array_equal(archive.copy_ticks_range('EURUSD', t_from, t_to), ticks)
+    assert numpy.array_equal(archive.copy_ticks_range('EURUSD', inner_from, inner_to), inner)
+    assert inner[0]['time_msc'] >= 1591090200250
+    columns = archive.columns('EURUSD', inner_from, inner_to, fields=['time_msc', 'bid'])
+    assert list(columns) == ['time_msc', 'bid']
+    assert isinstance(columns['bid'], numpy.memmap) and not columns['bid'].flags.writeable
+    assert columns['bid'].dtype == TICKS_DTYPE.fields['bid'][0]
+    assert numpy.array_equal(columns['time_msc'], inner['time_msc'])
+    spanning = archive.columns('EURUSD', t_from, t_to)
+    assert all(numpy.array_equal(spanning[name], ticks[name]) for name in TICKS_DTYPE.names)
+    assert len(archive.copy_ticks_range('EURUSD', t_to, t_from)) == 0
+    assert len(archive.columns('GBPUSD', t_from, t_to)['bid']) == 0
+
+
+def test_torn_columns_are_ignored(tmp_path):
+    archive = TickArchive(tmp_path)
+    with mta.connected():
+        ticks = mta.copy_ticks_from('EURUSD', datetime(2020, 6, 2, tzinfo=timezone.utc), 1000, mta.COPY_TICKS_ALL)
+    archive.write('EURUSD', ticks)
+    part = archive.path('EURUSD', date(2020, 6, 2))
+    with open(part / 'bid.col', 'r+b') as f:
+        f.truncate(990 * 8 + 3)
+    day = (datetime(2020, 6, 2, tzinfo=timezone.utc), datetime(2020, 6, 3, tzinfo=timezone.utc))
+    assert numpy.array_equal(archive.copy_ticks_range('EURUSD', *day), ticks[:990])
+    archive.write('EURUSD', ticks[980:])
+    assert numpy.array_equal(archive.copy_ticks_range('EURUSD', *day), ticks)
+    archive.clear()
+    assert archive.days('EURUSD') == []
+
+
+def test_out_of_order_writes_are_merged(tmp_path):
+    archive = TickArchive(tmp_path)
+    times = [datetime(2020, 6, 2, 10, 0, tzinfo=timezone.utc), datetime(2020, 6, 2, 11, 0, tzinfo=timezone.utc),
+             datetime(2020, 6, 2, 11, 30, tzinfo=timezone.utc)]
+    with mta.connected():
+        ticks = mta.copy_ticks_range('EURUSD', times[0], times[2], mta.COPY_TICKS_ALL)
+        late = mta.copy_ticks_range('EURUSD', times[1], times[2], mta.COPY_TICKS_ALL)
+        early = mta.copy_ticks_range('EURUSD', times[0], times[1], mta.COPY_TICKS_ALL)
+    archive.write('EURUSD', late)
+    held = archive.columns('EURUSD', times[1], times[2], fields=['bid'])['bid']
+    archive.write('EURUSD', early)
+    assert numpy.array_equal(archive.copy_ticks_range('EURUSD', times[0], times[2]), ticks)
+    # the views handed out before the rewrite still hold the old ticks
+    assert numpy.array_equal(held, late['bid'])
+    # rewriting a range in the middle keeps the ticks around it
+    archive.write('EURUSD', ticks[100:200])
+    assert numpy.array_equal(archive.copy_ticks_range('EURUSD', times[0], times[2]), ticks)
@@ -0,0 +1,210 @@
+import json
+import logging
+import pickle
+from datetime import datetime
+from datetime import timezone
+
+import pytest
+
+from .context import pymt5adapter as mta
+from pymt5adapter import backend
+from pymt5adapter.state import global_state as state
+
+pytestmark = pytest.mark.simulator
+
+sim = backend.mt5
+
+
+@pytest.fixture(autouse=True)
+def defaults():
+    state.set_defaults()
+    yield
+    state.set_defaults()
+
+
+@pytest.fixture
+def log_path(tmp_path, request):
+    # get_logger caches loggers by file name so every test needs its own
+    return tmp_path / f'{request.node.name}.log'
+
+
+@pytest.fixture
+def logger(log_path):
+    return mta.get_logger(path_to_logfile=log_path, loglevel=logging.DEBUG)
+
+
+def test_call_path_follows_state_changes():
+    with mta.connected() as conn:
+        assert isinstance(mta.symbol_info_tick('EURUSD'), mta.Tick)
+        conn.return_as_dict = True
+        assert isinstance(mta.symbol_info_tick('EURUSD'), dict)
+        conn.return_as_dict = False
+        conn.native_python_objects = True
+        assert isinstance(mta.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.M1, 0, 2), list)
+        conn.native_python_objects = False
+        assert mta.history_orders_total(',', ',') is None
+        conn.raise_on_errors = True
+        with pytest.raises(mta.MT5Error):
+            mta.history_orders_total(',', ',')
+    assert not state.raise_on_errors
+    assert mta.symbol_info_tick('EURUSD') is None
+
+
+def test_bare_call_path_is_the_function_itself():
+    func = mta.symbol_info_tick
+    with mta.connected():
+        assert func.active_call_path() is func.__wrapped__
+    with mta.connected(collect_metrics=True):
+        assert func.active_call_path() is not func.__wrapped__
+    with mta.connected(return_as_dict=True):
+        assert func.active_call_path() is not func.__wrapped__
+
+
+def test_state_is_context_local():
+    import asyncio
+    import threading
+    seen = {}
+
+    def worker(name, **settings):
+        if not settings:
+            seen[name] = type(mta.symbol_info_tick('EURUSD')), state.raise_on_errors
+            return
+        with mta.connected(manage_connection=False, **settings):
+            seen[name] = type(mta.symbol_info_tick('EURUSD')), state.raise_on_errors
+
+    with mta.connected(raise_on_errors=True):
+        # threads without state of their own follow the main thread
+        threads = [threading.Thread(target=worker, args=('inherits',)),
+                   threading.Thread(target=worker, args=('own',), kwargs=dict(return_as_dict=True, raise_on_errors=False))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert state.raise_on_errors and not state.return_as_dict
+
+        async def task(as_dict):
+            state.return_as_dict = as_dict
+            await asyncio.sleep(0)
+            return type(mta.symbol_info_tick('EURUSD'))
+
+        async def main():
+            return await asyncio.gather(task(True), task(False))
+
+        assert asyncio.run(main()) == [dict, mta.Tick]
+        assert not state.return_as_dict
+    assert seen == {'inherits': (mta.Tick, True), 'own': (dict, False)}
+    assert not state.raise_on_errors
+
+
+def test_logger_call_path(logger, log_path):
+    with mta.connected(logger=logger, raise_on_errors=True):
+        mta.symbol_info_tick('EURUSD')
+        with pytest.raises(mta.MT5Error):
+            mta.history_orders_total(',', ',')
+    log = log_path.read_text()
+    assert 'Function Debugging: symbol_info_tick' in log
+    assert 'Function Debugging: history_orders_total' in log
+
+
+def test_latency_is_per_call_across_threads(logger, log_path):
+    import json
+    import threading
+    sim.configure(call_latency={'order_send': 0.02, 'copy_ticks_range': 0.002})
+    now = int(sim.now())
+
+    def trade():
+        for _ in range(3):
+            mta.order_send(action=mta.TRADE_ACTION_DEAL, symbol='EURUSD', type=mta.ORDER_TYPE_BUY, volume=0.01)
+
+    def ticks():
+        for _ in range(10):
+            mta.copy_ticks_range('EURUSD', now - 60, now, mta.COPY_TICKS.ALL)
+
+    with mta.connected(logger=logger):
+        threads = [threading.Thread(target=target) for target in (trade, trade, ticks, ticks)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    entries = [json.loads(line.split('\t')[3]) for line in log_path.read_text().splitlines()]
+    latencies = {}
+    for entry in entries:
+        if entry['type'] == 'function_debugging':
+            latencies.setdefault(entry['call_signature']['function'], []).append(entry['latency_ms'])
+        elif entry['type'] == 'order_response':
+            latencies.setdefault('order_response', []).append(entry['latency_ms'])
+    assert len(latencies['order_send']) == len(latencies['order_response']) == 6
+    assert len(latencies['copy_ticks_range']) == 20
+    assert min(latencies['order_send'] + latencies['order_response']) >= 20
+    assert min(latencies['copy_ticks_range']) >= 2
+
+
+def test_latency_histograms():
+    from pymt5adapter.metrics import LatencyHistogram
+    histogram = LatencyHistogram('f')
+    for ns in [100] * 98 + [5000, 1_000_000]:
+        histogram.record(ns, returned_none=ns == 5000)
+    assert histogram.calls == 100 and histogram.none_calls == 1
+    assert histogram.percentile(50) == 127 and histogram.percentile(99) == 8191
+    assert histogram.percentile(100) == histogram.max_ns == 1_000_000
+
+    sim.configure(call_latency={'symbol_info_tick': 0.002})
+    with mta.connected(collect_metrics=True) as conn:
+        conn.reset_latency_stats()
+        for _ in range(5):
+            mta.symbol_info_tick('EURUSD')
+        mta.symbol_info_tick('NOPE')
+        stats = conn.latency_stats()
+        assert set(stats) == {'symbol_info_tick'}
+        assert stats['symbol_info_tick']['calls'] == 6 and stats['symbol_info_tick']['none_calls'] == 1
+        assert 2 <= stats['symbol_info_tick']['p50_ms'] <= stats['symbol_info_tick']['max_ms']
+        assert mta.core.get_latency_histograms()['symbol_info_tick'] is mta.symbol_info_tick.latency_histogram
+        conn.collect_metrics = False
+        mta.symbol_info_tick('EURUSD')
+        assert conn.latency_stats()['symbol_info_tick']['calls'] == 6
+        conn.reset_latency_stats()
+        assert conn.latency_stats() == {}
+
+
+def test_last_error_fetched_once_per_call(logger, monkeypatch):
+    calls = []
+
+    def counting_last_error():
+        calls.append(1)
+        return sim.last_error()
+
+    monkeypatch.setattr(mta.core, 'mt5_last_error', counting_last_error)
+    with mta.connected(logger=logger, raise_on_errors=True):
+        calls.clear()
+        with pytest.raises(mta.MT5Error):
+            mta.history_orders_total(',', ',')
+        assert len(calls) == 1
+        logger.setLevel(logging.INFO)
+        calls.clear()
+        mta.symbol_info_tick('EURUSD')
+        assert len(calls) == 0
+        with pytest.raises(mta.MT5Error):
+            mta.symbol_info_tick('NOPE')
+        assert len(calls) == 1
+        logger.setLevel(logging.DEBUG)
+
+
+def test_columnar_native_objects():
+    with mta.connected():
+        rates = mta.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.M1, 0, 1000)
+        ticks = mta.copy_ticks_from('EURUSD', datetime(2020, 6, 3, 11, tzinfo=timezone.utc), 100, mta.COPY_TICKS_ALL)
+    with mta.connected(return_as_native_python_objects='columns'):
+        columns = mta.copy_rates_from_pos('EURUSD', mta.TIMEFRAME.M1, 0, 1000)
+        tick_columns = mta.copy_ticks_from('EURUSD', datetime(2020, 6, 3, 11, tzinfo=timezone.utc), 100,
+                                           mta.COPY_TICKS_ALL)
+        info = mta.symbol_info_tick('EURUSD')
+        batch = mta.copy_rates_batch(['EURUSD', 'NOPE'], mta.TIMEFRAME.H1, count=2)
+    assert list(columns) == list(rates.dtype.names) and isinstance(info, dict)
+    assert columns['time'].typecode == 'q' and columns['close'].typecode == 'd' and columns['spread'].typecode == 'i'
+    for name in rates.dtype.names:
+        assert columns[name].tolist() == rates[name].tolist()
+    assert tick_columns['time_msc'].tolist() == ticks['time_msc'].tolist()
+    assert isinstance(batch['data']['EURUSD'], dict) and 'NOPE' in batch['errors']
+    assert pickle.loads(pickle.dumps(columns)) == columns
+    assert json.loads(json.dumps(columns, default=mta.json_default)) == {k: v.tolist() for k, v in columns.items()}
+    assert json.loads(json.dumps(rates[:2], default=mta.json_default)) == [list(r) for r in rates[:2].tolist()]